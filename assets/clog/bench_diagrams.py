@@ -0,0 +1,8 @@
+"""Benchmark the diagram pipeline on synthetic graphs (see diagram.bench)."""
+
+import sys
+
+from diagram.bench import main
+
+if __name__ == "__main__":
+    sys.exit(main())
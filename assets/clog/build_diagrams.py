@@ -0,0 +1,8 @@
+"""Build every diagram spec in assets/clog/specs (see diagram.build)."""
+
+import sys
+
+from diagram.build import main
+
+if __name__ == "__main__":
+    sys.exit(main())
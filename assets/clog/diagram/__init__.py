@@ -0,0 +1,11 @@
+"""Shared building blocks for the diagram generators in assets/clog."""
+
+from .live import Diff, LiveDiagram
+from .render import render
+from .spec import Edge, Graph, Node, Spec, SpecError, compile_spec, load_spec
+from .writer import SvgWriter
+
+__all__ = [
+    "Diff", "Edge", "Graph", "LiveDiagram", "Node", "Spec", "SpecError", "SvgWriter",
+    "compile_spec", "load_spec", "render",
+]
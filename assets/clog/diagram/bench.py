@@ -0,0 +1,238 @@
+"""Scaling benchmarks for the diagram pipeline.
+
+Synthetic graphs shaped like the published figures are compiled and
+rendered at growing sizes:
+
+* ``ccp_loop`` -- lanes of input -> logic <-> loop -> output stages (the
+  CCP control loop, one back-edge per stage group);
+* ``context_dag`` -- a ROOT with CTXB/RSN/FACT descendants, each node
+  drawing one or two parents from a recent window (the context DAG);
+* ``csd_cycle`` -- chained CSD blocks whose "new node" feeds back into the
+  block's DAG store (the CSD update cycle).
+
+Each run records wall time (untraced), peak Python memory (a second run
+under ``tracemalloc``) and output size, and is compared against the
+thresholds in ``bench/thresholds.json``: a value regresses when it exceeds
+the recorded baseline by more than the tolerance ratio. ``--profile
+SHAPE:N`` additionally dumps a cProfile of one run for ``snakeviz`` or a
+flamegraph converter such as ``flameprof``. Wall time and peak memory
+depend on the machine and interpreter, so CI checks only
+``--sizes 100,1000 --metrics output_bytes --no-trace``; run the full
+sweep locally before re-baselining.
+
+    python assets/clog/bench_diagrams.py --sizes 100,1000 --profile context_dag:1000
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import platform
+import pstats
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from .paths import CLOG_DIR
+from .render import render
+from .spec import compile_spec, spec_template
+
+BENCH_DIR = os.path.join(CLOG_DIR, "bench")
+THRESHOLDS_PATH = os.path.join(BENCH_DIR, "thresholds.json")
+RESULTS_PATH = os.path.join(BENCH_DIR, "results.json")
+SIZES = (100, 1000, 10_000, 100_000)
+METRICS = ("seconds", "peak_bytes", "output_bytes")
+# Allowed growth over the baseline before a run counts as a regression.
+DEFAULT_TOLERANCE = {"seconds": 1.5, "peak_bytes": 1.25, "output_bytes": 1.05}
+
+
+def template(name):
+    return spec_template(name, name=f"bench_{name}")
+
+
+def ccp_loop(n):
+    spec = template("ccp_architecture")
+    stages = ("input", "logic", "loop", "out")
+    groups = max(1, n // len(stages))
+    lanes = max(1, int((groups / 4) ** 0.5))
+    for g in range(groups):
+        ids = [f"{kind}{g}" for kind in stages]
+        for node_id, kind in zip(ids, stages, strict=True):
+            spec["nodes"].append({"id": node_id, "label": f"{kind.title()} {g}", "sub": "Stage", "type": kind,
+                                  "w": 140, "h": 70})
+        spec["edges"] += [[ids[0], ids[1]], [ids[1], ids[2]], [ids[2], ids[1]], [ids[2], ids[3]]]
+        if g + lanes < groups:
+            spec["edges"].append([ids[3], f"input{g + lanes}"])
+    return spec
+
+
+def context_dag(n, seed=0):
+    spec = template("context_dag")
+    rng = random.Random(seed)
+    kinds = (("idea", "CTXB"), ("reason", "RSN"), ("fact", "FACT"))
+    spec["nodes"].append({"id": "n0", "label": "ROOT", "sub": "Genesis", "type": "root"})
+    window = 32
+    for i in range(1, n):
+        kind, prefix = kinds[i % len(kinds)]
+        spec["nodes"].append({"id": f"n{i}", "label": f"{prefix}-{i:05d}", "sub": "Segment", "type": kind})
+        parents = {rng.randrange(max(0, i - window), i) for _ in range(rng.choice((1, 1, 2)))}
+        spec["edges"] += [[f"n{p}", f"n{i}"] for p in sorted(parents)]
+    return spec
+
+
+def csd_cycle(n):
+    spec = template("csd_architecture")
+    block = (("in", "std"), ("retr", "std"), ("dag", "db"), ("slm", "slm"), ("new", "root"))
+    blocks = max(1, n // len(block))
+    for b in range(blocks):
+        ids = {key: f"{key}{b}" for key, _ in block}
+        for key, kind in block:
+            spec["nodes"].append({"id": ids[key], "label": key.upper(), "sub": f"Block {b}", "type": kind,
+                                  "w": 120, "h": 60})
+        spec["edges"] += [[ids["in"], ids["retr"]], [ids["retr"], ids["dag"]], [ids["dag"], ids["slm"]],
+                          [ids["slm"], ids["new"]],
+                          {"source": ids["new"], "target": ids["dag"], "style": {"class": "cycle", "dash": "5 5"}}]
+        if b + 1 < blocks:
+            spec["edges"].append([ids["new"], f"in{b + 1}"])
+    return spec
+
+
+SHAPES = {"ccp_loop": ccp_loop, "context_dag": context_dag, "csd_cycle": csd_cycle}
+
+
+def run_pipeline(data, target):
+    render(compile_spec(data), target)
+
+
+def measure(shape, n, workdir, trace=True):
+    """Benchmark one synthetic graph; returns a result record.
+
+    ``trace=False`` skips the (several times slower) ``tracemalloc`` run and
+    leaves ``peak_bytes`` as ``None``.
+    """
+    data = SHAPES[shape](n)
+    target = os.path.join(workdir, f"{shape}-{n}.svg")
+    started = time.perf_counter()
+    run_pipeline(data, target)
+    seconds = time.perf_counter() - started
+    peak = None
+    if trace:
+        tracemalloc.start()
+        try:
+            run_pipeline(data, target)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {"shape": shape, "nodes": len(data["nodes"]), "edges": len(data["edges"]), "size": n,
+            "seconds": round(seconds, 4), "peak_bytes": peak, "output_bytes": os.path.getsize(target)}
+
+
+def profile(shape, n, workdir, out_dir, out=sys.stdout):
+    """Run one case under cProfile; writes ``<shape>-<n>.prof`` and prints the top entries."""
+    data = SHAPES[shape](n)
+    profiler = cProfile.Profile()
+    profiler.runcall(run_pipeline, data, os.path.join(workdir, f"{shape}-{n}.svg"))
+    path = os.path.join(out_dir, f"{shape}-{n}.prof")
+    profiler.dump_stats(path)
+    print(f"profile written to {path}", file=out)
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(15)
+    return path
+
+
+def load_thresholds(path=THRESHOLDS_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"tolerance": dict(DEFAULT_TOLERANCE), "baseline": {}}
+
+
+def regressions(results, thresholds, metrics=METRICS):
+    """``(shape, size, metric, value, limit)`` for every value of ``metrics`` over its threshold."""
+    tolerance = {**DEFAULT_TOLERANCE, **thresholds.get("tolerance", {})}
+    found = []
+    for result in results:
+        base = thresholds.get("baseline", {}).get(result["shape"], {}).get(str(result["size"]))
+        if not base:
+            continue
+        for metric in metrics:
+            if metric in base and result[metric] is not None:
+                limit = base[metric] * tolerance[metric]
+                if result[metric] > limit:
+                    found.append((result["shape"], result["size"], metric, result[metric], limit))
+    return found
+
+
+def updated_thresholds(results, thresholds):
+    baseline = thresholds.setdefault("baseline", {})
+    thresholds.setdefault("tolerance", dict(DEFAULT_TOLERANCE))
+    for result in results:
+        record = {m: result[m] for m in METRICS if result[m] is not None}
+        baseline.setdefault(result["shape"], {}).setdefault(str(result["size"]), {}).update(record)
+    return thresholds
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the diagram pipeline on synthetic graphs.")
+    parser.add_argument("--shapes", default=",".join(SHAPES), help="comma-separated graph shapes")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="comma-separated node counts")
+    parser.add_argument("--output", default=RESULTS_PATH, help="results file (JSON)")
+    parser.add_argument("--thresholds", default=THRESHOLDS_PATH, help="baseline and tolerance file (JSON)")
+    parser.add_argument("--update-thresholds", action="store_true",
+                        help="record this run as the new baseline instead of checking it")
+    parser.add_argument("--metrics", default=",".join(METRICS), help="comma-separated metrics to check")
+    parser.add_argument("--no-trace", action="store_true", help="skip the tracemalloc peak-memory runs")
+    parser.add_argument("--profile", metavar="SHAPE:N", help="also dump a cProfile of one run")
+    args = parser.parse_args(argv)
+
+    shapes = [s for s in args.shapes.split(",") if s]
+    unknown = set(shapes) - SHAPES.keys()
+    if unknown:
+        parser.error(f"unknown shape(s): {', '.join(sorted(unknown))}")
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    metrics = [m for m in args.metrics.split(",") if m]
+    if set(metrics) - set(METRICS):
+        parser.error(f"unknown metric(s): {', '.join(sorted(set(metrics) - set(METRICS)))}")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="diagram-bench-") as workdir:
+        for shape in shapes:
+            for n in sizes:
+                result = measure(shape, n, workdir, trace=not args.no_trace)
+                results.append(result)
+                peak = "-" if result["peak_bytes"] is None else f"{result['peak_bytes'] / 2**20:.1f}"
+                print(f"{shape:>12} n={result['nodes']:>7,} e={result['edges']:>7,}  "
+                      f"{result['seconds']:8.3f} s  peak {peak:>8} MiB  "
+                      f"out {result['output_bytes'] / 1024:9.1f} KiB")
+        if args.profile:
+            shape, _, n = args.profile.partition(":")
+            if shape not in SHAPES or not n.isdigit():
+                parser.error("--profile expects SHAPE:N, e.g. context_dag:1000")
+            profile(shape, int(n), workdir, os.path.dirname(os.path.abspath(args.output)))
+
+    thresholds = load_thresholds(args.thresholds)
+    found = [] if args.update_thresholds else regressions(results, thresholds, metrics)
+    write_json(args.output, {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+        "regressions": [dict(zip(("shape", "size", "metric", "value", "limit"), r, strict=True)) for r in found],
+    })
+    print(f"results written to {args.output}")
+    if args.update_thresholds:
+        write_json(args.thresholds, updated_thresholds(results, thresholds))
+        print(f"baseline updated in {args.thresholds}")
+    for shape, size, metric, value, limit in found:
+        print(f"REGRESSION {shape} n={size}: {metric} {value:,} > {limit:,.0f}")
+    return 1 if found else 0
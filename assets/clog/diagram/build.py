@@ -0,0 +1,389 @@
+"""Incremental build driver for every spec in ``assets/clog/specs``.
+
+Each diagram's inputs are its spec, its theme, its ``generate_<name>.py``
+wrapper (if any) and the engine sources in this package. A manifest records the
+SHA-256 of every input and of the output it produced; a diagram is rebuilt
+only when one of those hashes changes or the output is missing or was
+edited by hand. File hashes are cached against ``(mtime_ns, size)`` so a
+no-op build only stats files. The paint-cost estimate of every output
+(``diagram.cost``) is kept in the manifest and checked against the spec's
+``paint_budget``, and rebuilt diagrams report nodes whose text does not fit
+their box (``diagram.text``). A spec's ``variants`` (``diagram.variants``)
+are written from the same layout pass as its main output and are tracked
+like it. Size and paint budgets are checked first; when they all hold,
+every output is published under a content-hashed name
+(``diagram.fingerprint``), with gzip and brotli sidecars for hosts that
+serve precompressed files (``diagram.compress``). A build over budget
+publishes nothing. All of these files are kept in a content-addressed
+store (``diagram.store``) and materialized from it as clones or copies of
+one blob per distinct content. The build only writes under the project's
+sources; Quarto copies the sidecars into the rendered site through
+``resources:`` in ``_quarto.yml``, and its ``post-render`` step
+(``publish_site.py``) adds the hashed copies and points the rendered
+pages at them.
+
+Rebuilds are timed per phase (``diagram.timing``): ``--timings`` writes a
+JSON report and ``--trace`` a Chrome trace. ``_quarto.yml`` runs this as
+its ``pre-render`` step, so every site build regenerates stale figures
+and reports where the time went.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .compress import compress_outputs, format_sizes
+from .cost import format_cost, over_budget
+from .fingerprint import load_asset_manifest, publish, save_asset_manifest
+from .optimize import ByteCounter
+from .paths import CLOG_DIR, PACKAGE_DIR, SPECS_DIR, find_project_root, theme_path
+from .render import Scene
+from .spec import load_spec
+from .store import Store, sha256_file
+from .text import overflows
+from .timing import Timer, chrome_trace, format_timings, timing_report, write_json
+from .variants import body_key, parse_variants, render_variants
+
+MANIFEST_NAME = ".build-manifest.json"
+MANIFEST_VERSION = 2
+
+
+class FileHasher:
+    """SHA-256 of files, reusing previous hashes while ``(mtime_ns, size)`` is unchanged."""
+
+    def __init__(self, root, previous=None):
+        self.root = root
+        self.previous = previous or {}
+        self.files = {}
+
+    def rel(self, path):
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def __call__(self, path):
+        key = self.rel(path)
+        entry = self.files.get(key)
+        if entry is not None:
+            return entry["sha256"]
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        old = self.previous.get(key)
+        if old and old["mtime_ns"] == st.st_mtime_ns and old["size"] == st.st_size:
+            entry = old
+        else:
+            entry = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": sha256_file(path)}
+        self.files[key] = entry
+        return entry["sha256"]
+
+
+class Diagram:
+    """One buildable figure: its spec and the files its output depends on."""
+
+    def __init__(self, name, spec_path, output, inputs, budget_kb=None, variants=()):
+        self.name = name
+        self.spec_path = spec_path
+        self.output = output
+        self.inputs = inputs
+        self.budget_kb = budget_kb
+        self.variants = list(variants)  # absolute variant output paths
+
+    def __repr__(self):
+        return f"Diagram({self.name!r})"
+
+
+def engine_sources():
+    return sorted(os.path.join(PACKAGE_DIR, f) for f in os.listdir(PACKAGE_DIR) if f.endswith(".py"))
+
+
+def discover(root, specs_dir=SPECS_DIR, names=None):
+    """Every spec under ``specs_dir`` (optionally filtered by ``names``) as a ``Diagram``."""
+    engine = engine_sources()
+    diagrams = []
+    for entry in sorted(os.listdir(specs_dir)):
+        name, ext = os.path.splitext(entry)
+        if ext != ".json" or (names and name not in names):
+            continue
+        spec_path = os.path.join(specs_dir, entry)
+        with open(spec_path, encoding="utf-8") as f:
+            data = json.load(f)
+        output = data.get("output") or f"assets/clog/{name}.svg"
+        inputs = [spec_path] + engine
+        if data.get("theme"):
+            inputs.append(theme_path(data["theme"]))
+        wrapper = os.path.join(CLOG_DIR, f"generate_{name}.py")
+        if os.path.exists(wrapper):
+            inputs.append(wrapper)
+        variants = [os.path.join(root, v["output"]) for v in data.get("variants", []) if "output" in v]
+        diagrams.append(Diagram(name, spec_path, os.path.join(root, output), inputs, data.get("size_budget_kb"),
+                                variants))
+    if names:
+        missing = set(names) - {d.name for d in diagrams}
+        if missing:
+            raise SystemExit(f"unknown diagram(s): {', '.join(sorted(missing))}")
+    return diagrams
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"version": MANIFEST_VERSION, "files": {}, "diagrams": {}}
+    if data.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "files": {}, "diagrams": {}}
+    return data
+
+
+def save_manifest(path, manifest):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def stale_reasons(diagram, record, hasher, low_cost=False):
+    """Why ``diagram`` must be rebuilt (empty when it is up to date)."""
+    if record is None:
+        return ["never built"]
+    reasons = []
+    if record.get("low_cost", False) != low_cost:
+        reasons.append("render mode changed")
+    old_inputs = record.get("inputs", {})
+    current = {hasher.rel(p): hasher(p) for p in diagram.inputs}
+    for rel, digest in current.items():
+        if rel not in old_inputs:
+            reasons.append(f"new input {rel}")
+        elif old_inputs[rel] != digest:
+            reasons.append(f"changed {rel}")
+    for rel in old_inputs.keys() - current.keys():
+        reasons.append(f"dropped input {rel}")
+    if hasher.rel(diagram.output) != record.get("output"):
+        reasons.append("output path changed")
+    out_hash = hasher(diagram.output)
+    if out_hash is None:
+        reasons.append("output missing")
+    elif out_hash != record.get("output_sha256"):
+        reasons.append("output modified outside the build")
+    old_variants = record.get("variants", {})
+    for path in diagram.variants:
+        rel = hasher.rel(path)
+        digest = hasher(path)
+        if digest is None:
+            reasons.append(f"variant {rel} missing")
+        elif digest != old_variants.get(rel):
+            reasons.append(f"variant {rel} modified outside the build")
+    return reasons
+
+
+def build_one(diagram, low_cost=False, jobs=1):
+    """Render one diagram (atomically).
+
+    Returns ``(bytes unoptimised, bytes written, paint cost, paint budget,
+    text overflows, variant results, timer)``; ``low_cost`` forces halos in
+    place of blur filters. Layout and routing run once for all of the outputs.
+    """
+    timer = Timer(diagram.name)
+    with timer.phase("parse"):
+        spec = load_spec(diagram.spec_path)
+    scene = Scene(spec, timer)
+    baseline = ByteCounter()
+    scene.write(baseline, optimize=False)
+    optimize = {"halos": True} if low_cost else None
+    variants = parse_variants(spec)
+    keep = scene.body_key(optimize) in {body_key(scene, variant, optimize) for variant in variants}
+    # Identical bytes leave the existing output (and its mtime) untouched
+    cost, _, _ = Store().capture(diagram.output, lambda path: scene.write(path, optimize=optimize, keep=keep))
+    variants = render_variants(scene, variants, optimize=optimize, jobs=jobs)
+    overflow = overflows(spec, spec.graph.nodes, scene.styles)
+    return baseline.size, os.path.getsize(diagram.output), cost, spec.paint_budget, overflow, variants, timer
+
+
+class BuildReport:
+    """What a build did: rebuild reasons, sizes and budget violations."""
+
+    def __init__(self):
+        self.rebuilt = {}
+        self.sizes = {}
+        self.over_budget = {}
+        self.paint_costs = {}
+        self.over_paint_budget = {}
+        self.timers = []
+        self.compressed = {}
+
+    @property
+    def ok(self):
+        return not self.over_budget and not self.over_paint_budget
+
+
+def build(names=None, force=False, jobs=None, budget_kb=None, low_cost=False, root=None, hash_names=True,
+          compress=True, timings=None, trace=None, slow_ms=None, out=sys.stdout):
+    """Rebuild stale diagrams, check their budgets and, if all hold, publish hashed and precompressed copies.
+
+    Returns a ``BuildReport``. ``timings`` and ``trace`` are paths for the
+    phase-timing report and its Chrome trace; rebuilds slower than
+    ``slow_ms`` are flagged.
+    """
+    root = root or find_project_root()
+    manifest_path = os.path.join(CLOG_DIR, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    hasher = FileHasher(root, manifest["files"])
+    started = time.perf_counter()
+
+    diagrams = discover(root, names=names)
+    stale = []
+    for diagram in diagrams:
+        record = manifest["diagrams"].get(diagram.name)
+        reasons = ["forced"] if force else stale_reasons(diagram, record, hasher, low_cost)
+        if reasons:
+            stale.append((diagram, reasons))
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(stale)))
+    todo = [d for d, _ in stale]
+    if jobs == 1:
+        # A single stale diagram may still write its variants in parallel
+        results = [build_one(diagram, low_cost, jobs=None if len(todo) == 1 else 1) for diagram in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(build_one, todo, [low_cost] * len(todo)))
+
+    report = BuildReport()
+    for (diagram, reasons), (before, after, cost, paint_budget, overflow, variants, timer) in zip(
+            stale, results, strict=True):
+        hasher.files.pop(hasher.rel(diagram.output), None)
+        manifest["diagrams"][diagram.name] = {
+            "spec": hasher.rel(diagram.spec_path),
+            "output": hasher.rel(diagram.output),
+            "inputs": {hasher.rel(p): hasher(p) for p in diagram.inputs},
+            "output_sha256": hasher(diagram.output),
+            "low_cost": low_cost,
+            "paint_cost": cost,
+            "paint_budget": paint_budget,
+            "variants": {},
+        }
+        for _, path, _, _ in variants:
+            hasher.files.pop(hasher.rel(path), None)
+            manifest["diagrams"][diagram.name]["variants"][hasher.rel(path)] = hasher(path)
+        report.rebuilt[diagram.name] = reasons
+        report.sizes[diagram.name] = (before, after)
+        saved = 100 * (1 - after / before) if before else 0
+        print(f"rebuilt {diagram.name}: {'; '.join(reasons)}", file=out)
+        print(f"  {hasher.rel(diagram.output)}: {before:,} -> {after:,} bytes ({-saved:+.0f}%)", file=out)
+        print(f"  paint: {format_cost(cost)}", file=out)
+        print(f"  time: {format_timings(timer.totals())}", file=out)
+        report.timers.append(timer)
+        for name, path, size, _ in variants:
+            print(f"  {hasher.rel(path)} ({name}): {size:,} bytes", file=out)
+        for node_id, needed, width in overflow:
+            print(f"  text overflow: {node_id} needs {needed} > w={width}", file=out)
+
+    manifest["files"].update(hasher.files)
+
+    for diagram in diagrams:
+        limit = diagram.budget_kb if diagram.budget_kb is not None else budget_kb
+        if limit is None:
+            continue
+        size = os.path.getsize(diagram.output)
+        if size > limit * 1024:
+            report.over_budget[diagram.name] = (size, limit)
+            print(f"OVER BUDGET {diagram.name}: {size:,} bytes > {limit} KB", file=out)
+
+    # Paint costs of up-to-date diagrams come from the manifest
+    for diagram in diagrams:
+        record = manifest["diagrams"].get(diagram.name, {})
+        cost = record.get("paint_cost")
+        if cost is None:
+            continue
+        report.paint_costs[diagram.name] = cost
+        exceeded = over_budget(cost, record.get("paint_budget"))
+        if exceeded:
+            report.over_paint_budget[diagram.name] = exceeded
+            details = ", ".join(f"{key} {value:,} > {limit:,}" for key, (value, limit) in exceeded.items())
+            print(f"OVER PAINT BUDGET {diagram.name}: {details}", file=out)
+
+    # Every output lives in the store; ones written before it existed are adopted
+    store = Store()
+    stored = {}
+    outputs = {}
+    for diagram in diagrams:
+        record = manifest["diagrams"].get(diagram.name, {})
+        if record.get("output_sha256"):
+            outputs[record["output"]] = record["output_sha256"]
+        outputs.update(record.get("variants", {}))
+    for rel, digest in outputs.items():
+        stored[rel] = store.add(os.path.join(root, rel), digest)
+    if not report.ok:
+        # Nothing from a build over budget is published; the last good records stay in the store
+        print("over budget: skipped publishing and precompression", file=out)
+        stored = {**manifest.get("store", {}), **stored}
+    elif hash_names:
+        assets = load_asset_manifest()
+        for rel, target in publish(root, outputs, assets, store):
+            print(f"published {rel} as {os.path.basename(target)}", file=out)
+        save_asset_manifest(assets)
+        # The hashed copies are what the pages serve
+        outputs = {assets[rel]: digest for rel, digest in outputs.items()}
+        stored.update(outputs)
+    if compress and report.ok:
+        records, compressed = compress_outputs(root, outputs, manifest.get("compressed", {}), jobs)
+        manifest["compressed"] = records
+        report.compressed = records
+        for rel in compressed:
+            print(f"compressed {rel}: {records[rel]['raw']:,} bytes -> {format_sizes(records[rel])}", file=out)
+        if records:
+            totals = {}
+            for record in records.values():
+                for key in ("raw", "gz", "br"):
+                    if key in record:
+                        totals[key] = totals.get(key, 0) + record[key]
+            print(f"precompressed {len(records)} file(s): {totals['raw']:,} bytes -> {format_sizes(totals)}",
+                  file=out)
+        for rel, record in records.items():
+            for key, digest in record["digests"].items():
+                stored[f"{rel}.{key}"] = store.add(os.path.join(root, f"{rel}.{key}"), digest)
+    manifest["store"] = stored
+    save_manifest(manifest_path, manifest)
+
+    for timer in report.timers:
+        total = sum(timer.totals().values())
+        if slow_ms is not None and total > slow_ms:
+            print(f"SLOW {timer.name}: {total:,.1f} ms > {slow_ms:,} ms", file=out)
+    if timings:
+        write_json(timings, dict(timing_report(report.timers, time.perf_counter() - started),
+                                 up_to_date=[d.name for d in diagrams if d.name not in report.rebuilt]))
+    if trace:
+        write_json(trace, chrome_trace(report.timers))
+
+    elapsed = (time.perf_counter() - started) * 1000
+    if not report.rebuilt:
+        print(f"all diagrams up to date ({elapsed:.1f} ms)", file=out)
+    else:
+        print(f"rebuilt {len(report.rebuilt)} diagram(s) in {elapsed:.1f} ms using {jobs} worker(s)", file=out)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the generated diagrams in assets/clog.")
+    parser.add_argument("names", nargs="*", help="diagrams to build (default: all specs)")
+    parser.add_argument("--force", action="store_true", help="rebuild even if nothing changed")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--budget-kb", type=float, default=None,
+                        help="size budget for specs that do not set size_budget_kb")
+    parser.add_argument("--low-cost", action="store_true",
+                        help="replace blur glow filters with stroke halos in every diagram")
+    parser.add_argument("--no-hash", action="store_true",
+                        help="skip the content-hashed copies")
+    parser.add_argument("--no-compress", action="store_true", help="skip the precompressed .gz/.br sidecars")
+    parser.add_argument("--timings", metavar="PATH", help="write per-diagram phase timings (JSON)")
+    parser.add_argument("--trace", metavar="PATH", help="write the phase timings as a Chrome trace (JSON)")
+    parser.add_argument("--slow-ms", type=float, default=None, help="flag rebuilds that take longer than this")
+    args = parser.parse_args(argv)
+    report = build(names=args.names or None, force=args.force, jobs=args.jobs, budget_kb=args.budget_kb,
+                   low_cost=args.low_cost, hash_names=not args.no_hash,
+                   compress=not args.no_compress, timings=args.timings, trace=args.trace,
+                   slow_ms=args.slow_ms)
+    return 0 if report.ok else 1
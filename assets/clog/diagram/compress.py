@@ -0,0 +1,85 @@
+"""Precompressed copies of the published diagrams.
+
+Next to every published SVG the build writes ``name.svg.gz`` (gzip at
+level 9) and, when the ``brotli`` module is installed, ``name.svg.br``
+(quality 11). Hosts and CDNs that serve precompressed files (nginx
+``gzip_static``/``brotli_static`` and the like) can then send them as is
+instead of compressing on the fly; ``.gz`` sidecars are plain gzip, so
+they are also valid ``.svgz`` files. gzip output carries no timestamp and
+is therefore reproducible.
+
+A file is compressed again only when its SHA-256 differs from the one
+recorded for its sidecars (or a sidecar is missing). Files are compressed
+in a thread pool: zlib and brotli release the GIL while they work.
+"""
+
+import gzip
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli
+except ImportError:  # optional: gzip sidecars only
+    brotli = None
+
+SUFFIXES = (".gz", ".br")
+
+
+def encoders():
+    """``{suffix: encode}`` for every available encoding, at its highest level."""
+    found = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        found[".br"] = lambda data: brotli.compress(data, quality=11)
+    return found
+
+
+def compress_file(path, encoders):
+    """Write one sidecar per encoder next to ``path``.
+
+    Returns ``{"raw": bytes, "gz": bytes, ..., "digests": {"gz": sha256, ...}}``.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    sizes = {"raw": len(data), "digests": {}}
+    for suffix, encode in encoders.items():
+        packed = encode(data)
+        tmp = f"{path}{suffix}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(packed)
+        os.replace(tmp, path + suffix)
+        sizes[suffix[1:]] = len(packed)
+        sizes["digests"][suffix[1:]] = hashlib.sha256(packed).hexdigest()
+    return sizes
+
+
+def compress_outputs(root, outputs, previous, jobs=None):
+    """Compress each ``{rel: sha256}`` of ``outputs`` whose sidecars are stale.
+
+    ``previous`` holds the records of an earlier run. Returns ``(records,
+    compressed)``: a record ``{"sha256", "raw", "gz"[, "br"], "digests"}`` for every
+    output, and the paths compressed by this call.
+    """
+    encode = encoders()
+    records = {}
+    todo = []
+    for rel, digest in sorted(outputs.items()):
+        record = previous.get(rel)
+        path = os.path.join(root, rel)
+        fresh = (record is not None and record.get("sha256") == digest and "digests" in record
+                 and all(suffix[1:] in record and os.path.exists(path + suffix) for suffix in encode))
+        if fresh:
+            records[rel] = record
+        else:
+            todo.append(rel)
+    if todo:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            sizes = pool.map(compress_file, [os.path.join(root, rel) for rel in todo], [encode] * len(todo))
+            for rel, result in zip(todo, sizes, strict=True):
+                records[rel] = dict(result, sha256=outputs[rel])
+    return records, todo
+
+
+def format_sizes(record):
+    raw = record["raw"]
+    return ", ".join(f"{key} {record[key]:,} ({raw / record[key]:.1f}x)" for key in ("gz", "br") if key in record)
@@ -0,0 +1,127 @@
+"""Paint-cost estimate for generated SVGs.
+
+``PaintCost`` is a chunk transform for ``SvgWriter`` (like
+``optimize.Minifier``) that passes chunks through unchanged and tallies
+what a browser has to paint: elements with a ``filter`` (each one is
+rasterised offscreen and blurred on every repaint), the area of those
+filter regions, and the number of path segments. Content of ``<symbol>``
+and ``<marker>`` is charged once per ``<use>``/``marker-end`` that paints
+it; other ``<defs>`` content is not painted directly.
+"""
+
+import re
+
+from .optimize import ATTR
+
+OPEN = re.compile(r"<([A-Za-z][\w:-]*)((?:\s+[\w:-]+=\"[^\"]*\")*)\s*(/?)>")
+CLOSE = re.compile(r"</([A-Za-z][\w:-]*)>")
+COMMANDS = re.compile(r"[LCQSTHVAZlcqsthvaz]")
+NUMBER = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:e-?\d+)?")
+# Filter regions in the defs library extend 20% past the bbox on each side.
+FILTER_SCALE = 1.4 ** 2
+TEMPLATES = ("symbol", "marker")
+FIELDS = ("filtered", "filter_area", "segments")
+
+
+def _float(attrs, key):
+    try:
+        return float(attrs.get(key, 0))
+    except ValueError:
+        return 0.0
+
+
+def bbox_area(tag, attrs):
+    """Bounding-box area of a basic shape or path (0 when unknown, e.g. text)."""
+    if tag in ("rect", "image", "use"):
+        return _float(attrs, "width") * _float(attrs, "height")
+    if tag == "circle":
+        return (2 * _float(attrs, "r")) ** 2
+    if tag == "ellipse":
+        return 4 * _float(attrs, "rx") * _float(attrs, "ry")
+    coords = attrs.get("d") or attrs.get("points")
+    if coords:
+        nums = [float(n) for n in NUMBER.findall(coords)]
+        xs, ys = nums[0::2], nums[1::2]
+        if xs and ys:
+            return (max(xs) - min(xs)) * (max(ys) - min(ys))
+    return 0.0
+
+
+def segments(tag, attrs):
+    if tag == "path":
+        return len(COMMANDS.findall(attrs.get("d", "")))
+    if tag in ("polygon", "polyline"):
+        points = len(NUMBER.findall(attrs.get("points", ""))) // 2
+        return points if tag == "polygon" else max(points - 1, 0)
+    if tag == "line":
+        return 1
+    return 0
+
+
+class PaintCost:
+    """Chunk transform that estimates paint cost; see ``report()``."""
+
+    def __init__(self):
+        self.totals = dict.fromkeys(FIELDS, 0)
+        self.templates = {}
+        self._stack = []
+        self._template = None
+
+    def _charge(self, cost):
+        target = self.templates[self._template] if self._template else self.totals
+        for key in FIELDS:
+            target[key] += cost[key]
+
+    def _element(self, tag, attrs):
+        if self._template is None and "defs" in self._stack:
+            return
+        cost = dict.fromkeys(FIELDS, 0)
+        cost["segments"] = segments(tag, attrs)
+        if "filter" in attrs:
+            cost["filtered"] = 1
+            cost["filter_area"] = bbox_area(tag, attrs) * FILTER_SCALE
+        self._charge(cost)
+        refs = [attrs.get("href", "").lstrip("#") if tag == "use" else None]
+        marker = attrs.get("marker-end", "")
+        if marker.startswith("url(#"):
+            refs.append(marker[5:-1])
+        for ref in refs:
+            if ref in self.templates:
+                self._charge(self.templates[ref])
+
+    def __call__(self, chunk):
+        for match in OPEN.finditer(chunk):
+            tag, raw, selfclosing = match.groups()
+            attrs = dict(ATTR.findall(raw))
+            if tag in TEMPLATES and "id" in attrs and not selfclosing:
+                self._template = attrs["id"]
+                self.templates[self._template] = dict.fromkeys(FIELDS, 0)
+            else:
+                self._element(tag, attrs)
+            if not selfclosing:
+                self._stack.append(tag)
+        for _ in CLOSE.finditer(chunk):
+            if self._stack and self._stack.pop() in TEMPLATES:
+                self._template = None
+        return chunk
+
+    def add(self, cost):
+        """Charge a cost measured elsewhere (e.g. of markup spliced in unmetered)."""
+        for key in FIELDS:
+            self.totals[key] += cost[key]
+
+    def report(self):
+        totals = dict(self.totals)
+        totals["filter_area"] = round(totals["filter_area"])
+        return totals
+
+
+def format_cost(cost):
+    return (f"{cost['filtered']} filtered element(s), {cost['filter_area']:,} px² filtered, "
+            f"{cost['segments']:,} path segment(s)")
+
+
+def over_budget(cost, budget):
+    """Budget fields of ``budget`` that ``cost`` exceeds, as ``{field: (value, limit)}``."""
+    return {key: (cost[key], limit) for key, limit in (budget or {}).items()
+            if key in cost and cost[key] > limit}
@@ -0,0 +1,92 @@
+"""Shared ``<defs>`` library.
+
+The glow filter and the two arrow markers used across the figures are
+defined once here; specs reference them by name (``"glow"``) or extend a
+library entry (``{"id": "glow", "from": "glow", "std": 3}``). Definitions
+that are identical are emitted once and every other id is aliased to it,
+so ``url(#...)`` references stay valid. Colours are written as theme
+variables (``diagram.theme.paint``).
+
+In halo mode (the low-cost render mode) glow filters are not emitted at
+all; their blur radius is recorded in ``spec.halos`` and the renderer
+paints stroke halos in their place.
+"""
+
+import json
+
+from .spec import SpecError
+from .theme import paint
+
+LIBRARY = {
+    "glow": {"kind": "glow", "std": 2},
+    "arrow": {"kind": "marker", "style": "notch", "color": "line"},
+    "arrowhead": {"kind": "marker", "style": "triangle", "color": "line"},
+}
+
+
+def expand(entry):
+    if isinstance(entry, str):
+        if entry not in LIBRARY:
+            raise SpecError(f"unknown library def {entry!r}")
+        return dict(LIBRARY[entry], id=entry)
+    base = entry.get("from")
+    if base is not None and base not in LIBRARY:
+        raise SpecError(f"def {entry.get('id')!r} extends unknown library def {base!r}")
+    d = dict(LIBRARY.get(base, {}))
+    d.update({k: v for k, v in entry.items() if k != "from"})
+    if "id" not in d:
+        raise SpecError(f"def {entry!r} has no id")
+    return d
+
+
+def resolve_defs(spec, halos=False):
+    """Expanded, de-duplicated defs of ``spec``; records aliases on the spec.
+
+    With ``halos`` glow filters are dropped and ``spec.halos`` maps each glow
+    id to its blur standard deviation instead.
+    """
+    unique = []
+    by_content = {}
+    aliases = {}
+    spec.halos = {}
+    for entry in spec.defs:
+        d = expand(entry)
+        if halos and d.get("kind") == "glow":
+            spec.halos[d["id"]] = d.get("std", 2)
+            continue
+        content = {k: v for k, v in d.items() if k != "id"}
+        key = json.dumps(content, sort_keys=True)
+        if key in by_content:
+            aliases[d["id"]] = by_content[key]
+            continue
+        by_content[key] = d["id"]
+        unique.append(d)
+    spec.def_aliases = aliases
+    return unique
+
+
+def draw_defs(svg, spec, defs):
+    for d in defs:
+        kind = d.get("kind")
+        if kind == "glow":
+            with svg.group("filter", id=d["id"], x="-20%", y="-20%", width="140%", height="140%"):
+                svg.element("feGaussianBlur", stdDeviation=d.get("std", 2), result="blur")
+                svg.element("feComposite", in_="SourceGraphic", in2="blur", operator="over")
+        elif kind == "marker":
+            fill = paint(spec, fill=d.get("color", "line"))
+            if d.get("style") == "triangle":
+                with svg.group("marker", id=d["id"], markerWidth=10, markerHeight=7, refX=9, refY=3.5,
+                               orient="auto"):
+                    svg.element("polygon", points="0 0, 10 3.5, 0 7", **fill)
+            else:
+                with svg.group("marker", id=d["id"], markerWidth=10, markerHeight=10, refX=9, refY=3,
+                               orient="auto", markerUnits="strokeWidth"):
+                    svg.element("path", d="M0,0 L0,6 L9,3 z", **fill)
+        elif kind == "gradient":
+            with svg.group("linearGradient", id=d["id"], x1=d.get("x1", "0%"), y1=d.get("y1", "0%"),
+                           x2=d.get("x2", "100%"), y2=d.get("y2", "0%")):
+                for stop in d["stops"]:
+                    svg.element("stop", offset=stop["offset"], stop_opacity=stop.get("opacity"),
+                                **paint(spec, stop_color=stop["color"]))
+        else:
+            raise SpecError(f"unknown def kind {kind!r}")
@@ -0,0 +1,193 @@
+"""Content-hashed copies of the generated diagrams, and the rendered pages that embed them.
+
+Every build output (``architecture.svg``) is also published under a name
+carrying a prefix of its SHA-256 (``architecture.1f0e3c9a2b.svg``) next to
+it, and ``asset-manifest.json`` maps each logical path to its hashed one::
+
+    {"assets": {"assets/images/architecture.svg": "assets/images/architecture.1f0e3c9a2b.svg"}, ...}
+
+Hashed copies are build products: only the logical files are committed,
+the ``.qmd`` sources keep naming them, and the pre-render build recreates
+the hashed ones. After Quarto has rendered the site, ``publish_site``
+(its ``post-render`` step) copies the hashed files into the output
+directory and rewrites the ``src``, ``href``, ``data`` and ``content``
+attributes of every rendered page that name a managed file. References
+may name the logical file (with or without a hand-bumped ``?v=13``) or an
+older hashed copy, relative to the page or to the site root, and keep
+their form. A hashed URL changes exactly when its diagram does, so the
+published files can be cached as immutable. Superseded hashed copies (and
+their precompressed sidecars) are deleted, in the sources and in the site.
+
+    python assets/clog/publish_site.py --site docs
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+
+from .compress import SUFFIXES
+from .paths import CLOG_DIR, find_project_root, site_dir
+
+ASSET_MANIFEST = os.path.join(CLOG_DIR, "asset-manifest.json")
+HASH_LENGTH = 10
+
+HASHED_NAME = re.compile(r"^(?P<stem>.+)\.[0-9a-f]{%d}(?P<ext>\.[^./]+)$" % HASH_LENGTH)
+# Attributes of rendered pages that may name a diagram
+ATTR_REF = re.compile(r"""((?<![\w-])(?:src|href|data|content)=)(["'])(.*?)\2""", re.IGNORECASE | re.DOTALL)
+
+
+def hashed_path(rel, digest):
+    """``rel`` with ``digest``'s first ``HASH_LENGTH`` hex digits inserted before the extension."""
+    stem, ext = os.path.splitext(rel)
+    return f"{stem}.{digest[:HASH_LENGTH]}{ext}"
+
+
+def logical_path(rel):
+    """The logical path a hashed ``rel`` was published from (``rel`` itself if it is not hashed)."""
+    match = HASHED_NAME.match(rel)
+    return match["stem"] + match["ext"] if match else rel
+
+
+def load_asset_manifest(path=ASSET_MANIFEST):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f).get("assets", {})
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_asset_manifest(assets, path=ASSET_MANIFEST):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"hash": "sha256", "length": HASH_LENGTH, "assets": assets}, f, indent=1, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def publish(root, outputs, assets, store=None):
+    """Copy each ``{rel: sha256}`` of ``outputs`` to its hashed name, updating ``assets`` in place.
+
+    With a ``diagram.store.Store`` holding the outputs, hashed copies are
+    materialized from it (as clones or copies) instead. Returns the
+    ``(logical, hashed)`` pairs that changed. Hashed copies that ``assets``
+    recorded before and no longer maps to are removed.
+    """
+    changed = []
+    for rel, digest in sorted(outputs.items()):
+        target = hashed_path(rel, digest)
+        path = os.path.join(root, target)
+        if store is not None:
+            store.materialize(digest, path)
+        elif not os.path.exists(path):
+            tmp = f"{path}.tmp"
+            shutil.copyfile(os.path.join(root, rel), tmp)
+            os.replace(tmp, path)
+        old = assets.get(rel)
+        if old != target:
+            assets[rel] = target
+            changed.append((rel, target))
+            if old and old not in assets.values():
+                for suffix in ("",) + SUFFIXES:
+                    try:
+                        os.remove(os.path.join(root, old + suffix))
+                    except FileNotFoundError:
+                        pass
+    return changed
+
+
+def site_pages(site):
+    """Every rendered ``.html`` page under ``site``."""
+    for dirpath, dirnames, filenames in os.walk(site):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.endswith(".html"):
+                yield os.path.join(dirpath, name)
+
+
+def _rewrite(ref, page_dir, root, assets):
+    """The hashed form of reference ``ref`` on a page in ``page_dir``, or ``None`` if it is not managed."""
+    if "://" in ref or ref.startswith(("data:", "#")):
+        return None
+    path = ref.split("?", 1)[0].split("#", 1)[0]
+    if not path:
+        return None
+    absolute = os.path.join(root, path.lstrip("/")) if path.startswith("/") else os.path.join(page_dir, path)
+    rel = os.path.relpath(os.path.normpath(absolute), root).replace(os.sep, "/")
+    target = assets.get(logical_path(rel))
+    if target is None:
+        return None
+    fragment = ref[len(path):].partition("#")[2]
+    new = path[:len(path) - len(os.path.basename(path))] + os.path.basename(target)
+    return f"{new}#{fragment}" if fragment else new
+
+
+def rewrite_page(text, page_dir, root, assets):
+    """``text`` of a rendered page with its references moved to the hashed names in ``assets``.
+
+    ``root`` is the site directory, which mirrors the project layout.
+    """
+    def attr(match):
+        new = _rewrite(match[3], page_dir, root, assets)
+        return match[0] if new is None else f"{match[1]}{match[2]}{new}{match[2]}"
+
+    return ATTR_REF.sub(attr, text)
+
+
+def publish_site(root, site, assets):
+    """Copy the hashed files of ``assets`` from ``root`` into ``site`` and rewrite its pages.
+
+    Returns ``(copied, pages)``: the hashed paths copied and the pages
+    changed. Older hashed copies of the same files are removed from ``site``.
+    """
+    copied = []
+    for rel, target in sorted(assets.items()):
+        source, path = os.path.join(root, target), os.path.join(site, target)
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"{target} is missing; run build_diagrams.py first")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if not os.path.exists(path):
+            tmp = f"{path}.tmp"
+            shutil.copyfile(source, tmp)
+            os.replace(tmp, path)
+            copied.append(target)
+        # Hashed copies this one supersedes, with their sidecars
+        directory = os.path.dirname(path)
+        for name in os.listdir(directory):
+            hashed = next((name[:-len(s)] for s in SUFFIXES if name.endswith(s)), name)
+            if hashed != os.path.basename(target) and logical_path(hashed) == os.path.basename(rel) \
+                    and HASHED_NAME.match(hashed):
+                os.remove(os.path.join(directory, name))
+    pages = []
+    for page in site_pages(site):
+        with open(page, encoding="utf-8", newline="") as f:
+            text = f.read()
+        new = rewrite_page(text, os.path.dirname(page), site, assets)
+        if new != text:
+            tmp = f"{page}.tmp"
+            with open(tmp, "w", encoding="utf-8", newline="") as f:
+                f.write(new)
+            os.replace(tmp, page)
+            pages.append(page)
+    return copied, pages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Point the rendered site at the content-hashed diagrams.")
+    parser.add_argument("--site", default=None,
+                        help="rendered site (default: $QUARTO_PROJECT_OUTPUT_DIR, else output-dir of _quarto.yml)")
+    parser.add_argument("--manifest", default=ASSET_MANIFEST, help="asset manifest written by the build")
+    args = parser.parse_args(argv)
+    root = find_project_root()
+    site = args.site or os.environ.get("QUARTO_PROJECT_OUTPUT_DIR") or site_dir(root)
+    site = os.path.join(root, site)
+    try:
+        copied, pages = publish_site(root, site, load_asset_manifest(args.manifest))
+    except FileNotFoundError as exc:
+        parser.exit(1, f"{args.manifest}: {exc}\n")
+    for target in copied:
+        print(f"copied {target}")
+    for page in pages:
+        print(f"updated references in {os.path.relpath(page, root)}")
+    return 0
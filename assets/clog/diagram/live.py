@@ -0,0 +1,298 @@
+"""Append nodes and edges to an already rendered diagram.
+
+``LiveDiagram`` lays a spec out and writes it once, then accepts batches
+of new nodes and edges. The first document is routed like ``render``
+(obstacle-aware when the spec has a ``router``); appended edges use the
+layout's layer-to-layer route. Existing nodes never move: a new node goes
+into the layer after its deepest predecessor, below the last node of that
+layer (or into a new layer past the end), so only the layers that receive
+nodes change. Each batch is drawn as one ``<g class="step">`` appended in
+front of the closing ``</svg>``; the root ``viewBox`` is written with
+fixed-width numbers so a growing canvas is patched in place. An update
+therefore costs O(size of the batch), whatever the size of the diagram,
+and returns a ``Diff`` describing what changed.
+
+    live = LiveDiagram(load_spec("specs/csd_architecture.json"), "/tmp/csd.svg")
+    diff = live.append(nodes=[{"id": "n1", "label": "New Node", "type": "root"}],
+                       edges=[["csd_slm", "n1"]])
+
+Per-node ``style`` overrides, decorations and shared ``<symbol>`` chrome
+are not available for appended content; nodes are drawn from their type.
+Readers polling the file may briefly see a document without its closing
+tag while a batch is written.
+"""
+
+import io
+import math
+import os
+import re
+from collections import deque
+
+from .defs import draw_defs, resolve_defs
+from .layout import DEFAULT_H, DEFAULT_W
+from .optimize import Minifier, optimize_options
+from .render import (LAYOUT_ROUTES, compile_stylesheet, draw_edge, draw_node, edge_paths, node_style,
+                     prepare, root_attrs)
+from .route import Router
+from .spec import NODE_FIELDS, Edge, Node, SpecError, geometry_problems
+from .text import autosize
+from .writer import SvgWriter
+
+# Digits reserved for each viewBox dimension so it can be rewritten in place.
+VIEWBOX_DIGITS = 7
+VIEWBOX = re.compile(rb'viewBox="0 0 (\d+) (\d+)"')
+TRAILER = b"</svg>"
+
+
+class Diff:
+    """What one ``LiveDiagram.append`` changed."""
+
+    def __init__(self, nodes, edges, layers, canvas, svg, bytes_written):
+        self.nodes = nodes  # ids of the added nodes
+        self.edges = edges  # (source, target) of the added edges
+        self.layers = layers  # layer index -> number of nodes added to it
+        self.canvas = canvas  # (width, height) if the canvas grew, else None
+        self.svg = svg  # the appended fragment
+        self.bytes_written = bytes_written
+
+    def __repr__(self):
+        return (f"Diff(+{len(self.nodes)} nodes, +{len(self.edges)} edges, layers={sorted(self.layers)}, "
+                f"canvas={self.canvas}, {self.bytes_written} bytes)")
+
+
+class Layer:
+    __slots__ = ("center", "thickness", "end")
+
+    def __init__(self, center, thickness, end):
+        self.center = center  # position along the layout direction
+        self.thickness = thickness  # widest node along the direction
+        self.end = end  # first free position across the direction
+
+
+class LiveDiagram:
+    """A rendered diagram that grows by appending fragments; see the module docstring."""
+
+    def __init__(self, spec, path):
+        self.spec = prepare(spec)
+        self.path = os.fspath(path)
+        options = dict(spec.layout or {})
+        self.direction = options.get("direction", "LR")
+        self.layer_gap = options.get("layer_gap", 90)
+        self.node_gap = options.get("node_gap", 40)
+        self.default_size = tuple(options.get("default_size", (DEFAULT_W, DEFAULT_H)))
+        self.margin = tuple(options.get("origin", (50, 50)))
+        if not spec.edge_route:
+            spec.edge_route = LAYOUT_ROUTES[self.direction]
+        self.precision = optimize_options(spec)["precision"]
+        self.layers = []
+        self.layer_of = {}
+        self._index_layers()
+        self._write_document()
+
+    # --- Geometry ---
+
+    def _along(self, node):
+        return (node.x, node.w) if self.direction == "LR" else (node.y, node.h)
+
+    def _across(self, node):
+        return (node.y, node.h) if self.direction == "LR" else (node.x, node.w)
+
+    def _index_layers(self):
+        """Group the existing nodes into layers by their centre along the layout direction."""
+        by_center = {}
+        for node in self.spec.graph.nodes:
+            pos, size = self._along(node)
+            by_center.setdefault(round(pos + size / 2, 3), []).append(node)
+        for i, center in enumerate(sorted(by_center)):
+            members = by_center[center]
+            thickness = max(self._along(n)[1] for n in members)
+            end = max(sum(self._across(n)) for n in members) + self.node_gap
+            self.layers.append(Layer(center, thickness, end))
+            for node in members:
+                self.layer_of[node.id] = i
+
+    def _place(self, node, preds):
+        """Give ``node`` a layer after its ``preds`` (ids) and a position; returns its layer index."""
+        layers = [self.layer_of[p] for p in preds if p in self.layer_of]
+        index = max(layers) + 1 if layers else 0
+        node.w = node.w or self.default_size[0]
+        node.h = node.h or self.default_size[1]
+        along = node.w if self.direction == "LR" else node.h
+        if index >= len(self.layers):
+            index = len(self.layers)
+            if self.layers:
+                last = self.layers[-1]
+                center = last.center + last.thickness / 2 + self.layer_gap + along / 2
+            else:
+                center = self.margin[0 if self.direction == "LR" else 1] + along / 2
+            start = self.margin[1 if self.direction == "LR" else 0]
+            self.layers.append(Layer(center, along, start))
+        layer = self.layers[index]
+        layer.thickness = max(layer.thickness, along)
+        main, cross = layer.center - along / 2, layer.end
+        node.x, node.y = (main, cross) if self.direction == "LR" else (cross, main)
+        layer.end = cross + (node.h if self.direction == "LR" else node.w) + self.node_gap
+        self.layer_of[node.id] = index
+        return index
+
+    @staticmethod
+    def _placement_order(nodes, preds):
+        """``nodes`` predecessors-first, so chains within a batch stack into successive layers.
+
+        One topological pass over the in-batch edges; nodes left on a cycle
+        inside the batch follow in declaration order.
+        """
+        indegree = {node.id: 0 for node in nodes}
+        succs = {}
+        for target, sources in preds.items():
+            if target not in indegree:
+                continue
+            for source in sources:
+                if source in indegree and source != target:
+                    indegree[target] += 1
+                    succs.setdefault(source, []).append(target)
+        by_id = {node.id: node for node in nodes}
+        queue = deque(node.id for node in nodes if not indegree[node.id])
+        order = []
+        while queue:
+            node_id = queue.popleft()
+            order.append(by_id[node_id])
+            for target in succs.get(node_id, ()):
+                indegree[target] -= 1
+                if not indegree[target]:
+                    queue.append(target)
+        if len(order) < len(nodes):
+            placed = {node.id for node in order}
+            order += [node for node in nodes if node.id not in placed]
+        return order
+
+    def _grow_canvas(self, nodes):
+        canvas = self.spec.canvas
+        width = max([canvas["width"]] + [math.ceil(n.x + n.w + self.margin[0]) for n in nodes])
+        height = max([canvas["height"]] + [math.ceil(n.y + n.h + self.margin[1]) for n in nodes])
+        if (width, height) == (canvas["width"], canvas["height"]):
+            return None
+        canvas["width"], canvas["height"] = width, height
+        return width, height
+
+    # --- Output ---
+
+    def _viewbox(self):
+        canvas = self.spec.canvas
+        size = tuple(math.ceil(canvas[k]) for k in ("width", "height"))
+        if max(size) >= 10 ** VIEWBOX_DIGITS:
+            raise SpecError(f"canvas {size} exceeds the live viewBox capacity")
+        return tuple(f"{v:0{VIEWBOX_DIGITS}d}" for v in size)
+
+    def _write_document(self):
+        spec = self.spec
+        graph = spec.graph
+        defs = resolve_defs(spec, halos=optimize_options(spec)["halos"])
+        # Rules for every declared type, so later batches never need new CSS
+        samples = [Node(f"_{t}", type=t) for t in spec.types] or list(graph.nodes)
+        samples += [node for node in graph.nodes if node.style]
+        sheet = compile_stylesheet(spec, samples, [node_style(spec, n) for n in samples])
+        width, height = self._viewbox()
+        with SvgWriter(self.path, width, height, transform=Minifier(self.precision), **root_attrs(spec)) as svg:
+            with svg.group("defs"):
+                svg.element("style", sheet.css())
+                draw_defs(svg, spec, defs)
+            router = Router(graph, **spec.router) if spec.router is not None else None
+            self._draw_step(svg, graph.nodes, graph.edges, router)
+        with open(self.path, "rb") as f:
+            data = f.read()
+        self.end = data.rindex(TRAILER)
+        match = VIEWBOX.search(data, 0, 1024)
+        self.viewbox_at = match.start(1)
+
+    def _draw_step(self, svg, nodes, edges, router=None):
+        paths = edge_paths(self.spec, router, edges)
+        with svg.group(class_="step"):
+            for edge in edges:
+                draw_edge(svg, self.spec, edge, paths[edge.index])
+            for node in nodes:
+                draw_node(svg, self.spec, node)
+
+    def _check_batch(self, nodes, edges):
+        """Problems with a batch, judged against the graph plus the batch itself."""
+        spec, graph = self.spec, self.spec.graph
+        problems = []
+        ids = set()
+        for raw in nodes:
+            if not isinstance(raw, dict) or "id" not in raw:
+                problems.append(f"appended node {raw!r} has no id")
+                continue
+            unknown = set(raw) - NODE_FIELDS
+            if unknown or raw.get("style"):
+                problems.append(f"appended node {raw['id']!r} has unsupported fields "
+                                f"{sorted(unknown | ({'style'} if raw.get('style') else set()))}")
+            if spec.types and raw.get("type", "default") not in spec.types:
+                problems.append(f"appended node {raw['id']!r} has undeclared type {raw.get('type')!r}")
+            problems.extend(geometry_problems(raw))
+            if raw["id"] in graph or raw["id"] in ids:
+                problems.append(f"duplicate node id {raw['id']!r}")
+            ids.add(raw["id"])
+        for raw in edges:
+            if isinstance(raw, (list, tuple)):
+                if len(raw) != 2:
+                    problems.append(f"edge {raw!r} must be [source, target]")
+                    continue
+                source, target = raw
+            elif isinstance(raw, dict) and "source" in raw and "target" in raw:
+                source, target = raw["source"], raw["target"]
+            else:
+                problems.append(f"edge {raw!r} needs a source and a target")
+                continue
+            for end in (source, target):
+                if end not in graph and end not in ids:
+                    problems.append(f"edge {source!r} -> {target!r} references unknown node {end!r}")
+        return problems
+
+    def append(self, nodes=(), edges=()):
+        """Add ``nodes`` (spec-style dicts) and ``edges`` and patch the file; returns a ``Diff``.
+
+        The whole batch is checked before anything changes: on ``SpecError``
+        neither the diagram nor its file has been touched.
+        """
+        spec, graph = self.spec, self.spec.graph
+        nodes, edges = list(nodes), list(edges)
+        problems = self._check_batch(nodes, edges)
+        if problems:
+            raise SpecError("; ".join(problems))
+        with open(self.path, "r+b") as f:
+            # Check the file's tail before the graph changes, so a stale diagram raises untouched
+            size = f.seek(0, os.SEEK_END)
+            f.seek(self.end)
+            if size != self.end + len(TRAILER) or f.read() != TRAILER:
+                raise SpecError(f"{self.path} was modified outside this LiveDiagram")
+
+            new_nodes = [graph.add_node(Node(**raw)) for raw in nodes]
+            autosize(spec, new_nodes, [node_style(spec, n) for n in new_nodes])
+            new_edges = []
+            preds = {}  # a new node's in-edges are all in this batch
+            for raw in edges:
+                source, target = raw if isinstance(raw, (list, tuple)) else (raw["source"], raw["target"])
+                edge = Edge(source, target, style=None if isinstance(raw, (list, tuple)) else raw.get("style"))
+                new_edges.append(graph.add_edge(edge))
+                preds.setdefault(target, []).append(source)
+
+            layers = {}
+            for node in self._placement_order(new_nodes, preds):
+                index = self._place(node, preds.get(node.id, ()))
+                layers[index] = layers.get(index, 0) + 1
+            canvas = self._grow_canvas(new_nodes)
+
+            buf = io.StringIO()
+            svg = SvgWriter.fragment(buf, transform=Minifier(self.precision))
+            self._draw_step(svg, new_nodes, new_edges)
+            fragment = buf.getvalue()
+            payload = fragment.encode() + TRAILER
+            f.seek(self.end)
+            f.write(payload)
+            f.truncate()
+            if canvas is not None:
+                f.seek(self.viewbox_at)
+                f.write(" ".join(self._viewbox()).encode())
+        self.end += len(payload) - len(TRAILER)
+        return Diff([n.id for n in new_nodes], [(e.source, e.target) for e in new_edges], layers, canvas,
+                    fragment, len(payload) + (0 if canvas is None else 2 * VIEWBOX_DIGITS + 1))
@@ -0,0 +1,264 @@
+"""Level-of-detail views of large graphs.
+
+Past a few thousand nodes a single SVG is unreadable and slow to pan.
+``LevelOfDetail`` groups the nodes of a compiled spec into clusters -- by
+node type or by DAG depth range -- and renders:
+
+* an overview with one summary node per cluster (labelled with its node
+  and edge counts) and one bundled edge per connected cluster pair, drawn
+  wider the more edges it stands for;
+* a detail SVG per cluster, only when asked for. A cluster that is still
+  larger than ``max_nodes`` gets an overview of its own, split by depth
+  range (or into equal chunks when it is a single wide layer), with keys
+  like ``idea/2``.
+
+Details are cached in the output directory next to an index
+(``<name>-by-<type|depth>.lod.json``) that records each file's content fingerprint, so
+asking for a detail again only re-renders it when its members changed.
+The cost of a view grows with what it shows, not with the whole graph:
+node depths are computed once, and the edges of each cluster are bucketed
+once per level of clustering, from the edges of the cluster above.
+
+    python assets/clog/lod_diagram.py run.jsonl --by type --out /tmp/lod --detail idea
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+
+import numpy as np
+
+from .layout import node_depths
+from .render import render
+from .spec import SpecError, compile_spec, load_spec
+
+# Most clusters (and sub-clusters) one overview shows.
+FANOUT = 12
+INDEX_VERSION = 1
+
+
+def bucket_bounds(values, fanout=FANOUT):
+    """Split the sorted distinct ``values`` into at most ``fanout`` contiguous ranges."""
+    distinct = sorted(set(values))
+    span = max(1, math.ceil(len(distinct) / fanout))
+    return [(distinct[i], distinct[min(i + span, len(distinct)) - 1]) for i in range(0, len(distinct), span)]
+
+
+class LevelOfDetail:
+    """Overview and on-demand cluster details of ``spec``; see the module docstring."""
+
+    def __init__(self, spec, out_dir, by="type", max_nodes=400):
+        if by not in ("type", "depth"):
+            raise SpecError(f"unknown clustering {by!r} (expected 'type' or 'depth')")
+        self.spec = spec
+        self.out_dir = out_dir
+        self.by = by
+        self.max_nodes = max_nodes
+        self.graph = spec.graph
+        self._depth = None
+        self.base = f"{spec.name}-by-{by}"
+        self.index_path = os.path.join(out_dir, f"{self.base}.lod.json")
+        self.index = self._load_index()
+        self._clusters = {}
+        self._edges = {}  # cluster key (None: the whole graph) -> rows of the edges inside it
+        self._crossing = {}  # cluster key -> (from, to) child numbers of the edges between its children
+        self._owner = np.full(len(self.graph), -1, dtype=np.int64)
+
+    @property
+    def depth(self):
+        """Longest-path depth of every node, computed on first use."""
+        if self._depth is None:
+            self._depth = node_depths(self.graph)
+        return self._depth
+
+    # --- Clustering ---
+
+    def _split(self, members, prefix, by):
+        """``{key: [node index, ...]}`` for one level of clustering of ``members``."""
+        groups = {}
+        if by == "type":
+            types, names = self.graph.column("type"), self.graph.types.names
+            for i, t in zip(members, types[members].tolist(), strict=True):
+                groups.setdefault(f"{prefix}{names[t]}", []).append(i)
+            return groups
+        depth = self.depth[members].tolist()
+        bounds = bucket_bounds(depth)
+        if len(bounds) == 1:
+            # One wide layer: equal chunks in node order
+            size = math.ceil(len(members) / FANOUT)
+            return {f"{prefix}{k}": members[j:j + size] for k, j in enumerate(range(0, len(members), size))}
+        lookup = {}
+        for k, (lo, hi) in enumerate(bounds):
+            for d in range(lo, hi + 1):
+                lookup[d] = f"{prefix}{k}"
+        for i, d in zip(members, depth, strict=True):
+            groups.setdefault(lookup[d], []).append(i)
+        return groups
+
+    def clusters(self, key=None):
+        """Child clusters of ``key`` (``None`` is the top level)."""
+        if key not in self._clusters:
+            if key is None:
+                self._clusters[key] = self._split(list(range(len(self.graph.nodes))), "", self.by)
+            else:
+                self._clusters[key] = self._split(self.members(key), f"{key}/", "depth")
+        return self._clusters[key]
+
+    def members(self, key):
+        parent = key.rpartition("/")[0] or None
+        siblings = self.clusters(parent)
+        if key not in siblings:
+            raise SpecError(f"unknown cluster {key!r}")
+        return siblings[key]
+
+    # --- Specs ---
+
+    def _template(self, name):
+        spec = self.spec
+        data = {"name": name, "theme": spec.theme.get("name"), "colors": spec.color_overrides,
+                "defs": spec.defs, "types": spec.types, "shapes": spec.shapes, "edge_style": spec.edge_style,
+                "router": spec.router, "optimize": spec.optimize, "autosize": spec.autosize,
+                "canvas": {"width": "auto", "height": "auto", "font": spec.canvas.get("font")},
+                "layout": {"direction": (spec.layout or {}).get("direction", "LR")}}
+        return {k: v for k, v in data.items() if v is not None}
+
+    def edges(self, key=None):
+        """Rows of the edges with both ends in cluster ``key`` (``None``: every edge)."""
+        if key not in self._edges:
+            if key is None:
+                self._edges[None] = np.arange(len(self.graph.edges))
+            else:
+                self._index_edges(key.rpartition("/")[0] or None)
+        return self._edges[key]
+
+    def _index_edges(self, parent):
+        """Split the edges of cluster ``parent`` among its children, and keep the ones between them."""
+        groups = self.clusters(parent)
+        rows = self.edges(parent)
+        owner = self._owner
+        for k, members in enumerate(groups.values()):
+            owner[members] = k
+        src, dst = self.graph.endpoints()
+        a, b = owner[src[rows]], owner[dst[rows]]
+        for members in groups.values():
+            owner[members] = -1
+        same = a == b
+        # Stable, so every child keeps its edges in graph order
+        inner = rows[same][np.argsort(a[same], kind="stable")]
+        starts = np.concatenate([[0], np.cumsum(np.bincount(a[same], minlength=len(groups)))]).tolist()
+        for k, key in enumerate(groups):
+            self._edges[key] = inner[starts[k]:starts[k + 1]]
+        self._crossing[parent] = a[~same], b[~same]
+
+    def _summary(self, key, groups):
+        """Spec mapping with one node per cluster in ``groups`` and bundled edges between them."""
+        graph = self.graph
+        keys = list(groups)
+        if key not in self._crossing:
+            self._index_edges(key)
+        a, b = self._crossing[key]
+        pairs, counts = np.unique(np.stack([a, b], axis=1), axis=0, return_counts=True)
+        types, type_names = graph.column("type"), graph.types.names
+        data = self._template(f"{self.base}-{key.replace('/', '-')}" if key else self.base)
+        data["nodes"] = []
+        for cluster, members in groups.items():
+            kind = type_names[int(np.bincount(types[members]).argmax())]
+            label = cluster.rpartition("/")[2]
+            if self.by == "depth" or "/" in cluster:
+                depths = self.depth[members]
+                lo, hi = int(depths.min()), int(depths.max())
+                label = f"depth {lo}-{hi}" if lo != hi else f"depth {lo}"
+            data["nodes"].append({"id": cluster, "label": label.upper(), "type": kind,
+                                  "sub": f"{len(members):,} nodes / {len(self.edges(cluster)):,} edges"})
+        data["edges"] = []
+        for (i, j), count in zip(pairs.tolist(), counts.tolist(), strict=True):
+            width = 1 + int(math.log10(count))
+            data["edges"].append({"source": keys[i], "target": keys[j],
+                                  "style": {"class": f"w{width}", "width": width * 2}})
+        return data
+
+    def _detail_spec(self, key, members):
+        graph = self.graph
+        ids = graph.ids
+        src, dst = graph.endpoints()
+        keep = self.edges(key)
+        keep = keep[np.argsort(src[keep], kind="stable")]
+        data = self._template(f"{self.base}-{key.replace('/', '-')}")
+        data["nodes"] = [{"id": ids[i], "label": graph.labels[i], "sub": graph.subs[i],
+                          "type": graph.types.names[t]}
+                         for i, t in zip(members, graph.column("type")[members].tolist(), strict=True)]
+        data["edges"] = [[ids[s], ids[t]] for s, t in zip(src[keep].tolist(), dst[keep].tolist(), strict=True)]
+        return data
+
+    # --- Output ---
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"version": INDEX_VERSION, "views": {}}
+        return index if index.get("version") == INDEX_VERSION else {"version": INDEX_VERSION, "views": {}}
+
+    def _save_index(self):
+        tmp = f"{self.index_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.index_path)
+
+    def _view(self, key, data):
+        """Render ``data`` unless the cached file has the same fingerprint; returns its path."""
+        digest = hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+        path = os.path.join(self.out_dir, f"{data['name']}.svg")
+        record = self.index["views"].get(key or "")
+        if record and record["sha256"] == digest and os.path.exists(path):
+            return path
+        os.makedirs(self.out_dir, exist_ok=True)
+        render(compile_spec(data), path)
+        children = sorted(self.clusters(key)) if key is None or self._is_summary(key) else []
+        self.index["views"][key or ""] = {"file": os.path.basename(path), "sha256": digest, "clusters": children}
+        self._save_index()
+        return path
+
+    def _is_summary(self, key):
+        return len(self.members(key)) > self.max_nodes
+
+    def overview(self):
+        return self._view(None, self._summary(None, self.clusters()))
+
+    def detail(self, key):
+        """Detail view of cluster ``key``: its nodes, or a sub-overview when it is too large."""
+        if self._is_summary(key):
+            return self._view(key, self._summary(key, self.clusters(key)))
+        return self._view(key, self._detail_spec(key, self.members(key)))
+
+
+def load_source(path):
+    """A compiled spec from a spec ``.json`` or a JSONL trace (``.jsonl``/``.jsonl.gz``)."""
+    if path.endswith((".jsonl", ".jsonl.gz")):
+        from .trace import TraceGraph, read_events
+        return compile_spec(TraceGraph().ingest(read_events(path)).spec_data())
+    return load_spec(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a clustered overview and on-demand cluster details.")
+    parser.add_argument("source", help="spec (.json) or trace (.jsonl, .jsonl.gz)")
+    parser.add_argument("--out", required=True, help="output directory (also holds the cache index)")
+    parser.add_argument("--by", choices=("type", "depth"), default="type")
+    parser.add_argument("--max-nodes", type=int, default=400,
+                        help="largest cluster drawn node by node; bigger ones get a sub-overview")
+    parser.add_argument("--detail", action="append", default=[], metavar="KEY",
+                        help="also render this cluster's detail (repeatable)")
+    args = parser.parse_args(argv)
+    try:
+        lod = LevelOfDetail(load_source(args.source), args.out, by=args.by, max_nodes=args.max_nodes)
+        paths = [lod.overview()] + [lod.detail(key) for key in args.detail]
+    except SpecError as exc:
+        parser.exit(1, f"{args.source}: {exc}\n")
+    for path in paths:
+        print(f"Generated {path}")
+    print(f"clusters: {', '.join(sorted(lod.clusters()))}")
+    return 0
@@ -0,0 +1,92 @@
+"""Output optimisation for generated SVGs.
+
+``Minifier`` is applied by ``SvgWriter`` to every chunk it writes (chunks
+are whole elements), so minification stays streaming. It rounds numbers in
+attribute values to ``precision`` decimals, drops leading zeros and
+redundant whitespace, and removes attributes that restate SVG defaults.
+Reusing repeated node chrome through ``<symbol>``/``<use>`` and replacing
+blur glows with stroke halos (``halos``, the low-cost render mode) happen
+in the renderer; all are controlled by the spec's ``optimize`` section.
+"""
+
+import re
+
+DEFAULTS = {"minify": True, "precision": 2, "symbols": True, "halos": False}
+
+TAG = re.compile(r"<([A-Za-z][\w:-]*)((?:\s+[\w:-]+=\"[^\"]*\")*)\s*(/?)>")
+ATTR = re.compile(r"\s+([\w:-]+)=\"([^\"]*)\"")
+NUMBER = re.compile(r"-?\d*\.\d+(?:e-?\d+)?")
+PATH_CMD = re.compile(r"\s*([MLCQSTHVAZmlcqsthvaz])\s*")
+COMMA = re.compile(r"\s*,\s*")
+# Attributes whose value equals the SVG initial value on any element. Only
+# properties that are not inherited qualify: ``stroke-width="1"`` and the
+# like may be overriding a different value set on an ancestor or by CSS.
+DEFAULT_ATTRS = {"opacity": "1", "stop-opacity": "1"}
+# Geometry attributes that default to zero, per element.
+ZERO_ATTRS = {"rect": {"x", "y"}, "circle": {"cx", "cy"}, "text": {"x", "y"}, "use": {"x", "y"}}
+
+
+def optimize_options(spec, override=None):
+    options = dict(DEFAULTS)
+    options.update(getattr(spec, "optimize", None) or {})
+    if override is not None:
+        options.update(override if isinstance(override, dict) else
+                       {"minify": bool(override), "symbols": bool(override)})
+    return options
+
+
+def round_numbers(value, precision):
+    def repl(match):
+        text = f"{round(float(match.group()), precision):.{precision}f}".rstrip("0").rstrip(".")
+        if text in ("-0", ""):
+            text = "0"
+        if text.startswith("0."):
+            text = text[1:]
+        elif text.startswith("-0."):
+            text = "-" + text[2:]
+        return text
+    return NUMBER.sub(repl, value)
+
+
+class Minifier:
+    """Chunk transform for ``SvgWriter``; counts bytes before and after."""
+
+    def __init__(self, precision=2):
+        self.precision = precision
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _tag(self, match):
+        name, attrs, close = match.groups()
+        zero = ZERO_ATTRS.get(name, ())
+        out = []
+        for key, value in ATTR.findall(attrs):
+            if key != "style" and not key.startswith("xmlns"):
+                value = round_numbers(value, self.precision)
+            if key in ("d", "points"):
+                value = PATH_CMD.sub(r"\1", value)
+            if key in ("d", "points", "transform"):
+                value = COMMA.sub(",", value)
+            value = " ".join(value.split())
+            if DEFAULT_ATTRS.get(key) == value or (key in zero and value == "0"):
+                continue
+            out.append(f' {key}="{value}"')
+        return f"<{name}{''.join(out)}{close}>"
+
+    def __call__(self, chunk):
+        self.bytes_in += len(chunk.encode())
+        chunk = TAG.sub(self._tag, chunk)
+        if chunk.endswith("\n"):
+            chunk = chunk[:-1]
+        self.bytes_out += len(chunk.encode())
+        return chunk
+
+
+class ByteCounter:
+    """Write-only stream that only counts UTF-8 bytes (for baseline sizes)."""
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, chunk):
+        self.size += len(chunk.encode())
@@ -0,0 +1,46 @@
+"""Filesystem locations shared by the generators and the build driver."""
+
+import os
+import re
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+CLOG_DIR = os.path.dirname(PACKAGE_DIR)
+SPECS_DIR = os.path.join(CLOG_DIR, "specs")
+THEMES_DIR = os.path.join(CLOG_DIR, "themes")
+
+
+def find_project_root(start=CLOG_DIR):
+    """Nearest ancestor holding ``_quarto.yml``; spec outputs are relative to it."""
+    path = os.path.abspath(start)
+    while True:
+        if os.path.exists(os.path.join(path, "_quarto.yml")):
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            raise FileNotFoundError(f"no _quarto.yml above {start}")
+        path = parent
+
+
+def site_dir(root=None):
+    """The rendered site: ``output-dir`` of ``_quarto.yml`` (Quarto's default is ``_site``)."""
+    root = root or find_project_root()
+    with open(os.path.join(root, "_quarto.yml"), encoding="utf-8") as f:
+        for line in f:
+            match = re.match(r"""\s+output-dir:\s*["']?([^"'\s#]+)""", line)
+            if match:
+                return os.path.join(root, match[1])
+    return os.path.join(root, "_site")
+
+
+def output_path(spec, root=None):
+    """Absolute output path of ``spec``, independent of the working directory."""
+    output = spec.output or f"assets/clog/{spec.name}.svg"
+    return os.path.join(root or find_project_root(), output)
+
+
+def spec_path(name):
+    return os.path.join(SPECS_DIR, f"{name}.json")
+
+
+def theme_path(name):
+    return os.path.join(THEMES_DIR, f"{name}.json")
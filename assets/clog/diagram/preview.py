@@ -0,0 +1,360 @@
+"""Live preview server for diagram development.
+
+    python assets/clog/preview_diagrams.py csd_architecture --port 8765
+
+serves http://127.0.0.1:8765/, a page showing the named diagrams (all
+specs by default) that redraws a figure as soon as one of its inputs is
+saved. Inputs are those of the build (``build.discover``): the spec, its
+theme, its ``generate_<name>.py`` wrapper and the engine sources; they
+are polled every ``--poll`` ms. Only the diagrams whose inputs changed are
+rebuilt, after ``--debounce`` ms without further edits.
+
+Rebuilds run in worker processes that are started ahead of use, so a
+render does not pay for interpreter start-up and imports. When a newer
+edit arrives while a rebuild of the same diagram is still running, that
+worker is terminated and a warm spare takes the new job. Edits to the
+engine restart the workers (so they import the new code) and rebuild
+every diagram. Results are pushed to open tabs over Server-Sent Events
+carrying the SVG itself, so a small figure goes from save to pixels well
+under 100 ms; errors (a half-saved spec, say) are shown over the last good
+drawing.
+
+The server only uses the standard library and the page loads nothing
+but itself, so previews work offline. Output files are left alone; the
+build writes those.
+"""
+
+import argparse
+import asyncio
+import html
+import io
+import json
+import multiprocessing
+import os
+import time
+import urllib.parse
+
+from .build import discover, engine_sources
+from .paths import find_project_root
+from .render import Scene
+from .spec import load_spec
+from .timing import Timer, format_timings
+
+KEEPALIVE = 15.0
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Diagram preview</title>
+<style>
+  body {{ margin: 0; padding: 16px; background: #1d1f21; color: #c5c8c6; font: 13px monospace; }}
+  figure {{ margin: 0 0 24px; }}
+  figcaption {{ margin-bottom: 6px; }}
+  .status {{ color: #8a8f94; }}
+  img {{ max-width: 100%; background: #fff1; }}
+  .error {{ color: #ff6b6b; white-space: pre-wrap; margin: 6px 0; }}
+</style>
+</head>
+<body>
+{figures}
+<script>
+const source = new EventSource("/events");
+source.onmessage = (event) => {{
+  const update = JSON.parse(event.data);
+  const figure = document.getElementById("fig-" + update.name);
+  if (!figure) return;
+  const img = figure.querySelector("img"), error = figure.querySelector(".error");
+  if (update.svg !== null) {{
+    const url = URL.createObjectURL(new Blob([update.svg], {{type: "image/svg+xml"}}));
+    const old = img.dataset.url;
+    img.onload = () => {{ if (old) URL.revokeObjectURL(old); }};
+    img.dataset.url = url;
+    img.src = url;
+  }}
+  error.hidden = !update.error;
+  error.textContent = update.error || "";
+  figure.querySelector(".status").textContent = update.status;
+}};
+source.onerror = () => document.title = "Diagram preview (disconnected)";
+source.onopen = () => document.title = "Diagram preview";
+</script>
+</body>
+</html>
+"""
+
+FIGURE = """<figure id="fig-{name}">
+  <figcaption>{name} <span class="status">building...</span></figcaption>
+  <pre class="error" hidden></pre>
+  <img alt="{name}">
+</figure>"""
+
+
+def render_preview(name, spec_path):
+    """``(svg text, phase timings)`` of the spec at ``spec_path``, rendered in memory."""
+    timer = Timer(name)
+    with timer.phase("parse"):
+        spec = load_spec(spec_path)
+    buf = io.StringIO()
+    Scene(spec, timer).write(buf)
+    return buf.getvalue(), timer.totals()
+
+
+def _worker_main(conn):
+    while True:
+        try:
+            name, spec_path = conn.recv()
+        except EOFError:
+            return
+        try:
+            svg, totals = render_preview(name, spec_path)
+        except Exception as exc:  # a spec mid-edit may be broken in any way; report it and keep serving
+            conn.send(("error", f"{type(exc).__name__}: {exc}", None))
+        else:
+            conn.send(("ok", svg, totals))
+
+
+class Worker:
+    """A render process; ``generation`` is the engine version it imported."""
+
+    def __init__(self, context, generation):
+        self.generation = generation
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    async def run(self, name, spec_path):
+        """``(status, svg or error message, timings)``; raises ``EOFError`` if the process died."""
+        self.conn.send((name, spec_path))
+        return await asyncio.get_running_loop().run_in_executor(None, self.conn.recv)
+
+    def stop(self):
+        # A thread blocked in recv() sees EOFError once the process is gone
+        self.process.terminate()
+
+
+class WorkerPool:
+    """Warm render processes: ``spares`` are kept started and idle."""
+
+    def __init__(self, spares=1):
+        # Spawned, not forked, so a restart imports the current engine sources
+        self.context = multiprocessing.get_context("spawn")
+        self.spares = spares
+        self.generation = 0
+        self.idle = []
+
+    def warm(self):
+        while len(self.idle) < self.spares:
+            self.idle.append(Worker(self.context, self.generation))
+
+    def acquire(self):
+        worker = self.idle.pop() if self.idle else Worker(self.context, self.generation)
+        self.warm()
+        return worker
+
+    def release(self, worker):
+        if worker.generation == self.generation and len(self.idle) < self.spares + 1:
+            self.idle.append(worker)
+        else:
+            worker.stop()
+
+    def restart(self):
+        """Replace every idle worker; busy ones are stopped when they are released."""
+        self.generation += 1
+        for worker in self.idle:
+            worker.stop()
+        self.idle = []
+        self.warm()
+
+    def close(self):
+        for worker in self.idle:
+            worker.stop()
+        self.idle = []
+
+
+class PreviewServer:
+    """Watches the inputs of ``diagrams``, rebuilds them and pushes the results to browsers."""
+
+    def __init__(self, diagrams, poll=0.025, debounce=0.03, spares=1):
+        self.diagrams = {diagram.name: diagram for diagram in diagrams}
+        self.engine = set(engine_sources())
+        self.poll = poll
+        self.debounce = debounce
+        self.pool = WorkerPool(spares)
+        self.state = {name: {"version": 0, "svg": None, "error": None, "status": "building..."}
+                      for name in self.diagrams}
+        self.mtimes = {}
+        self.scan()
+        self.edited = {}  # name -> time of the edit being built
+        self.pending = {}  # name -> debounce handle
+        self.tasks = {}  # name -> running rebuild
+        self.clients = set()  # one queue per open event stream
+
+    # --- Watching ---
+
+    def inputs(self):
+        return {path for diagram in self.diagrams.values() for path in diagram.inputs}
+
+    def scan(self):
+        """Inputs whose ``(mtime_ns, size)`` changed since the last scan, with their mtimes."""
+        changed = {}
+        for path in self.inputs():
+            try:
+                st = os.stat(path)
+                key = (st.st_mtime_ns, st.st_size)
+            except FileNotFoundError:
+                key = None
+            if self.mtimes.get(path, key) != key:
+                changed[path] = key[0] / 1e9 if key else time.time()
+            self.mtimes[path] = key
+        return changed
+
+    async def watch(self):
+        while True:
+            changed = self.scan()
+            if changed:
+                edited = max(changed.values())
+                if changed.keys() & self.engine:
+                    self.pool.restart()
+                    names = list(self.diagrams)
+                else:
+                    names = [name for name, diagram in self.diagrams.items() if changed.keys() & set(diagram.inputs)]
+                for name in names:
+                    self.schedule(name, edited)
+            await asyncio.sleep(self.poll)
+
+    def schedule(self, name, edited, delay=None):
+        """Rebuild ``name`` once no edit has arrived for ``delay`` (the debounce) seconds."""
+        handle = self.pending.pop(name, None)
+        if handle is not None:
+            handle.cancel()
+        self.edited[name] = edited
+        delay = self.debounce if delay is None else delay
+        self.pending[name] = asyncio.get_running_loop().call_later(delay, self.start, name)
+
+    def start(self, name):
+        self.pending.pop(name, None)
+        running = self.tasks.get(name)
+        if running is not None and not running.done():
+            running.cancel()
+        self.tasks[name] = asyncio.get_running_loop().create_task(self.rebuild(name))
+
+    async def rebuild(self, name):
+        edited = self.edited[name]
+        worker = self.pool.acquire()
+        try:
+            status, result, totals = await worker.run(name, self.diagrams[name].spec_path)
+        except asyncio.CancelledError:
+            worker.stop()
+            raise
+        except (EOFError, OSError):
+            worker.stop()
+            status, result, totals = "error", "render worker exited", None
+        else:
+            self.pool.release(worker)
+        state = self.state[name]
+        state["version"] += 1
+        latency = (time.time() - edited) * 1000
+        if status == "ok":
+            state["svg"], state["error"] = result, None
+            state["status"] = f"v{state['version']}: {latency:.0f} ms from edit ({format_timings(totals)})"
+        else:
+            state["error"] = result
+            state["status"] = f"v{state['version']}: failed"
+        print(f"{name} {state['status']}" + (f": {result}" if status != "ok" else ""), flush=True)
+        self.publish(name)
+
+    # --- Serving ---
+
+    def message(self, name):
+        state = self.state[name]
+        return json.dumps({"name": name, "version": state["version"], "svg": state["svg"],
+                           "error": state["error"], "status": state["status"]})
+
+    def publish(self, name):
+        message = self.message(name)
+        for queue in self.clients:
+            queue.put_nowait(message)
+
+    def page(self):
+        figures = "\n".join(FIGURE.format(name=html.escape(name)) for name in self.diagrams)
+        return PAGE.format(figures=figures)
+
+    async def handle(self, reader, writer):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request.decode("latin-1").split()
+            path = urllib.parse.urlsplit(parts[1]).path if len(parts) == 3 and parts[0] == "GET" else None
+            name = path[len("/diagram/"):-len(".svg")] if path and path.startswith("/diagram/") else None
+            if path == "/":
+                respond(writer, 200, "text/html; charset=utf-8", self.page())
+            elif path == "/events":
+                await self.stream(writer)
+            elif name in self.state and path.endswith(".svg") and self.state[name]["svg"] is not None:
+                respond(writer, 200, "image/svg+xml", self.state[name]["svg"])
+            else:
+                respond(writer, 404, "text/plain; charset=utf-8", "not found\n")
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def stream(self, writer):
+        queue = asyncio.Queue()
+        for name, state in self.state.items():
+            if state["version"]:
+                queue.put_nowait(self.message(name))
+        self.clients.add(queue)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n\r\n")
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), KEEPALIVE)
+                except asyncio.TimeoutError:
+                    writer.write(b": keep-alive\n\n")
+                else:
+                    writer.write(f"data: {message}\n\n".encode("utf-8"))
+                await writer.drain()
+        finally:
+            self.clients.discard(queue)
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        self.pool.warm()
+        now = time.time()
+        for name in self.diagrams:
+            self.schedule(name, now, delay=0)
+        print(f"previewing {', '.join(self.diagrams)} at http://{host}:{port}/", flush=True)
+        try:
+            async with server:
+                await self.watch()
+        finally:
+            self.pool.close()
+
+
+def respond(writer, status, content_type, body):
+    data = body.encode("utf-8")
+    reason = {200: "OK", 404: "Not Found"}[status]
+    writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\nContent-Length: {len(data)}\r\n"
+                 f"Cache-Control: no-store\r\nConnection: close\r\n\r\n".encode("latin-1") + data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a live-reloading preview of the diagrams.")
+    parser.add_argument("names", nargs="*", help="diagrams to preview (default: all specs)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--poll", type=float, default=25, help="input polling interval in ms")
+    parser.add_argument("--debounce", type=float, default=30, help="quiet time before a rebuild in ms")
+    args = parser.parse_args(argv)
+    server = PreviewServer(discover(find_project_root(), names=args.names or None),
+                           poll=args.poll / 1000, debounce=args.debounce / 1000)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,485 @@
+"""The one rendering engine behind every spec in ``assets/clog/specs``.
+
+Drawing order is: back decorations, back-layer nodes, edges, front nodes,
+front decorations. Node appearance is the merge of the shape defaults below,
+the spec's ``shapes`` overrides, its ``types`` entry and the node's own
+``style``. Paint (fill, stroke, opacity, dashes) is compiled into the
+embedded stylesheet per node type and edge class (``diagram.theme``); the
+drawn elements only carry geometry and class names.
+"""
+
+import io
+
+import numpy as np
+
+from .cost import PaintCost
+from .defs import draw_defs, resolve_defs
+from .geometry import graph_edge_paths
+from .optimize import Minifier, optimize_options
+from .paths import output_path
+from .route import Router
+from .spec import SpecError
+from .text import autosize, label_text
+from .theme import Stylesheet, class_name, paint
+from .timing import NULL_TIMER
+from .writer import SvgWriter, chain, fmt_num
+
+# --- Shape defaults ---
+
+SHAPE_DEFAULTS = {
+    # Solid rounded box with centred label/subtitle (CCP, homepage).
+    "block": {
+        "rx": 8, "fill": "node_bg", "stroke": "border", "stroke_width": 2, "dash": None, "glow": "glow",
+        "text": "text", "label_y": 25, "label_size": 14, "label_fill": None, "label_case": None,
+        "letter_spacing": None, "sub_y": 50, "sub_size": 11, "sub_fill": None, "sub_opacity": 0.8,
+    },
+    # Dark card with header bar, type dot and monospace id (context DAG, CSD).
+    "card": {
+        "rx": 6, "fill": "node_bg", "border": "border", "accent": "border", "header_fill": "node_header",
+        "glow": "glow", "glow_opacity": 0.3, "body": "plain", "body_fill": None, "header": 24,
+        "dot_cy": 12, "dot_r": 4, "text": "text", "label_x": 28, "label_y": 16, "label_size": 12,
+        "sub_y": 48, "sub_size": 12, "sub_opacity": 0.8,
+    },
+}
+
+EDGE_DEFAULTS = {"stroke": "line", "width": 2, "opacity": 0.8, "marker": "arrow", "dash": None}
+
+# Decoration keys that describe the item rather than becoming SVG attributes.
+PRIMITIVE_META = {"tag", "text", "layer", "role"}
+
+# Attributes of decorations whose values may be colour tokens.
+COLOR_ATTRS = {"fill", "stroke", "stop-color", "stop_color"}
+
+
+def node_style(spec, node):
+    type_style = spec.types.get(node.type, {})
+    shape = node.style.get("shape") or type_style.get("shape", "block")
+    if shape not in SHAPE_DEFAULTS:
+        raise SpecError(f"node {node.id!r} uses unknown shape {shape!r}")
+    style = dict(SHAPE_DEFAULTS[shape])
+    style.update(spec.shapes.get(shape, {}))
+    style.update(type_style)
+    style.update(node.style)
+    style["shape"] = shape
+    return style
+
+
+# --- Edge geometry ---
+
+def edge_paths(spec, router=None, edges=None):
+    """``{edge index: d}`` for ``edges`` (default: all of them).
+
+    Edges with their own ``route``, or every edge when there is no
+    ``router``, are anchored in one vectorized pass (``diagram.geometry``);
+    the rest are routed one at a time around the nodes.
+    """
+    graph = spec.graph
+    rows = np.arange(len(graph.edges)) if edges is None else np.fromiter((e.index for e in edges), dtype=np.int64)
+    if router is not None:
+        routes = graph.routes
+        routed = [i for i in rows.tolist() if i not in routes]
+        rows = np.fromiter((i for i in rows.tolist() if i in routes), dtype=np.int64)
+    paths = dict(zip(rows.tolist(), graph_edge_paths(graph, rows, spec.edge_route), strict=True))
+    if router is not None:
+        for i in routed:
+            paths[i] = router.route(graph.edges[i])
+    return paths
+
+
+# --- Drawing ---
+
+def draw_primitive(svg, spec, item):
+    attrs = {k: v for k, v in item.items() if k not in PRIMITIVE_META and k not in COLOR_ATTRS}
+    colors = {k.replace("-", "_"): v for k, v in item.items() if k in COLOR_ATTRS}
+    attrs.update(paint(spec, **colors))
+    svg.element(item["tag"], item.get("text"), **attrs)
+
+
+# Low-cost stand-in for a blur glow: stacked strokes around the shape as
+# (stroke width in units of the blur's standard deviation, stroke opacity).
+HALO_RINGS = ((4, 0.15), (2, 0.3))
+
+
+def _filter(spec, style):
+    if not style.get("glow") or style["glow"] in spec.halos:
+        return None
+    return spec.ref(style["glow"])
+
+
+def draw_halo(svg, spec, style, w, h, rx):
+    """Stroke halo in place of ``style``'s glow filter (halo mode only)."""
+    std = spec.halos.get(style.get("glow"))
+    if std is None:
+        return False
+    for width, opacity in HALO_RINGS:
+        svg.element("rect", class_="halo", width=w, height=h, rx=rx, stroke_width=width * std,
+                    stroke_opacity=opacity)
+    return True
+
+
+def block_rules(sheet, sel, s):
+    # Only styles that draw_halo paints need the rule
+    if s.get("glow") in sheet.spec.halos:
+        sheet.add(f"{sel} .halo", fill="none", stroke=s["stroke"])
+    sheet.add(f"{sel} .body", fill=s["fill"], stroke=s["stroke"], stroke_width=s["stroke_width"],
+              stroke_dasharray=s["dash"])
+    sheet.add(f"{sel} .lbl", fill=s["label_fill"] or s["text"], letter_spacing=s["letter_spacing"])
+    sheet.add(f"{sel} .sub", fill=s["sub_fill"] or s["text"], opacity=s["sub_opacity"])
+
+
+def draw_block(svg, spec, node, s):
+    label = label_text(node, s)
+    draw_halo(svg, spec, s, node.w, node.h, s["rx"])
+    svg.element("rect", class_="body", width=node.w, height=node.h, rx=s["rx"], filter=_filter(spec, s))
+    svg.element("text", label, class_="lbl", x=node.w / 2, y=s["label_y"], text_anchor="middle",
+                font_weight="bold", font_size=s["label_size"])
+    if node.sub:
+        svg.element("text", node.sub, class_="sub", x=node.w / 2, y=s["sub_y"], text_anchor="middle",
+                    font_size=s["sub_size"])
+
+
+def card_rules(sheet, sel, s):
+    sheet.add(f"{sel} .glow", fill=s["fill"], stroke=s["accent"], stroke_width=1, opacity=s["glow_opacity"])
+    if s.get("glow") in sheet.spec.halos:
+        sheet.add(f"{sel} .halo", fill="none", stroke=s["accent"], opacity=s["glow_opacity"])
+    if s["body"] == "db":
+        sheet.add(f"{sel} .body", fill=s["body_fill"], stroke=s["accent"], stroke_width=1)
+        sheet.add(f"{sel} .lid", fill=s["accent"], opacity=0.5)
+    else:
+        sheet.add(f"{sel} .body", fill=s["fill"], stroke=s["border"], stroke_width=1)
+        sheet.add(f"{sel} .hdr", fill=s["header_fill"])
+        sheet.add(f"{sel} .dot", fill=s["accent"])
+    sheet.add(f"{sel} .lbl", fill=s["text"])
+    sheet.add(f"{sel} .sub", fill=s["text"], opacity=s["sub_opacity"])
+
+
+def draw_card_chrome(svg, spec, w, h, s):
+    """Everything of a card except its text: glow, body, header bar and dot."""
+    rx, hh = s["rx"], s["header"]
+    if s["glow"] and not draw_halo(svg, spec, s, w, h, rx):
+        svg.element("rect", class_="glow", x=0, y=0, width=w, height=h, rx=rx, filter=_filter(spec, s))
+    svg.element("rect", class_="body", x=0, y=0, width=w, height=h, rx=rx)
+    if s["body"] == "db":
+        # Database shape hint: gradient body with a top lid
+        svg.element("rect", class_="lid", x=0, y=0, width=w, height=10, rx=2)
+    else:
+        svg.element("path", class_="hdr", d=f"M 0 {rx} Q 0 0 {rx} 0 L {fmt_num(w - rx)} 0 Q {fmt_num(w)} 0 "
+                                           f"{fmt_num(w)} {rx} L {fmt_num(w)} {hh} L 0 {hh} Z")
+        svg.element("circle", class_="dot", cx=15, cy=s["dot_cy"], r=s["dot_r"])
+
+
+def draw_card(svg, spec, node, s, symbol=None):
+    if symbol:
+        svg.element("use", href=f"#{symbol}")
+    else:
+        draw_card_chrome(svg, spec, node.w, node.h, s)
+    svg.element("text", node.label, class_="lbl", x=s["label_x"], y=s["label_y"], font_size=s["label_size"],
+                font_weight="bold", font_family="monospace")
+    if node.sub:
+        svg.element("text", node.sub, class_="sub", x=node.w / 2, y=s["sub_y"], font_size=s["sub_size"],
+                    text_anchor="middle", font_style="italic")
+
+
+SHAPES = {"block": draw_block, "card": draw_card}
+SHAPE_RULES = {"block": block_rules, "card": card_rules}
+
+# Style keys that affect a card's chrome (and so its shared <symbol>).
+CARD_CHROME = ("rx", "fill", "border", "accent", "header_fill", "glow", "glow_opacity", "body", "body_fill",
+               "header", "dot_cy", "dot_r")
+
+
+def node_classes(node):
+    """Class list of a node group; nodes with their own ``style`` get an id class."""
+    classes = f"node node--{class_name(node.type)}"
+    if node.style:
+        classes += f" node--{class_name(node.id)}"
+    return classes
+
+
+def node_selector(node):
+    # Per-node overrides use a doubled class so they outrank the type rule
+    if node.style:
+        return f".node.node--{class_name(node.id)}"
+    return f".node--{class_name(node.type)}"
+
+
+def chrome_key(node, style):
+    if style["shape"] != "card":
+        return None
+    return (node_selector(node), node.w, node.h) + tuple(repr(style[k]) for k in CARD_CHROME)
+
+
+def plan_symbols(nodes, styles):
+    """Symbol id for every card chrome that occurs at least twice."""
+    counts = {}
+    for node, style in zip(nodes, styles, strict=True):
+        key = chrome_key(node, style)
+        if key is not None:
+            counts[key] = counts.get(key, 0) + 1
+    shared = [key for key, count in counts.items() if count > 1]
+    return {key: f"chrome{i}" for i, key in enumerate(shared)}
+
+
+def draw_symbols(svg, spec, nodes, styles, symbols):
+    done = set()
+    for node, style in zip(nodes, styles, strict=True):
+        key = chrome_key(node, style)
+        if key in symbols and key not in done:
+            done.add(key)
+            # The symbol carries the node classes so the type rules reach its chrome
+            with svg.group("symbol", id=symbols[key], class_=node_classes(node), overflow="visible"):
+                draw_card_chrome(svg, spec, node.w, node.h, style)
+
+
+def draw_node(svg, spec, node, style=None, symbols=None):
+    style = style or node_style(spec, node)
+    with svg.group(class_=node_classes(node), transform=f"translate({fmt_num(node.x)}, {fmt_num(node.y)})"):
+        if style["shape"] == "card":
+            draw_card(svg, spec, node, style, (symbols or {}).get(chrome_key(node, style)))
+        else:
+            SHAPES[style["shape"]](svg, spec, node, style)
+        for item in node.extras:
+            draw_primitive(svg, spec, item)
+
+
+def edge_style(spec, edge):
+    style = dict(EDGE_DEFAULTS)
+    style.update(spec.edge_style)
+    style.update(edge.style)
+    return style
+
+
+def edge_classes(edge):
+    if not edge.style:
+        return "edge"
+    return f"edge edge--{class_name(edge.style.get('class') or f'e{edge.index}')}"
+
+
+def edge_rules(sheet, spec):
+    base = dict(EDGE_DEFAULTS)
+    base.update(spec.edge_style)
+    sheet.add(".edge", fill="none", stroke=base["stroke"], stroke_width=base["width"], opacity=base["opacity"],
+              stroke_dasharray=base["dash"])
+    seen = set()
+    for edge in spec.graph.edges:
+        if not edge.style:
+            continue
+        cls = edge_classes(edge).split()[1]
+        if cls in seen:
+            continue
+        seen.add(cls)
+        s = edge_style(spec, edge)
+        changed = {k: s[k] for k in ("stroke", "width", "opacity", "dash") if s[k] != base[k]}
+        sheet.add(f".edge.{cls}", stroke=changed.get("stroke"), stroke_width=changed.get("width"),
+                  opacity=changed.get("opacity"), stroke_dasharray=changed.get("dash"))
+
+
+def draw_edge(svg, spec, edge, d):
+    style = edge_style(spec, edge)
+    svg.element("path", class_=edge_classes(edge), d=d,
+                marker_end=spec.ref(style["marker"]) if style["marker"] else None)
+
+
+def compile_stylesheet(spec, nodes, styles):
+    """Rules for the types/overrides of ``nodes`` (styled by ``styles``) and ``spec``'s edge classes."""
+    sheet = Stylesheet(spec)
+    if spec.canvas.get("background"):
+        sheet.add("svg", background_color=spec.canvas["background"])
+    seen = set()
+    for node, style in zip(nodes, styles, strict=True):
+        sel = node_selector(node)
+        if sel not in seen:
+            seen.add(sel)
+            SHAPE_RULES[style["shape"]](sheet, sel, style)
+    edge_rules(sheet, spec)
+    return sheet
+
+
+def root_attrs(spec):
+    font = spec.canvas.get("font")
+    return {"style": f"font-family: {font};"} if font else {}
+
+
+# Edge route used by laid-out specs that do not declare their own.
+LAYOUT_ROUTES = {
+    "LR": {"from": "right", "to": "left", "curve": "h"},
+    "TB": {"from": "bottom", "to": "top", "curve": "v"},
+}
+
+
+def prepare(spec):
+    """Size ``"auto"`` nodes and run the spec's automatic layout (once) so every node has geometry."""
+    if spec.laid_out:
+        return spec
+    graph = spec.graph
+    if spec.autosize or np.isnan(graph.column("w")).any() or np.isnan(graph.column("h")).any():
+        autosize(spec, graph.nodes, [node_style(spec, node) for node in graph.nodes])
+    if not spec.layout:
+        spec.laid_out = True
+        return spec
+    from .layout import layered_layout
+
+    options = dict(spec.layout)
+    kind = options.pop("kind", "layered")
+    if kind != "layered":
+        raise SpecError(f"unknown layout kind {kind!r}")
+    if "origin" in options:
+        options["origin"] = tuple(options["origin"])
+    if "default_size" in options:
+        options["default_size"] = tuple(options["default_size"])
+    result = layered_layout(graph, **options)
+    result.apply(graph)
+    if spec.canvas.get("width") == "auto":
+        spec.canvas["width"] = round(result.width)
+    if spec.canvas.get("height") == "auto":
+        spec.canvas["height"] = round(result.height)
+    if not spec.edge_route:
+        spec.edge_route = LAYOUT_ROUTES[options.get("direction", "LR")]
+    spec.laid_out = True
+    return spec
+
+
+def paint_order(spec, styles):
+    """The document body back to front, as ``(kind, item, style)`` tuples.
+
+    ``kind`` is ``"decoration"``, ``"node"`` or ``"edge"``; ``style`` is the
+    node's merged style (``None`` for the other kinds). Order: back
+    decorations, back-layer nodes, edges, other nodes, front decorations.
+    """
+    graph = spec.graph
+    for item in spec.decorations:
+        if item.get("layer") == "back":
+            yield "decoration", item, None
+    for node, style in zip(graph.nodes, styles, strict=True):
+        if node.layer == "back":
+            yield "node", node, style
+    for edge in graph.edges:
+        yield "edge", edge, None
+    for node, style in zip(graph.nodes, styles, strict=True):
+        if node.layer != "back":
+            yield "node", node, style
+    for item in spec.decorations:
+        if item.get("layer") != "back":
+            yield "decoration", item, None
+
+
+def draw_item(svg, spec, kind, item, style=None, paths=None, symbols=None):
+    """Draw one ``paint_order`` entry; edges take their ``d`` from ``paths`` (see ``edge_paths``)."""
+    if kind == "node":
+        draw_node(svg, spec, item, style, symbols)
+    elif kind == "edge":
+        draw_edge(svg, spec, item, paths[item.index])
+    else:
+        draw_primitive(svg, spec, item)
+
+
+class Scene:
+    """The variant-independent part of rendering ``spec``: layout, edge routes and node styles.
+
+    Built once per spec; ``write`` then serializes it any number of times.
+    The document body is streamed straight to the target, so memory does
+    not grow with the drawing. It does not depend on the theme variant,
+    view or size, though, so when several outputs share it the first
+    ``write`` can ``keep`` it (per set of optimize options and footer
+    choice) and later ones splice it in; such an extra output costs its
+    root element and stylesheet. Phases are recorded in ``timer`` (a
+    ``diagram.timing.Timer``) when one is given.
+    """
+
+    def __init__(self, spec, timer=None):
+        self.timer = timer or NULL_TIMER
+        with self.timer.phase("layout"):
+            self.spec = prepare(spec)
+        graph = spec.graph
+        with self.timer.phase("route"):
+            router = Router(graph, **spec.router) if spec.router is not None else None
+            self.paths = edge_paths(spec, router)
+            self.styles = [node_style(spec, node) for node in graph.nodes]
+        self.bodies = {}
+
+    def bounds(self):
+        """``(x0, y0, x1, y1)`` around every node."""
+        graph = self.spec.graph
+        if not len(graph):
+            return 0, 0, self.spec.canvas["width"], self.spec.canvas["height"]
+        x, y, w, h = (graph.column(name) for name in ("x", "y", "w", "h"))
+        return float(x.min()), float(y.min()), float((x + w).max()), float((y + h).max())
+
+    def body_key(self, optimize=None, footer=True):
+        """Cache key of the body ``write(optimize=optimize, footer=footer)`` produces."""
+        return tuple(sorted(optimize_options(self.spec, optimize).items())), footer
+
+    def _defs(self, svg, options, variant=None):
+        spec, graph = self.spec, self.spec.graph
+        defs = resolve_defs(spec, halos=options["halos"])
+        symbols = plan_symbols(graph.nodes, self.styles) if options["symbols"] else {}
+        with svg.group("defs"):
+            sheet = compile_stylesheet(spec, graph.nodes, self.styles)
+            svg.element("style", sheet.css(variant))
+            draw_defs(svg, spec, defs)
+            draw_symbols(svg, spec, graph.nodes, self.styles, symbols)
+        return symbols
+
+    def _draw_body(self, svg, symbols, footer):
+        for kind, item, style in paint_order(self.spec, self.styles):
+            if not footer and kind == "decoration" and item.get("role") == "title":
+                continue
+            draw_item(svg, self.spec, kind, item, style, self.paths, symbols)
+
+    def write(self, target, optimize=None, variant=None, view=None, size=None, footer=True, keep=False):
+        """Serialize to ``target``; returns the paint-cost estimate of what was written.
+
+        ``view`` is a viewBox ``(x, y, width, height)`` (default: the canvas),
+        ``size`` adds explicit ``width``/``height`` attributes and
+        ``footer=False`` leaves out decorations with ``"role": "title"``.
+        ``keep`` buffers the body for later writes that share it (see
+        ``body_key``). See ``render`` for ``optimize`` and ``variant``.
+        """
+        spec = self.spec
+        options = optimize_options(spec, optimize)
+        key = self.body_key(optimize, footer)
+        meter = PaintCost()
+        transform = chain(meter, Minifier(options["precision"]) if options["minify"] else None)
+        writer = SvgWriter(target, spec.canvas["width"], spec.canvas["height"], transform=transform,
+                           **root_attrs(spec))
+        if view is not None:
+            writer.root_attrs["viewBox"] = " ".join(fmt_num(v) for v in view)
+        if size is not None:
+            # Root width/height clash with SvgWriter's own (viewBox) arguments
+            writer.root_attrs["width"], writer.root_attrs["height"] = size
+
+        output = target if isinstance(target, str) else type(target).__name__
+        with self.timer.phase("write", output=output), writer as svg:
+            # The meter sees the defs first, so symbol and marker uses in the body are charged
+            symbols = self._defs(svg, options, variant)
+            if key in self.bodies:
+                markup, cost = self.bodies[key]
+                svg.splice(markup)
+                meter.add(cost)
+            elif keep:
+                with self.timer.phase("serialize"):
+                    before = dict(meter.totals)
+                    buf = io.StringIO()
+                    self._draw_body(SvgWriter.fragment(buf, transform=transform), symbols, footer)
+                    markup = buf.getvalue()
+                    self.bodies[key] = markup, {k: meter.totals[k] - before[k] for k in before}
+                svg.splice(markup)
+            else:
+                with self.timer.phase("serialize"):
+                    self._draw_body(svg, symbols, footer)
+        return meter.report()
+
+
+def render(spec, target=None, optimize=None, variant=None):
+    """Render ``spec`` to ``target`` (a path or stream); defaults to ``paths.output_path(spec)``.
+
+    ``optimize`` overrides the spec's ``optimize`` section (``False`` turns
+    minification and symbol reuse off, ``{"halos": True}`` selects the
+    low-cost render mode); ``variant`` picks a theme variant such as
+    ``"light"``. Returns the target; the paint-cost estimate of what was
+    written is left in ``spec.paint_cost``.
+    """
+    # Relative outputs are relative to the project root, not the working directory
+    target = target if target is not None else output_path(spec)
+    spec.paint_cost = Scene(spec).write(target, optimize, variant)
+    return target
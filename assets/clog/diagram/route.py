@@ -0,0 +1,316 @@
+"""Obstacle-aware edge routing.
+
+``Router`` picks border anchors for each edge and tries, in order of
+preference, smooth bezier connections between candidate side pairs; the
+first one whose sampled polyline misses every other node wins. When no
+curve is clear it falls back to an orthogonal route found by A* over the
+channels between nearby obstacles.
+
+Obstacle lookups go through ``GridIndex``, a uniform spatial hash, so each
+query only touches the handful of nodes near the segment being tested and
+routing E edges over N nodes stays close to O(E) rather than O(E*N).
+Nodes that contain an edge's endpoint (e.g. a protocol shell around its
+kernel) are treated as containers, not obstacles.
+"""
+
+import heapq
+import math
+from collections import defaultdict
+from itertools import pairwise
+
+from .writer import fmt_num
+
+NORMALS = {"left": (-1, 0), "right": (1, 0), "top": (0, -1), "bottom": (0, 1)}
+
+
+class GridIndex:
+    """Uniform-grid spatial hash over axis-aligned rectangles ``(x0, y0, x1, y1)``."""
+
+    def __init__(self, rects, cell=None):
+        self.rects = rects
+        if cell is None:
+            sizes = sorted(max(r[2] - r[0], r[3] - r[1]) for r in rects) or [100]
+            cell = max(sizes[len(sizes) // 2], 1)
+        self.cell = cell
+        self.cells = defaultdict(list)
+        for i, (x0, y0, x1, y1) in enumerate(rects):
+            for key in self._keys(x0, y0, x1, y1):
+                self.cells[key].append(i)
+
+    def _keys(self, x0, y0, x1, y1):
+        c = self.cell
+        for cx in range(math.floor(x0 / c), math.floor(x1 / c) + 1):
+            for cy in range(math.floor(y0 / c), math.floor(y1 / c) + 1):
+                yield cx, cy
+
+    def query(self, x0, y0, x1, y1):
+        """Ids of rectangles overlapping the box."""
+        hits = set()
+        cells = self.cells
+        for key in self._keys(min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)):
+            bucket = cells.get(key)
+            if bucket:
+                hits.update(bucket)
+        lo_x, hi_x, lo_y, hi_y = min(x0, x1), max(x0, x1), min(y0, y1), max(y0, y1)
+        return [i for i in hits
+                if self.rects[i][0] <= hi_x and self.rects[i][2] >= lo_x
+                and self.rects[i][1] <= hi_y and self.rects[i][3] >= lo_y]
+
+
+def segment_hits_rect(ax, ay, bx, by, rect):
+    """Liang-Barsky test: does segment A-B cross the interior of ``rect``?"""
+    x0, y0, x1, y1 = rect
+    t0, t1 = 0.0, 1.0
+    dx, dy = bx - ax, by - ay
+    for p, q in ((-dx, ax - x0), (dx, x1 - ax), (-dy, ay - y0), (dy, y1 - ay)):
+        if p == 0:
+            if q <= 0:
+                return False
+        else:
+            t = q / p
+            if p < 0:
+                if t > t1:
+                    return False
+                t0 = max(t0, t)
+            else:
+                if t < t0:
+                    return False
+                t1 = min(t1, t)
+    return t1 - t0 > 1e-9
+
+
+def side_point(node, side):
+    if side == "left":
+        return node.x, node.y + node.h / 2
+    if side == "right":
+        return node.x + node.w, node.y + node.h / 2
+    if side == "top":
+        return node.x + node.w / 2, node.y
+    return node.x + node.w / 2, node.y + node.h
+
+
+def side_pairs(src, tgt):
+    """Candidate (source side, target side) pairs, most natural first."""
+    dx = (tgt.x + tgt.w / 2) - (src.x + src.w / 2)
+    dy = (tgt.y + tgt.h / 2) - (src.y + src.h / 2)
+    across_x = abs(dx) / max((src.w + tgt.w) / 2, 1)
+    across_y = abs(dy) / max((src.h + tgt.h) / 2, 1)
+    horizontal = ("right", "left") if dx >= 0 else ("left", "right")
+    vertical = ("bottom", "top") if dy >= 0 else ("top", "bottom")
+    loops_x = [("left", "left"), ("right", "right")]
+    loops_y = [("top", "top"), ("bottom", "bottom")]
+    if across_x >= across_y:
+        return [horizontal, vertical] + loops_y + loops_x
+    return [vertical, horizontal] + loops_x + loops_y
+
+
+def bezier_controls(p, q, s_side, t_side, min_bend):
+    (sx, sy), (tx, ty) = p, q
+    (snx, sny), (tnx, tny) = NORMALS[s_side], NORMALS[t_side]
+    ahead = (tx - sx) * snx + (ty - sy) * sny
+    if s_side == t_side:
+        bend = max(min_bend, 0.25 * math.hypot(tx - sx, ty - sy))
+    elif ahead > 0:
+        # Target lies in front of the source side: a plain S-curve
+        bend = ahead / 2
+    else:
+        # Back-edge: swing out past both boxes before turning in
+        bend = max(min_bend, abs(ahead) / 2)
+    return (sx + snx * bend, sy + sny * bend), (tx + tnx * bend, ty + tny * bend)
+
+
+def curve_path(p, c1, c2, q):
+    f = fmt_num
+    return f"M{f(p[0])},{f(p[1])} C{f(c1[0])},{f(c1[1])} {f(c2[0])},{f(c2[1])} {f(q[0])},{f(q[1])}"
+
+
+def sample_bezier(p0, c1, c2, p3, steps=16):
+    pts = []
+    for i in range(steps + 1):
+        t = i / steps
+        u = 1 - t
+        a, b, c, d = u * u * u, 3 * u * u * t, 3 * u * t * t, t * t * t
+        pts.append((a * p0[0] + b * c1[0] + c * c2[0] + d * p3[0],
+                    a * p0[1] + b * c1[1] + c * c2[1] + d * p3[1]))
+    return pts
+
+
+class Router:
+    """Route edges around the nodes of ``graph``.
+
+    ``style`` is ``"bezier"`` (curves first, orthogonal fallback) or
+    ``"orthogonal"``; ``margin`` is the clearance kept around obstacles and
+    ``radius`` rounds orthogonal corners. ``max_channels`` bounds the
+    orthogonal search grid so a long edge through a dense region costs a
+    bounded amount before falling back to the preferred curve.
+    """
+
+    def __init__(self, graph, style="bezier", margin=8, min_bend=30, radius=6, max_channels=4000, cell=None):
+        if style not in ("bezier", "orthogonal"):
+            raise ValueError(f"unknown routing style {style!r}")
+        self.graph = graph
+        self.style = style
+        self.margin = margin
+        self.min_bend = min_bend
+        self.radius = radius
+        self.max_channels = max_channels
+        x, y, w, h = (graph.column(name) for name in ("x", "y", "w", "h"))
+        self.rects = list(zip(x.tolist(), y.tolist(), (x + w).tolist(), (y + h).tolist(), strict=True))
+        self.index = GridIndex(self.rects, cell=cell)
+
+    # --- Obstacle queries ---
+
+    def _ignored(self, src, tgt):
+        """The endpoints themselves plus any node that contains either of them."""
+        ignore = {src.index, tgt.index}
+        for node in (src, tgt):
+            for i in self.index.query(node.x, node.y, node.x + node.w, node.y + node.h):
+                x0, y0, x1, y1 = self.rects[i]
+                if x0 <= node.x and y0 <= node.y and x1 >= node.x + node.w and y1 >= node.y + node.h:
+                    ignore.add(i)
+        return ignore
+
+    def _clear(self, points, ignore, inflate=0.0):
+        xs, ys = [p[0] for p in points], [p[1] for p in points]
+        near = [self.rects[i] for i in self.index.query(min(xs) - inflate, min(ys) - inflate,
+                                                        max(xs) + inflate, max(ys) + inflate)
+                if i not in ignore]
+        if not near:
+            return True
+        boxes = [(x0 - inflate, y0 - inflate, x1 + inflate, y1 + inflate) for x0, y0, x1, y1 in near]
+        for (ax, ay), (bx, by) in pairwise(points):
+            for box in boxes:
+                if segment_hits_rect(ax, ay, bx, by, box):
+                    return False
+        return True
+
+    # --- Routing ---
+
+    def route(self, edge):
+        """Path data for ``edge`` (an ``Edge`` of the routed graph)."""
+        src, tgt = self.graph.node(edge.source), self.graph.node(edge.target)
+        if src == tgt:
+            return self.self_loop(src)
+        ignore = self._ignored(src, tgt)
+        pairs = side_pairs(src, tgt)
+        if self.style == "bezier":
+            for s_side, t_side in pairs:
+                p, q = side_point(src, s_side), side_point(tgt, t_side)
+                c1, c2 = bezier_controls(p, q, s_side, t_side, self.min_bend)
+                if self._clear(sample_bezier(p, c1, c2, q), ignore):
+                    return curve_path(p, c1, c2, q)
+        for s_side, t_side in pairs:
+            points = self.orthogonal(src, tgt, s_side, t_side, ignore)
+            if points:
+                return self.polyline_path(points)
+        # Nothing is clear: use the most natural curve even if it crosses a node
+        s_side, t_side = pairs[0]
+        p, q = side_point(src, s_side), side_point(tgt, t_side)
+        return curve_path(p, *bezier_controls(p, q, s_side, t_side, self.min_bend), q)
+
+    def self_loop(self, node):
+        """Small loop leaving the top edge and re-entering the right edge."""
+        f = fmt_num
+        x, y, b = node.x + node.w, node.y, self.min_bend
+        return f"M{f(x - b)},{f(y)} C{f(x - b)},{f(y - b)} {f(x + b)},{f(y + b)} {f(x)},{f(y + b)}"
+
+    def orthogonal(self, src, tgt, s_side, t_side, ignore, attempts=3):
+        """A* over obstacle channels between the two anchor stubs, or ``None``."""
+        m = self.margin
+        p, q = side_point(src, s_side), side_point(tgt, t_side)
+        (snx, sny), (tnx, tny) = NORMALS[s_side], NORMALS[t_side]
+        start = (p[0] + snx * m * 2, p[1] + sny * m * 2)
+        goal = (q[0] + tnx * m * 2, q[1] + tny * m * 2)
+        # Endpoints become obstacles again once we are off their stubs
+        blocked = ignore - {src.index, tgt.index}
+        pad = 2 * max(src.w, src.h, tgt.w, tgt.h)
+        for _ in range(attempts):
+            x0, x1 = min(start[0], goal[0]) - pad, max(start[0], goal[0]) + pad
+            y0, y1 = min(start[1], goal[1]) - pad, max(start[1], goal[1]) + pad
+            near = [i for i in self.index.query(x0, y0, x1, y1) if i not in blocked]
+            xs = {start[0], goal[0], (start[0] + goal[0]) / 2}
+            ys = {start[1], goal[1], (start[1] + goal[1]) / 2}
+            for i in near:
+                rx0, ry0, rx1, ry1 = self.rects[i]
+                xs.update((rx0 - m * 2, rx1 + m * 2))
+                ys.update((ry0 - m * 2, ry1 + m * 2))
+            if len(xs) * len(ys) > self.max_channels:
+                # Too crowded to search cheaply; let the caller fall back
+                return None
+            path = self._astar(start, goal, sorted(xs), sorted(ys), blocked)
+            if path:
+                return simplify([p] + path + [q])
+            pad *= 2
+        return None
+
+    def _astar(self, start, goal, xs, ys, ignore):
+        xi, yi = {x: i for i, x in enumerate(xs)}, {y: i for i, y in enumerate(ys)}
+        s, g = (xi[start[0]], yi[start[1]]), (xi[goal[0]], yi[goal[1]])
+        inflate = self.margin / 2
+
+        def h(node):
+            return abs(xs[node[0]] - goal[0]) + abs(ys[node[1]] - goal[1])
+
+        best = {(s, None): 0.0}
+        came = {}
+        heap = [(h(s), 0.0, s, None)]
+        while heap:
+            _, cost, cur, heading = heapq.heappop(heap)
+            if cur == g:
+                pts = [cur]
+                key = (cur, heading)
+                while key in came:
+                    key = came[key]
+                    pts.append(key[0])
+                pts.reverse()
+                return simplify([(xs[a], ys[b]) for a, b in pts])
+            if cost > best.get((cur, heading), math.inf):
+                continue
+            for step in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                nxt = (cur[0] + step[0], cur[1] + step[1])
+                if not (0 <= nxt[0] < len(xs) and 0 <= nxt[1] < len(ys)):
+                    continue
+                a, b = (xs[cur[0]], ys[cur[1]]), (xs[nxt[0]], ys[nxt[1]])
+                if not self._clear([a, b], ignore, inflate):
+                    continue
+                turn = 0.0 if heading in (None, step) else self.margin * 4
+                new_cost = cost + abs(b[0] - a[0]) + abs(b[1] - a[1]) + turn
+                if new_cost < best.get((nxt, step), math.inf):
+                    best[(nxt, step)] = new_cost
+                    came[(nxt, step)] = (cur, heading)
+                    heapq.heappush(heap, (new_cost + h(nxt), new_cost, nxt, step))
+        return None
+
+    def polyline_path(self, points):
+        """Orthogonal polyline as path data, with corners rounded by ``radius``."""
+        f = fmt_num
+        parts = [f"M{f(points[0][0])},{f(points[0][1])}"]
+        r = self.radius
+        for prev, cur, nxt in zip(points, points[1:], points[2:], strict=False):
+            d_in = math.hypot(cur[0] - prev[0], cur[1] - prev[1])
+            d_out = math.hypot(nxt[0] - cur[0], nxt[1] - cur[1])
+            k = min(r, d_in / 2, d_out / 2)
+            if k <= 0:
+                parts.append(f"L{f(cur[0])},{f(cur[1])}")
+                continue
+            a = (cur[0] - (cur[0] - prev[0]) / d_in * k, cur[1] - (cur[1] - prev[1]) / d_in * k)
+            b = (cur[0] + (nxt[0] - cur[0]) / d_out * k, cur[1] + (nxt[1] - cur[1]) / d_out * k)
+            parts.append(f"L{f(round(a[0], 2))},{f(round(a[1], 2))} "
+                         f"Q{f(cur[0])},{f(cur[1])} {f(round(b[0], 2))},{f(round(b[1], 2))}")
+        parts.append(f"L{f(points[-1][0])},{f(points[-1][1])}")
+        return " ".join(parts)
+
+
+def simplify(points):
+    """Drop duplicate and collinear interior points of an orthogonal polyline."""
+    out = []
+    for pt in points:
+        if out and pt == out[-1]:
+            continue
+        if len(out) >= 2:
+            (ax, ay), (bx, by) = out[-2], out[-1]
+            if (ax == bx == pt[0]) or (ay == by == pt[1]):
+                out[-1] = pt
+                continue
+        out.append(pt)
+    return out
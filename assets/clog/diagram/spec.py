@@ -0,0 +1,584 @@
+"""Declarative diagram specs and the compiled graph they load into.
+
+A spec is a JSON document describing the canvas, colour tokens, node types,
+nodes, edges and free-standing decorations of one figure. ``load_spec``
+validates it up front (duplicate ids, dangling edge endpoints, unknown node
+types) and compiles the node/edge lists into a ``Graph`` with O(1) id lookup
+and adjacency lists, so resolving E edges is O(E) rather than O(N*E). The
+graph keeps geometry and interned type codes in NumPy columns and hands out
+lightweight views, so a 10^5-node graph costs bytes per node, not objects.
+
+Specs for machine-generated graphs may omit node coordinates and set a
+``layout`` section instead (see ``diagram.layout``); the canvas size can
+then be ``"auto"``. Edges without explicit anchors are placed by the
+obstacle-aware router when the spec has a ``router`` section (see
+``diagram.route``). Colour tokens come from the named ``theme`` (see
+``themes/``), optionally overridden by the spec's own ``colors``.
+"""
+
+import json
+import os
+from array import array
+from types import MappingProxyType
+
+import numpy as np
+
+from .paths import spec_path, theme_path
+
+
+class SpecError(ValueError):
+    """Raised when a diagram spec is malformed or internally inconsistent."""
+
+
+class Node:
+    """A node to add to a ``Graph`` (the graph stores it in its columns)."""
+
+    __slots__ = ("id", "label", "sub", "type", "x", "y", "w", "h", "layer", "style", "extras")
+
+    def __init__(self, id, label="", sub="", type="default", x=0, y=0, w=0, h=0,
+                 layer="front", style=None, extras=None):
+        self.id = id
+        self.label = label
+        self.sub = sub
+        self.type = type
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.layer = layer
+        self.style = style or {}
+        self.extras = extras or []
+
+    def __repr__(self):
+        return f"Node({self.id!r}, type={self.type!r}, x={self.x}, y={self.y}, w={self.w}, h={self.h})"
+
+
+class Edge:
+    """An edge to add to a ``Graph``."""
+
+    __slots__ = ("source", "target", "route", "style")
+
+    def __init__(self, source, target, route=None, style=None):
+        self.source = source
+        self.target = target
+        self.route = route or {}
+        self.style = style or {}
+
+    def __repr__(self):
+        return f"Edge({self.source!r} -> {self.target!r})"
+
+
+# --- Columnar graph store ---
+
+EMPTY = MappingProxyType({})
+# "auto" node dimensions are stored as NaN until ``diagram.text.autosize`` fills them in.
+AUTO = float("nan")
+# Column name -> ``array`` typecode.
+NODE_COLUMNS = {"x": "d", "y": "d", "w": "d", "h": "d", "type": "i", "layer": "i"}
+EDGE_COLUMNS = {"source": "i", "target": "i"}
+
+
+class Interned:
+    """String table giving every distinct name a small integer code."""
+
+    __slots__ = ("names", "codes")
+
+    def __init__(self):
+        self.names = []
+        self.codes = {}
+
+    def code(self, name):
+        code = self.codes.get(name)
+        if code is None:
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+
+class Columns:
+    """Contiguous typed columns of one row count.
+
+    Each column is a preallocated ``array``; when it fills up, a twice as
+    large one replaces it (the old buffer is never resized, so NumPy views
+    taken with ``column`` stay valid, if stale). Scalar reads return plain
+    Python numbers; ``column`` gives a zero-copy NumPy view for whole-column
+    work.
+    """
+
+    __slots__ = ("arrays", "size", "capacity")
+
+    def __init__(self, typecodes, capacity=64):
+        self.arrays = {name: array(code, bytes(capacity * array(code).itemsize)) for name, code in typecodes.items()}
+        self.size = 0
+        self.capacity = capacity
+
+    def append(self, row):
+        i = self.size
+        arrays = self.arrays
+        if i == self.capacity:
+            self.capacity *= 2
+            for name, old in arrays.items():
+                grown = array(old.typecode, bytes(self.capacity * old.itemsize))
+                grown[:i] = old
+                arrays[name] = grown
+        for name, value in row.items():
+            arrays[name][i] = value
+        self.size = i + 1
+        return i
+
+    def column(self, name):
+        """Writable NumPy view of the filled part of column ``name``."""
+        return np.frombuffer(self.arrays[name], dtype=self.arrays[name].typecode)[:self.size]
+
+
+class NodeView:
+    """One node of a ``Graph``; attributes read and write its row of the columns."""
+
+    __slots__ = ("graph", "index", "cols")
+
+    def __init__(self, graph, index):
+        self.graph = graph
+        self.index = index
+        self.cols = graph.node_columns.arrays
+
+    @property
+    def x(self):
+        return self.cols["x"][self.index]
+
+    @x.setter
+    def x(self, value):
+        self.cols["x"][self.index] = value
+
+    @property
+    def y(self):
+        return self.cols["y"][self.index]
+
+    @y.setter
+    def y(self, value):
+        self.cols["y"][self.index] = value
+
+    @property
+    def w(self):
+        value = self.cols["w"][self.index]
+        return "auto" if value != value else value
+
+    @w.setter
+    def w(self, value):
+        self.cols["w"][self.index] = AUTO if value == "auto" else value
+
+    @property
+    def h(self):
+        value = self.cols["h"][self.index]
+        return "auto" if value != value else value
+
+    @h.setter
+    def h(self, value):
+        self.cols["h"][self.index] = AUTO if value == "auto" else value
+
+    @property
+    def id(self):
+        return self.graph.ids[self.index]
+
+    @property
+    def label(self):
+        return self.graph.labels[self.index]
+
+    @property
+    def sub(self):
+        return self.graph.subs[self.index]
+
+    @property
+    def type(self):
+        return self.graph.types.names[self.cols["type"][self.index]]
+
+    @property
+    def layer(self):
+        return self.graph.layers.names[self.cols["layer"][self.index]]
+
+    @property
+    def style(self):
+        return self.graph.styles.get(self.index, EMPTY)
+
+    @property
+    def extras(self):
+        return self.graph.extras.get(self.index, ())
+
+    def __eq__(self, other):
+        return isinstance(other, NodeView) and other.graph is self.graph and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.graph), self.index))
+
+    def __repr__(self):
+        return f"Node({self.id!r}, type={self.type!r}, x={self.x}, y={self.y}, w={self.w}, h={self.h})"
+
+
+class EdgeView:
+    """One edge of a ``Graph``; ``source``/``target`` are node ids."""
+
+    __slots__ = ("graph", "index")
+
+    def __init__(self, graph, index):
+        self.graph = graph
+        self.index = index
+
+    @property
+    def source(self):
+        return self.graph.ids[self.graph.edge_columns.arrays["source"][self.index]]
+
+    @property
+    def target(self):
+        return self.graph.ids[self.graph.edge_columns.arrays["target"][self.index]]
+
+    @property
+    def route(self):
+        return self.graph.routes.get(self.index, EMPTY)
+
+    @property
+    def style(self):
+        return self.graph.edge_styles.get(self.index, EMPTY)
+
+    def __eq__(self, other):
+        return isinstance(other, EdgeView) and other.graph is self.graph and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.graph), self.index))
+
+    def __repr__(self):
+        return f"Edge({self.source!r} -> {self.target!r})"
+
+
+class Rows:
+    """Sequence of views over the rows of ``columns``."""
+
+    __slots__ = ("graph", "columns", "view")
+
+    def __init__(self, graph, columns, view):
+        self.graph = graph
+        self.columns = columns
+        self.view = view
+
+    def __len__(self):
+        return self.columns.size
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.view(self.graph, j) for j in range(*i.indices(self.columns.size))]
+        if i < 0:
+            i += self.columns.size
+        if not 0 <= i < self.columns.size:
+            raise IndexError(i)
+        return self.view(self.graph, i)
+
+    def __iter__(self):
+        graph, view = self.graph, self.view
+        return (view(graph, i) for i in range(self.columns.size))
+
+
+class Adjacency:
+    """``adjacency[node_id]``: the edges leaving (``end="source"``) or entering a node.
+
+    A CSR index (edge order plus per-node offsets) over the edge columns,
+    rebuilt on the first lookup after edges were added.
+    """
+
+    def __init__(self, graph, end):
+        self.graph = graph
+        self.end = end
+        self.built = -1
+        self.order = self.starts = None
+
+    def _index(self):
+        edges = self.graph.edge_columns
+        if self.built != edges.size:
+            ends = edges.column(self.end)
+            order = np.argsort(ends, kind="stable")
+            self.order = array("q", order.astype(np.int64).tobytes())
+            self.starts = array("q", np.searchsorted(ends[order], np.arange(len(self.graph) + 1)).tobytes())
+            self.built = edges.size
+        return self.order, self.starts
+
+    def __getitem__(self, node_id):
+        i = self.graph.index[node_id]
+        order, starts = self._index()
+        if i + 1 >= len(starts):
+            return []
+        graph = self.graph
+        return [EdgeView(graph, e) for e in order[starts[i]:starts[i + 1]]]
+
+
+class Graph:
+    """Nodes and edges stored column-wise, with an id index and adjacency lookups.
+
+    Geometry, type and layer codes live in NumPy columns (``column``);
+    ids, labels and subs are plain lists; per-node ``style``/``extras`` and
+    per-edge ``route``/``style`` are sparse dicts keyed by row, since most
+    nodes and edges have none. ``nodes`` and ``edges`` are sequences of
+    ``NodeView``/``EdgeView`` objects created on access.
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.index = {}  # id -> row
+        self.labels = []
+        self.subs = []
+        self.types = Interned()
+        self.layers = Interned()
+        self.styles = {}
+        self.extras = {}
+        self.routes = {}
+        self.edge_styles = {}
+        self.node_columns = Columns(NODE_COLUMNS)
+        self.edge_columns = Columns(EDGE_COLUMNS)
+        self.nodes = Rows(self, self.node_columns, NodeView)
+        self.edges = Rows(self, self.edge_columns, EdgeView)
+        self.out_edges = Adjacency(self, "source")
+        self.in_edges = Adjacency(self, "target")
+
+    def __len__(self):
+        return self.node_columns.size
+
+    def __contains__(self, node_id):
+        return node_id in self.index
+
+    def column(self, name):
+        """Writable NumPy view of a node column (``x``, ``y``, ``w``, ``h``, ``type``, ``layer``)."""
+        return self.node_columns.column(name)
+
+    def endpoints(self):
+        """Source and target rows of every edge, as NumPy views."""
+        return self.edge_columns.column("source"), self.edge_columns.column("target")
+
+    def node(self, node_id):
+        try:
+            return NodeView(self, self.index[node_id])
+        except KeyError:
+            raise SpecError(f"unknown node id {node_id!r}") from None
+
+    def add_node(self, node):
+        """Store ``node`` (a ``Node``) and return its ``NodeView``."""
+        if node.id in self.index:
+            raise SpecError(f"duplicate node id {node.id!r}")
+        i = self.node_columns.append({
+            "x": node.x, "y": node.y, "w": AUTO if node.w == "auto" else node.w,
+            "h": AUTO if node.h == "auto" else node.h,
+            "type": self.types.code(node.type), "layer": self.layers.code(node.layer)})
+        self.ids.append(node.id)
+        self.index[node.id] = i
+        self.labels.append(node.label)
+        self.subs.append(node.sub)
+        if node.style:
+            self.styles[i] = node.style
+        if node.extras:
+            self.extras[i] = node.extras
+        return NodeView(self, i)
+
+    def add_edge(self, edge):
+        """Store ``edge`` (an ``Edge``) and return its ``EdgeView``."""
+        index = self.index
+        for end in (edge.source, edge.target):
+            if end not in index:
+                raise SpecError(f"edge {edge.source!r} -> {edge.target!r} references unknown node {end!r}")
+        i = self.edge_columns.append({"source": index[edge.source], "target": index[edge.target]})
+        if edge.route:
+            self.routes[i] = edge.route
+        if edge.style:
+            self.edge_styles[i] = edge.style
+        return EdgeView(self, i)
+
+    def successors(self, node_id):
+        return [e.target for e in self.out_edges[node_id]]
+
+    def predecessors(self, node_id):
+        return [e.source for e in self.in_edges[node_id]]
+
+
+class Spec:
+    """A loaded diagram spec: rendering settings plus the compiled ``Graph``."""
+
+    def __init__(self, name, output, canvas, colors, graph, theme=None, types=None, shapes=None, defs=None,
+                 edge_style=None, edge_route=None, decorations=None, layout=None, router=None, optimize=None,
+                 size_budget_kb=None, paint_budget=None, autosize=False, variants=None, path=None):
+        self.name = name
+        self.output = output
+        self.canvas = canvas
+        self.colors = colors
+        self.graph = graph
+        self.theme = theme or {"name": None, "colors": {}, "variants": {}}
+        self.color_overrides = {}
+        self.types = types or {}
+        self.shapes = shapes or {}
+        self.defs = defs or []
+        self.edge_style = edge_style or {}
+        self.edge_route = edge_route or {}
+        self.decorations = decorations or []
+        self.layout = layout
+        self.router = router
+        self.optimize = optimize or {}
+        self.size_budget_kb = size_budget_kb
+        self.paint_budget = paint_budget or {}
+        self.paint_cost = None
+        self.autosize = autosize
+        self.variants = variants or []
+        self.def_aliases = {}
+        self.halos = {}
+        self.laid_out = False
+        self.path = path
+
+    def color(self, value):
+        """Resolve a colour token (``"line"``) to its value; literals pass through."""
+        if isinstance(value, str):
+            if value.startswith("url(#"):
+                return self.ref(value[5:-1])
+            return self.colors.get(value, value)
+        return value
+
+    def ref(self, def_id):
+        """``url(#...)`` reference to a def, following de-duplication aliases."""
+        return f"url(#{self.def_aliases.get(def_id, def_id)})"
+
+
+NODE_FIELDS = {"id", "label", "sub", "type", "x", "y", "w", "h", "layer", "style", "extras"}
+ROUTE_FIELDS = {"from", "to", "from_at", "to_at", "curve", "bend"}
+
+
+def load_theme(name):
+    """Read ``themes/<name>.json`` (colour tokens plus named variants)."""
+    try:
+        with open(theme_path(name), encoding="utf-8") as f:
+            theme = json.load(f)
+    except FileNotFoundError:
+        raise SpecError(f"unknown theme {name!r}") from None
+    theme.setdefault("name", name)
+    theme.setdefault("variants", {})
+    return theme
+
+
+def _parse_edge(raw):
+    if isinstance(raw, (list, tuple)):
+        if len(raw) != 2:
+            raise SpecError(f"edge {raw!r} must be [source, target]")
+        return Edge(raw[0], raw[1])
+    if not isinstance(raw, dict):
+        raise SpecError(f"edge {raw!r} must be [source, target] or an object")
+    try:
+        source, target = raw["source"], raw["target"]
+    except KeyError as exc:
+        raise SpecError(f"edge {raw!r} is missing {exc.args[0]!r}") from None
+    route = {k: v for k, v in raw.items() if k in ROUTE_FIELDS}
+    return Edge(source, target, route=route, style=raw.get("style"))
+
+
+def geometry_problems(raw):
+    """Problems with the ``x``/``y``/``w``/``h`` fields of the node mapping ``raw`` (which has an id)."""
+    problems = []
+    for key in ("x", "y", "w", "h"):
+        value = raw.get(key, 0)
+        if not isinstance(value, (int, float)) and not (key in ("w", "h") and value == "auto"):
+            expected = "a number or 'auto'" if key in ("w", "h") else "a number"
+            problems.append(f"node {raw['id']!r} has {key}={value!r} (expected {expected})")
+    return problems
+
+
+def compile_spec(data, path=None):
+    """Validate a decoded spec mapping and compile it into a ``Spec``."""
+    problems = []
+    name = data.get("name") or (os.path.splitext(os.path.basename(path))[0] if path else None)
+    if not name:
+        problems.append("spec has no name")
+    canvas = data.get("canvas", {})
+    layout = data.get("layout")
+    for key in ("width", "height"):
+        if key not in canvas:
+            problems.append(f"canvas is missing {key!r}")
+        elif canvas[key] == "auto" and not layout:
+            problems.append(f"canvas {key!r} can only be 'auto' with a layout section")
+    types = data.get("types", {})
+    theme = None
+    colors = dict(data.get("colors", {}))
+    if data.get("theme"):
+        try:
+            theme = load_theme(data["theme"])
+        except SpecError as exc:
+            problems.append(str(exc))
+        else:
+            colors = {**theme["colors"], **colors}
+
+    graph = Graph()
+    rejected = set()
+    for raw in data.get("nodes", []):
+        if not isinstance(raw, dict):
+            problems.append(f"node {raw!r} is not an object")
+            continue
+        unknown = set(raw) - NODE_FIELDS
+        if unknown:
+            problems.append(f"node {raw.get('id')!r} has unknown fields {sorted(unknown)}")
+        if "id" not in raw:
+            problems.append(f"node {raw!r} has no id")
+            continue
+        if types and raw.get("type", "default") not in types:
+            problems.append(f"node {raw['id']!r} has undeclared type {raw.get('type')!r}")
+        geometry = geometry_problems(raw)
+        if geometry:
+            # The node cannot be stored; its edges are not reported as dangling either.
+            problems.extend(geometry)
+            rejected.add(raw["id"])
+            continue
+        try:
+            graph.add_node(Node(**{k: v for k, v in raw.items() if k in NODE_FIELDS}))
+        except SpecError as exc:
+            problems.append(str(exc))
+
+    for raw in data.get("edges", []):
+        try:
+            edge = _parse_edge(raw)
+            if edge.source not in rejected and edge.target not in rejected:
+                graph.add_edge(edge)
+        except SpecError as exc:
+            problems.append(str(exc))
+
+    if problems:
+        where = f"{path}: " if path else ""
+        raise SpecError(where + "; ".join(problems))
+
+    spec = Spec(name=name, output=data.get("output"), canvas=canvas, colors=colors,
+                graph=graph, theme=theme, types=types, shapes=data.get("shapes"), defs=data.get("defs"),
+                edge_style=data.get("edge_style"), edge_route=data.get("edge_route"),
+                decorations=data.get("decorations"), layout=layout, router=data.get("router"),
+                optimize=data.get("optimize"), size_budget_kb=data.get("size_budget_kb"),
+                paint_budget=data.get("paint_budget"), autosize=bool(data.get("autosize")),
+                variants=data.get("variants"), path=path)
+    spec.color_overrides = dict(data.get("colors", {}))
+    return spec
+
+
+def load_spec(path):
+    """Read and compile the JSON spec at ``path``."""
+    with open(path, encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as exc:
+            raise SpecError(f"{path}: invalid JSON: {exc}") from None
+    return compile_spec(data, path=os.fspath(path))
+
+
+# Spec sections a generated graph borrows from the figure whose style it reuses.
+TEMPLATE_KEYS = ("theme", "colors", "defs", "types", "shapes", "edge_style", "router", "optimize")
+
+
+def spec_template(source, name=None, direction="LR"):
+    """Spec mapping with the styling of ``specs/<source>.json``, an automatic layout and no graph.
+
+    Used for machine-generated graphs (traces, benchmarks) that should look
+    like a published figure; nodes are sized from their labels. Fill in
+    ``nodes`` and ``edges`` and pass it to ``compile_spec``.
+    """
+    with open(spec_path(source), encoding="utf-8") as f:
+        data = json.load(f)
+    spec = {k: data[k] for k in TEMPLATE_KEYS if k in data}
+    spec["name"] = name or source
+    spec["canvas"] = {"width": "auto", "height": "auto", "font": data["canvas"].get("font")}
+    spec["layout"] = {"direction": direction}
+    spec["autosize"] = True
+    spec["nodes"], spec["edges"] = [], []
+    return spec
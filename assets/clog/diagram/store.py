@@ -0,0 +1,184 @@
+"""Content-addressed store for the generated figures.
+
+Build products (outputs, variants, their content-hashed copies and the
+precompressed sidecars) are kept once, as blobs named by their SHA-256
+under ``assets/clog/.store``::
+
+    .store/blobs/97/44fbe727...
+
+Every path that holds those bytes is materialized from its blob as a
+copy-on-write clone (``FICLONE``, e.g. on Btrfs or XFS) where the
+filesystem allows it, else as a plain copy. Clones share their data
+blocks with the blob until one of them is written, so they cost no extra
+space, but each path is an ordinary writable file: editing, copying over
+or re-rendering one never changes the blob or any other path. A path that
+already holds the blob's bytes is left alone, so a rebuild that produces
+identical bytes does not rewrite its outputs or touch their mtimes.
+
+Blobs are read-only and never hard-linked out of the store. ``gc``
+deletes the blobs the build manifest does not record; ``--verify`` also
+re-hashes every blob and drops corrupt ones.
+
+    python assets/clog/gc_store.py --dry-run
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # no reflinks off POSIX; links and copies still work
+    fcntl = None
+
+from .paths import CLOG_DIR
+
+STORE_DIR = os.path.join(CLOG_DIR, ".store")
+FICLONE = 0x40049409  # _IOW(0x94, 9, int) from linux/fs.h
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def clone_file(src, dst):
+    """Copy-on-write clone of ``src`` at ``dst``; raises ``OSError`` where unsupported."""
+    if fcntl is None:
+        raise OSError("reflinks are not supported on this platform")
+    with open(src, "rb") as source, open(dst, "wb") as target:
+        fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+
+
+def copy_file(src, dst):
+    """Put the bytes of ``src`` at the new path ``dst``; returns ``"cloned"`` or ``"copied"``."""
+    try:
+        clone_file(src, dst)
+        return "cloned"
+    except OSError:
+        shutil.copyfile(src, dst)
+        return "copied"
+
+
+class Store:
+    """Blobs under ``path``, named by SHA-256."""
+
+    def __init__(self, path=STORE_DIR):
+        self.path = path
+        self.blobs = os.path.join(path, "blobs")
+        self.scratch = os.path.join(path, "tmp")
+
+    def blob(self, digest):
+        return os.path.join(self.blobs, digest[:2], digest[2:])
+
+    def _insert(self, path, digest, move=False):
+        """Make the bytes at ``path`` (moved, or cloned/copied) the blob ``digest`` unless it already exists."""
+        blob = self.blob(digest)
+        if os.path.exists(blob):
+            return
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        if move:
+            os.chmod(path, 0o444)
+            os.replace(path, blob)
+            return
+        tmp = f"{blob}.{os.getpid()}.tmp"
+        copy_file(path, tmp)
+        os.chmod(tmp, 0o444)
+        os.replace(tmp, blob)
+
+    def add(self, path, digest=None):
+        """Store the bytes at ``path`` (which is left as it is); returns their digest."""
+        digest = digest or sha256_file(path)
+        self._insert(path, digest)
+        return digest
+
+    def materialize(self, digest, dest):
+        """Give ``dest`` the bytes of blob ``digest``; returns how (``"unchanged"``, ``"cloned"``, ``"copied"``)."""
+        blob = self.blob(digest)
+        try:
+            # A hard link to the blob (from older builds) is replaced by a file of its own
+            if (not os.path.samefile(blob, dest) and os.path.getsize(blob) == os.path.getsize(dest)
+                    and sha256_file(dest) == digest):
+                return "unchanged"
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp = f"{dest}.{os.getpid()}.tmp"
+        how = copy_file(blob, tmp)
+        os.replace(tmp, dest)
+        return how
+
+    def capture(self, dest, write):
+        """Call ``write(path)`` on a scratch file, store the result and materialize it at ``dest``.
+
+        Returns ``(what write returned, digest, how dest was materialized)``.
+        """
+        os.makedirs(self.scratch, exist_ok=True)
+        fd, scratch = tempfile.mkstemp(dir=self.scratch, suffix=os.path.splitext(dest)[1])
+        os.close(fd)
+        try:
+            result = write(scratch)
+            digest = sha256_file(scratch)
+            self._insert(scratch, digest, move=True)
+            return result, digest, self.materialize(digest, dest)
+        finally:
+            if os.path.exists(scratch):
+                os.remove(scratch)
+
+    def digests(self):
+        """``(digest, path)`` of every blob."""
+        if not os.path.isdir(self.blobs):
+            return
+        for prefix in sorted(os.listdir(self.blobs)):
+            folder = os.path.join(self.blobs, prefix)
+            for name in sorted(os.listdir(folder)):
+                if not name.endswith(".tmp"):
+                    yield prefix + name, os.path.join(folder, name)
+
+    def gc(self, keep=(), verify=False, dry_run=False):
+        """Delete the blobs that are not in ``keep`` (and corrupt ones under ``verify``).
+
+        Returns ``(digest, bytes, reason)`` for every blob removed.
+        """
+        keep = set(keep)
+        removed = []
+        for digest, path in list(self.digests()):
+            if verify and sha256_file(path) != digest:
+                reason = "corrupt"
+            elif digest in keep:
+                continue
+            else:
+                reason = "unreferenced"
+            removed.append((digest, os.path.getsize(path), reason))
+            if not dry_run:
+                os.remove(path)
+        if not dry_run:
+            if os.path.isdir(self.scratch):
+                shutil.rmtree(self.scratch)
+            for prefix in os.listdir(self.blobs) if os.path.isdir(self.blobs) else ():
+                folder = os.path.join(self.blobs, prefix)
+                if not os.listdir(folder):
+                    os.rmdir(folder)
+        return removed
+
+
+def main(argv=None):
+    from .build import MANIFEST_NAME, load_manifest
+
+    parser = argparse.ArgumentParser(description="Delete unreferenced blobs from the diagram asset store.")
+    parser.add_argument("--dry-run", action="store_true", help="list what would be removed")
+    parser.add_argument("--verify", action="store_true", help="also re-hash every blob and drop corrupt ones")
+    args = parser.parse_args(argv)
+    manifest = load_manifest(os.path.join(CLOG_DIR, MANIFEST_NAME))
+    keep = set(manifest.get("store", {}).values())
+    removed = Store().gc(keep, verify=args.verify, dry_run=args.dry_run)
+    for digest, size, reason in removed:
+        print(f"{'would remove' if args.dry_run else 'removed'} {digest[:12]} ({size:,} bytes, {reason})")
+    total = sum(size for _, size, _ in removed)
+    print(f"{len(removed)} blob(s), {total:,} bytes {'reclaimable' if args.dry_run else 'reclaimed'}")
+    return 0
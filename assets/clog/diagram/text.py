@@ -0,0 +1,146 @@
+"""Text measurement from built-in glyph-advance tables.
+
+Generated SVGs are measured without a font engine: each family the
+figures use has a table of advance widths for printable ASCII in
+thousandths of an em (monospace is 600 throughout; Computer Modern follows
+the cmr10 metrics; Inter is approximated from its regular weight).
+Characters outside a table use the family's average advance, and bold
+text is widened by a per-family factor. ``text_width`` is memoised with an
+LRU cache keyed on ``(font, size, text, bold)``, so sizing every node of a
+50k-node graph mostly costs dictionary hits.
+
+``autosize`` uses it to give nodes declared with ``"w": "auto"`` (or all
+unsized nodes when the spec sets ``"autosize": true``) a box that fits
+their label and sub-label; ``overflows`` lists the nodes whose text does
+not fit their box.
+"""
+
+from functools import lru_cache
+
+ASCII = "".join(chr(c) for c in range(32, 127))
+
+
+class Advances(dict):
+    """Advance table; unknown characters fall back to ``average``."""
+
+    def __init__(self, widths, average):
+        super().__init__(zip(ASCII, widths, strict=True))
+        self.average = average
+
+    def __missing__(self, char):
+        return self.average
+
+
+# Advances for " " through "~" in ASCII order.
+FONTS = {
+    "monospace": Advances([600] * len(ASCII), 600),
+    "computer-modern": Advances([
+        333, 278, 500, 833, 500, 833, 778, 278, 389, 389, 500, 778, 278, 333, 278, 500,
+        500, 500, 500, 500, 500, 500, 500, 500, 500, 500, 278, 278, 278, 778, 472, 472,
+        778, 750, 708, 722, 764, 681, 653, 785, 750, 361, 514, 778, 625, 917, 750, 778,
+        681, 778, 736, 556, 722, 750, 750, 1028, 750, 750, 611, 278, 500, 278, 500, 278,
+        278, 500, 556, 444, 556, 444, 306, 500, 556, 278, 306, 528, 278, 833, 556, 500,
+        556, 528, 392, 394, 389, 556, 528, 722, 528, 528, 444, 500, 278, 500, 500,
+    ], 520),
+    "inter": Advances([
+        281, 292, 410, 640, 615, 858, 662, 226, 354, 354, 469, 620, 260, 417, 260, 355,
+        625, 444, 583, 608, 620, 597, 612, 540, 610, 612, 260, 260, 620, 620, 620, 500,
+        982, 676, 654, 721, 721, 589, 571, 739, 741, 264, 547, 651, 543, 901, 741, 761,
+        631, 761, 636, 631, 623, 731, 676, 975, 664, 650, 624, 354, 355, 354, 470, 490,
+        346, 555, 596, 547, 596, 570, 345, 596, 578, 244, 244, 529, 244, 862, 578, 584,
+        596, 596, 368, 519, 350, 578, 534, 787, 522, 534, 531, 354, 279, 354, 620,
+    ], 560),
+}
+# Bold widening per family (monospace keeps its cell width).
+BOLD = {"monospace": 1.0, "computer-modern": 1.09, "inter": 1.06}
+DEFAULT_FONT = "inter"
+
+# Substrings of a CSS family name and the table that measures it.
+FAMILY_HINTS = (
+    ("courier", "monospace"), ("mono", "monospace"),
+    ("computer modern", "computer-modern"), ("cmu", "computer-modern"), ("latin modern", "computer-modern"),
+    ("inter", "inter"), ("segoe", "inter"), ("helvetica", "inter"), ("arial", "inter"),
+    ("sans-serif", "inter"), ("serif", "computer-modern"),
+)
+
+# Inner padding of auto-sized boxes, per side.
+PAD_X = 16
+PAD_Y = 12
+
+
+@lru_cache(maxsize=256)
+def resolve_font(family):
+    """Table key for a CSS ``font-family`` list (the first recognised family wins)."""
+    for name in (family or "").lower().split(","):
+        name = name.strip().strip("'\"")
+        for hint, key in FAMILY_HINTS:
+            if hint in name:
+                return key
+    return DEFAULT_FONT
+
+
+@lru_cache(maxsize=1 << 16)
+def text_width(font, size, text, bold=False):
+    """Advance width of ``text`` in user units; ``font`` is a ``FONTS`` key."""
+    table = FONTS[font]
+    width = sum(map(table.__getitem__, text)) * size / 1000
+    return width * BOLD[font] if bold else width
+
+
+def measure(family, size, text, bold=False, letter_spacing=0):
+    if not text:
+        return 0.0
+    width = text_width(resolve_font(family), size, text, bold)
+    return width + letter_spacing * (len(text) - 1)
+
+
+def label_text(node, style):
+    return node.label.upper() if style.get("label_case") == "upper" else node.label
+
+
+def text_extent(spec, node, style):
+    """``(label width, sub width, label font)`` of ``node`` drawn with ``style``."""
+    body_font = spec.canvas.get("font")
+    if style["shape"] == "card":
+        label_font = "monospace"
+        label = measure(label_font, style["label_size"], node.label, bold=True)
+    else:
+        label_font = body_font
+        label = measure(body_font, style["label_size"], label_text(node, style), bold=True,
+                        letter_spacing=style.get("letter_spacing") or 0)
+    sub = measure(body_font, style["sub_size"], node.sub)
+    return label, sub, label_font
+
+
+def fitted_width(spec, node, style):
+    label, sub, _ = text_extent(spec, node, style)
+    if style["shape"] == "card":
+        # Card labels start at label_x next to the header dot; subs are centred
+        return max(style["label_x"] + label + PAD_X, sub + 2 * PAD_X)
+    return max(label, sub) + 2 * PAD_X
+
+
+def fitted_height(node, style):
+    lowest = style["sub_y"] if node.sub else style["label_y"]
+    size = style["sub_size"] if node.sub else style["label_size"]
+    return lowest + size / 3 + PAD_Y
+
+
+def autosize(spec, nodes, styles):
+    """Size ``nodes`` with ``"auto"`` dimensions (or every unsized one under ``spec.autosize``)."""
+    for node, style in zip(nodes, styles, strict=True):
+        if node.w == "auto" or (spec.autosize and not node.w):
+            node.w = round(fitted_width(spec, node, style))
+        if node.h == "auto" or (spec.autosize and not node.h):
+            node.h = round(fitted_height(node, style))
+
+
+def overflows(spec, nodes, styles):
+    """``(node id, needed width, box width)`` for ``nodes`` whose text is wider than their box."""
+    found = []
+    for node, style in zip(nodes, styles, strict=True):
+        if node.w and not isinstance(node.w, str):
+            needed = fitted_width(spec, node, style) - 2 * PAD_X + 4
+            if needed > node.w:
+                found.append((node.id, round(needed), node.w))
+    return found
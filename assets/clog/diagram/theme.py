@@ -0,0 +1,87 @@
+"""Compile themes and node/edge styles into one embedded stylesheet.
+
+Colours never appear inline on drawn elements. Every colour token becomes
+a CSS custom property on the root ``<svg>`` (``--line: #94a3b8``), and
+elements carry classes (``node node--loop``, ``edge edge--cycle``) whose
+rules are compiled once per type from the spec's styles. A light/dark
+variant therefore only changes the custom-property block, not the
+document body. The stylesheet is embedded in each file because
+``<img>``-embedded SVGs cannot load external CSS.
+"""
+
+import re
+
+from .writer import fmt_num
+
+CLASS_SAFE = re.compile(r"[^A-Za-z0-9_-]")
+
+
+def class_name(value):
+    return CLASS_SAFE.sub("_", str(value))
+
+
+def palette(spec, variant=None):
+    """Resolved colour tokens for ``variant`` (``None`` is the theme's base)."""
+    colors = dict(spec.theme["colors"])
+    if variant is not None:
+        variants = spec.theme.get("variants", {})
+        if variant not in variants:
+            raise KeyError(f"theme {spec.theme.get('name')!r} has no variant {variant!r}")
+        colors.update(variants[variant])
+    colors.update(spec.color_overrides)
+    return colors
+
+
+def css_value(spec, value):
+    """CSS for a style value: colour tokens become ``var(--token)``."""
+    if isinstance(value, str):
+        if value in spec.colors:
+            return f"var(--{value})"
+        if value.startswith("url(#"):
+            return spec.ref(value[5:-1])
+        return value
+    return fmt_num(value)
+
+
+class Stylesheet:
+    """Ordered CSS rules; selectors with identical declarations share one rule."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.blocks = {}
+
+    def add(self, selector, **decls):
+        body = ";".join(f"{key.replace('_', '-')}:{css_value(self.spec, value)}"
+                        for key, value in decls.items() if value is not None)
+        if body:
+            selectors = self.blocks.setdefault(body, [])
+            if selector not in selectors:
+                selectors.append(selector)
+
+    def variables(self, variant=None):
+        colors = palette(self.spec, variant)
+        return "svg{" + ";".join(f"--{k}:{v}" for k, v in colors.items()) + "}"
+
+    def css(self, variant=None):
+        rules = "".join(f"{','.join(sel)}{{{body}}}" for body, sel in self.blocks.items())
+        return self.variables(variant) + rules
+
+
+def paint(spec, **props):
+    """Attributes for colour properties of one-off elements (decorations, defs).
+
+    Tokens are emitted as ``style="fill:var(--token)"`` so they follow the
+    active variant; literal colours stay plain attributes.
+    """
+    attrs = {}
+    inline = []
+    for key, value in props.items():
+        if value is None:
+            continue
+        if isinstance(value, str) and value in spec.colors:
+            inline.append(f"{key.replace('_', '-')}:var(--{value})")
+        else:
+            attrs[key] = spec.color(value)
+    if inline:
+        attrs["style"] = ";".join(inline)
+    return attrs
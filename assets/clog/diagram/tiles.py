@@ -0,0 +1,298 @@
+"""Tiled output with a lazy-loading HTML viewer for very large diagrams.
+
+The laid-out canvas is cut into fixed-size square tiles. Every element is
+drawn once into a fragment, its bounding box is computed, and it is added
+to each tile the box touches; a tile is a standalone SVG (stylesheet and
+defs included) whose ``viewBox`` is the tile's window onto the canvas, so
+elements crossing a tile edge are clipped there and continued in the
+neighbour. Tile files are named by a hash of their content and only
+rewritten when it changes, so they can be cached indefinitely.
+
+``tiles.json`` indexes the non-empty tiles; ``index.html`` is a
+dependency-free viewer that fetches the index and keeps ``<img>`` elements
+only for the tiles intersecting the viewport as the user pans (drag or
+scroll) and zooms (buttons or Ctrl+wheel). What a page load costs depends
+on the viewport, not on the size of the diagram.
+
+    python assets/clog/tile_diagram.py run.jsonl --out /tmp/run-tiles --tile 1024
+"""
+
+import argparse
+import hashlib
+import html
+import io
+import json
+import math
+import os
+import re
+
+from .defs import draw_defs, resolve_defs
+from .lod import load_source
+from .optimize import Minifier, optimize_options
+from .render import compile_stylesheet, draw_item, edge_paths, node_style, paint_order, prepare, root_attrs
+from .route import Router
+from .spec import SpecError
+from .writer import SvgWriter
+
+TILE_SIZE = 1024
+# Slack around element boxes for glows, halos, markers and stroke width.
+PAD = 24
+NUMBER = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:e-?\d+)?")
+PATH_DATA = re.compile(r'\sd="([^"]*)"')
+INDEX_VERSION = 1
+
+
+def _num(item, key, default=0.0):
+    try:
+        return float(item.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def primitive_bbox(item):
+    """``(x0, y0, x1, y1)`` of a decoration primitive (text width is estimated)."""
+    tag = item["tag"]
+    if tag == "line":
+        xs, ys = (_num(item, "x1"), _num(item, "x2")), (_num(item, "y1"), _num(item, "y2"))
+        return min(xs), min(ys), max(xs), max(ys)
+    if tag == "circle":
+        cx, cy, r = _num(item, "cx"), _num(item, "cy"), _num(item, "r")
+        return cx - r, cy - r, cx + r, cy + r
+    if tag == "text":
+        size = _num(item, "font-size", 14)
+        width = len(str(item.get("text", ""))) * size * 0.6
+        x, y = _num(item, "x"), _num(item, "y")
+        anchor = item.get("text-anchor", "start")
+        x0 = x - width / 2 if anchor == "middle" else x - width if anchor == "end" else x
+        return x0, y - size, x0 + width, y + size / 3
+    coords = item.get("d") or item.get("points")
+    if coords:
+        nums = [float(n) for n in NUMBER.findall(str(coords))]
+        return min(nums[0::2]), min(nums[1::2]), max(nums[0::2]), max(nums[1::2])
+    x, y = _num(item, "x"), _num(item, "y")
+    return x, y, x + _num(item, "width"), y + _num(item, "height")
+
+
+def fragment_bbox(kind, item, markup):
+    if kind == "node":
+        return item.x, item.y, item.x + item.w, item.y + item.h
+    if kind == "edge":
+        # The control polygon contains the curve
+        nums = [float(n) for n in NUMBER.findall(" ".join(PATH_DATA.findall(markup)))]
+        return min(nums[0::2]), min(nums[1::2]), max(nums[0::2]), max(nums[1::2])
+    return primitive_bbox(item)
+
+
+class TileSet:
+    """Cuts one spec into tiles; ``write()`` produces the tiles, index and viewer."""
+
+    def __init__(self, spec, out_dir, tile=TILE_SIZE, optimize=None):
+        self.spec = prepare(spec)
+        self.out_dir = out_dir
+        self.tile = tile
+        # Shared <symbol> chrome would tie tiles together; every tile stands alone
+        self.options = dict(optimize_options(spec, optimize), symbols=False)
+        self.cols = max(1, math.ceil(spec.canvas["width"] / tile))
+        self.rows = max(1, math.ceil(spec.canvas["height"] / tile))
+
+    def _fragments(self):
+        """``(markup, bbox)`` for every body element, back to front."""
+        spec = self.spec
+        graph = spec.graph
+        router = Router(graph, **spec.router) if spec.router is not None else None
+        paths = edge_paths(spec, router)
+        styles = [node_style(spec, node) for node in graph.nodes]
+        self.sheet = compile_stylesheet(spec, graph.nodes, styles)
+        self.defs = resolve_defs(spec, halos=self.options["halos"])
+        minify = Minifier(self.options["precision"]) if self.options["minify"] else None
+        for kind, item, style in paint_order(spec, styles):
+            buf = io.StringIO()
+            draw_item(SvgWriter.fragment(buf, transform=minify), spec, kind, item, style, paths)
+            markup = buf.getvalue()
+            yield markup, fragment_bbox(kind, item, markup)
+
+    def _bucket(self):
+        buckets = {}
+        fragments = []
+        t = self.tile
+        for markup, (x0, y0, x1, y1) in self._fragments():
+            index = len(fragments)
+            fragments.append(markup)
+            c0, c1 = max(0, int((x0 - PAD) // t)), min(self.cols - 1, int((x1 + PAD) // t))
+            r0, r1 = max(0, int((y0 - PAD) // t)), min(self.rows - 1, int((y1 + PAD) // t))
+            for r in range(r0, r1 + 1):
+                for c in range(c0, c1 + 1):
+                    buckets.setdefault((c, r), []).append(index)
+        return fragments, buckets
+
+    def _tile_svg(self, col, row, body):
+        spec, t = self.spec, self.tile
+        buf = io.StringIO()
+        minify = Minifier(self.options["precision"]) if self.options["minify"] else None
+        # The viewBox is the tile's window onto the canvas
+        with SvgWriter(buf, t, t, transform=minify, viewBox=f"{col * t} {row * t} {t} {t}",
+                       **root_attrs(spec)) as svg:
+            with svg.group("defs"):
+                svg.element("style", self.sheet.css())
+                draw_defs(svg, spec, self.defs)
+            svg.raw(body)
+        return buf.getvalue()
+
+    def write(self):
+        """Write tiles, ``tiles.json`` and ``index.html``; returns the index."""
+        tiles_dir = os.path.join(self.out_dir, "tiles")
+        os.makedirs(tiles_dir, exist_ok=True)
+        fragments, buckets = self._bucket()
+        entries = {}
+        keep = set()
+        for (col, row), members in sorted(buckets.items()):
+            svg = self._tile_svg(col, row, "".join(fragments[i] for i in members))
+            data = svg.encode()
+            name = f"{col}-{row}.{hashlib.sha256(data).hexdigest()[:12]}.svg"
+            path = os.path.join(tiles_dir, name)
+            if not os.path.exists(path):
+                tmp = f"{path}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            keep.add(name)
+            entries[f"{col},{row}"] = {"file": f"tiles/{name}", "elements": len(members), "bytes": len(data)}
+        for stale in set(os.listdir(tiles_dir)) - keep:
+            os.unlink(os.path.join(tiles_dir, stale))
+        index = {"version": INDEX_VERSION, "name": self.spec.name, "tile": self.tile,
+                 "width": self.spec.canvas["width"], "height": self.spec.canvas["height"],
+                 "cols": self.cols, "rows": self.rows, "tiles": entries}
+        _write_text(os.path.join(self.out_dir, "tiles.json"), json.dumps(index, separators=(",", ":")))
+        _write_text(os.path.join(self.out_dir, "index.html"), VIEWER.replace("{{title}}", html.escape(self.spec.name)))
+        return index
+
+
+def _write_text(path, text):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+VIEWER = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{{title}}</title>
+<style>
+  html, body { margin: 0; height: 100%; background: #0b1020; color: #e0e6ed; font: 13px sans-serif; }
+  #view { position: absolute; inset: 0; overflow: auto; cursor: grab; }
+  #view.drag { cursor: grabbing; }
+  #stage { position: relative; }
+  #stage img { position: absolute; user-select: none; -webkit-user-drag: none; }
+  #bar { position: fixed; top: 8px; right: 8px; z-index: 1; display: flex; gap: 4px; align-items: center; }
+  #bar button { width: 28px; height: 28px; }
+</style>
+</head>
+<body>
+<div id="view"><div id="stage"></div></div>
+<div id="bar"><button id="out">&minus;</button><span id="zoom">100%</span><button id="in">+</button></div>
+<script>
+(async function () {
+  const index = await (await fetch("tiles.json")).json();
+  const view = document.getElementById("view"), stage = document.getElementById("stage");
+  const shown = new Map();
+  let zoom = 1;
+
+  function layout() {
+    stage.style.width = index.width * zoom + "px";
+    stage.style.height = index.height * zoom + "px";
+    document.getElementById("zoom").textContent = Math.round(zoom * 100) + "%";
+    for (const [key, img] of shown) place(img, key);
+    update();
+  }
+
+  function place(img, key) {
+    const [c, r] = key.split(",").map(Number), size = index.tile * zoom;
+    img.style.left = c * size + "px";
+    img.style.top = r * size + "px";
+    img.style.width = img.style.height = size + "px";
+  }
+
+  function update() {
+    // Tiles intersecting the viewport plus a one-tile margin
+    const size = index.tile * zoom;
+    const c0 = Math.max(0, Math.floor(view.scrollLeft / size) - 1);
+    const r0 = Math.max(0, Math.floor(view.scrollTop / size) - 1);
+    const c1 = Math.min(index.cols - 1, Math.floor((view.scrollLeft + view.clientWidth) / size) + 1);
+    const r1 = Math.min(index.rows - 1, Math.floor((view.scrollTop + view.clientHeight) / size) + 1);
+    const wanted = new Set();
+    for (let r = r0; r <= r1; r++) {
+      for (let c = c0; c <= c1; c++) {
+        const key = c + "," + r;
+        if (!index.tiles[key]) continue;
+        wanted.add(key);
+        if (!shown.has(key)) {
+          const img = new Image();
+          img.decoding = "async";
+          img.src = index.tiles[key].file;
+          place(img, key);
+          stage.appendChild(img);
+          shown.set(key, img);
+        }
+      }
+    }
+    for (const [key, img] of shown) {
+      if (!wanted.has(key)) { img.remove(); shown.delete(key); }
+    }
+  }
+
+  function setZoom(next, cx, cy) {
+    next = Math.min(4, Math.max(0.05, next));
+    const x = (view.scrollLeft + cx) / zoom, y = (view.scrollTop + cy) / zoom;
+    zoom = next;
+    layout();
+    view.scrollLeft = x * zoom - cx;
+    view.scrollTop = y * zoom - cy;
+  }
+
+  view.addEventListener("scroll", update, { passive: true });
+  window.addEventListener("resize", update);
+  view.addEventListener("wheel", (e) => {
+    if (!e.ctrlKey) return;
+    e.preventDefault();
+    setZoom(zoom * (e.deltaY < 0 ? 1.2 : 1 / 1.2), e.clientX, e.clientY);
+  }, { passive: false });
+  document.getElementById("in").onclick = () => setZoom(zoom * 1.5, view.clientWidth / 2, view.clientHeight / 2);
+  document.getElementById("out").onclick = () => setZoom(zoom / 1.5, view.clientWidth / 2, view.clientHeight / 2);
+
+  let drag = null;
+  view.addEventListener("pointerdown", (e) => {
+    drag = { x: e.clientX, y: e.clientY, left: view.scrollLeft, top: view.scrollTop };
+    view.classList.add("drag");
+  });
+  window.addEventListener("pointermove", (e) => {
+    if (!drag) return;
+    view.scrollLeft = drag.left - (e.clientX - drag.x);
+    view.scrollTop = drag.top - (e.clientY - drag.y);
+  });
+  window.addEventListener("pointerup", () => { drag = null; view.classList.remove("drag"); });
+
+  layout();
+})();
+</script>
+</body>
+</html>
+"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cut a diagram into SVG tiles with a lazy-loading viewer.")
+    parser.add_argument("source", help="spec (.json) or trace (.jsonl, .jsonl.gz)")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--tile", type=int, default=TILE_SIZE, help="tile edge in canvas pixels")
+    args = parser.parse_args(argv)
+    try:
+        index = TileSet(load_source(args.source), args.out, tile=args.tile).write()
+    except SpecError as exc:
+        parser.exit(1, f"{args.source}: {exc}\n")
+    total = sum(entry["bytes"] for entry in index["tiles"].values())
+    print(f"Generated {len(index['tiles'])} of {index['cols'] * index['rows']} tiles ({total:,} bytes) "
+          f"in {args.out}")
+    return 0
@@ -0,0 +1,123 @@
+"""Per-phase timing of diagram builds.
+
+A ``Timer`` records wall-clock spans of the pipeline phases of one
+diagram::
+
+    parse      reading and compiling the spec
+    layout     autosizing and automatic layout (``render.prepare``)
+    route      edge paths and node styles
+    serialize  the document body (inside ``write``; kept when outputs share it)
+    write      root element, defs and stylesheet, and the file itself
+
+Spans carry the process id, so phases run in worker processes (variants,
+parallel builds) are sent back and merged. ``timing_report`` sums them
+per diagram and phase; ``chrome_trace`` lays them out in the Chrome trace
+event format, which ``chrome://tracing``, Perfetto and speedscope show as a
+flamegraph::
+
+    python assets/clog/build_diagrams.py --timings timings.json --trace trace.json
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+PHASES = ("parse", "layout", "route", "serialize", "write")
+
+
+class Timer:
+    """Spans ``(phase, start, end, pid, args)`` of one diagram; times from ``time.perf_counter``."""
+
+    def __init__(self, name=None):
+        self.name = name
+        self.spans = []
+
+    @contextmanager
+    def phase(self, phase, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((phase, start, time.perf_counter(), os.getpid(), args))
+
+    def merge(self, spans):
+        """Add spans recorded by a copy of this timer (e.g. in a worker process)."""
+        self.spans.extend(spans)
+
+    def totals(self):
+        """Milliseconds spent in each phase (phases that never ran are 0).
+
+        A span nested in another (``serialize`` within ``write``) is not
+        also counted in the outer phase.
+        """
+        totals = dict.fromkeys(PHASES, 0.0)
+        open_spans = {}  # pid -> spans enclosing the current one
+        for phase, start, end, pid, _ in sorted(self.spans, key=lambda s: (s[3], s[1], -s[2])):
+            stack = open_spans.setdefault(pid, [])
+            while stack and stack[-1][1] <= start:
+                stack.pop()
+            ms = (end - start) * 1000
+            totals[phase] = totals.get(phase, 0.0) + ms
+            if stack:
+                totals[stack[-1][0]] -= ms
+            stack.append((phase, end))
+        return totals
+
+
+class NullTimer:
+    """A ``Timer`` that records nothing, for renders nobody is timing."""
+
+    name = None
+    spans = ()
+
+    def phase(self, phase, **args):
+        return nullcontext()
+
+    def merge(self, spans):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+def timing_report(timers, elapsed=None):
+    """JSON-ready totals: milliseconds per phase of each diagram, slowest first."""
+    diagrams = {}
+    for timer in timers:
+        totals = {phase: round(ms, 3) for phase, ms in timer.totals().items()}
+        totals["total"] = round(sum(totals.values()), 3)
+        diagrams[timer.name] = totals
+    order = sorted(diagrams, key=lambda name: -diagrams[name]["total"])
+    report = {"phases": list(PHASES), "diagrams": {name: diagrams[name] for name in order}}
+    if elapsed is not None:
+        report["elapsed_ms"] = round(elapsed * 1000, 3)
+    return report
+
+
+def chrome_trace(timers):
+    """Trace-event document of every span: one row per diagram, one lane per process."""
+    spans = [(tid, timer.name, span) for tid, timer in enumerate(timers, 1) for span in timer.spans]
+    origin = min((span[1] for _, _, span in spans), default=0.0)
+    events = []
+    lanes = set()
+    for tid, name, (phase, start, end, pid, args) in spans:
+        if (pid, tid) not in lanes:
+            lanes.add((pid, tid))
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+        events.append({"name": phase, "cat": "diagram", "ph": "X", "pid": pid, "tid": tid,
+                       "ts": round((start - origin) * 1e6, 1), "dur": round((end - start) * 1e6, 1),
+                       "args": dict(args, diagram=name)})
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def format_timings(totals):
+    return ", ".join(f"{phase} {totals.get(phase, 0.0):.1f}" for phase in PHASES) + " ms"
+
+
+def write_json(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+        f.write("\n")
+    os.replace(tmp, path)
@@ -0,0 +1,153 @@
+"""Build a context DAG from a JSONL execution trace.
+
+A trace has one JSON event per line, in the order the orchestrator emitted
+them::
+
+    {"event": "node", "id": "n1", "type": "CTXB", "label": "CTXB-01", "sub": "User Segment A"}
+    {"event": "edge", "source": "n0", "target": "n1"}
+
+Node types are the context-DAG kinds (``root``/``idea``/``reason``/``fact``)
+or their protocol names (``ROOT``/``CTXB``/``RSN``/``FACT``); the graph is
+drawn with the styling of ``specs/context_dag.json`` and laid out
+automatically. Lines are parsed one at a time from a generator, so the
+trace itself is never held in memory; only a compact tuple per retained
+node and edge is. ``max_nodes`` bounds that too: once it is reached the
+oldest nodes (and their edges) are evicted, so the result is the most
+recent window of the run. The command line keeps ``DEFAULT_MAX_NODES``
+unless told otherwise (``--max-nodes 0`` keeps everything). Files ending
+in ``.gz`` are read compressed.
+
+    python assets/clog/render_trace.py run.jsonl -o docs/run-dag.svg --max-nodes 5000
+"""
+
+import argparse
+import gzip
+import io
+import json
+import sys
+from collections import OrderedDict
+
+from .render import render
+from .spec import SpecError, compile_spec, spec_template
+
+TYPE_ALIASES = {"root": "root", "ctxb": "idea", "idea": "idea", "rsn": "reason", "reason": "reason",
+                "fact": "fact"}
+LABEL_PREFIX = {"root": "ROOT", "idea": "CTXB", "reason": "RSN", "fact": "FACT"}
+DEFAULT_MAX_NODES = 5000
+
+
+class TraceError(SpecError):
+    """Raised for a malformed trace line or event."""
+
+
+def read_events(source):
+    """Yield one event dict per non-blank line of ``source`` (path, ``"-"`` or stream)."""
+    if hasattr(source, "read"):
+        stream, close = source, False
+    elif source == "-":
+        stream, close = sys.stdin, False
+    elif str(source).endswith(".gz"):
+        stream, close = io.TextIOWrapper(gzip.open(source), encoding="utf-8"), True
+    else:
+        stream, close = open(source, encoding="utf-8"), True
+    try:
+        for lineno, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise TraceError(f"line {lineno}: {exc.msg}") from None
+            if not isinstance(event, dict):
+                raise TraceError(f"line {lineno}: expected a JSON object")
+            yield event
+    finally:
+        if close:
+            stream.close()
+
+
+class TraceGraph:
+    """Incrementally built context DAG with an optional node budget."""
+
+    def __init__(self, max_nodes=None):
+        self.max_nodes = max_nodes
+        self.nodes = OrderedDict()  # id -> (type, label, sub)
+        self.out_edges = {}  # id -> [target, ...]
+        self.counts = {"nodes": 0, "edges": 0, "evicted": 0, "ignored": 0}
+        self.kind_counts = dict.fromkeys(LABEL_PREFIX, 0)  # numbers auto labels per kind
+
+    def add_node(self, node_id, type="idea", label=None, sub=""):
+        kind = TYPE_ALIASES.get(str(type).lower())
+        if kind is None:
+            raise TraceError(f"node {node_id!r} has unknown type {type!r}")
+        if node_id in self.nodes:
+            self.nodes[node_id] = (kind, label or self.nodes[node_id][1], sub or self.nodes[node_id][2])
+            return
+        self.counts["nodes"] += 1
+        self.kind_counts[kind] += 1
+        self.nodes[node_id] = (kind, label or f"{LABEL_PREFIX[kind]}-{self.kind_counts[kind]:02d}", sub)
+        self.out_edges[node_id] = []
+        if self.max_nodes is not None and len(self.nodes) > self.max_nodes:
+            oldest, _ = self.nodes.popitem(last=False)
+            del self.out_edges[oldest]
+            self.counts["evicted"] += 1
+
+    def add_edge(self, source, target):
+        if source not in self.nodes:
+            # Evicted or never declared; edges into the window from outside are dropped
+            self.counts["ignored"] += 1
+            return
+        self.counts["edges"] += 1
+        self.out_edges[source].append(target)
+
+    def ingest(self, events):
+        for event in events:
+            kind = event.get("event")
+            try:
+                if kind == "node":
+                    self.add_node(event["id"], event.get("type", "idea"), event.get("label"), event.get("sub", ""))
+                elif kind == "edge":
+                    self.add_edge(event["source"], event["target"])
+                else:
+                    self.counts["ignored"] += 1
+            except KeyError as exc:
+                raise TraceError(f"{kind} event {event!r} is missing {exc.args[0]!r}") from None
+        return self
+
+    def edges(self):
+        """Retained edges whose endpoints are both still in the window."""
+        nodes = self.nodes
+        for source, targets in self.out_edges.items():
+            for target in targets:
+                if target in nodes and target != source:
+                    yield [source, target]
+
+    def spec_data(self, name="trace_dag", direction="LR"):
+        """A spec mapping in the context-DAG style; nodes and edges are streamed."""
+        data = spec_template("context_dag", name=name, direction=direction)
+        data["nodes"] = ({"id": node_id, "type": kind, "label": label, "sub": sub}
+                         for node_id, (kind, label, sub) in self.nodes.items())
+        data["edges"] = self.edges()
+        return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the context DAG recorded in a JSONL trace.")
+    parser.add_argument("trace", help="JSONL trace ('-' for stdin, .gz accepted)")
+    parser.add_argument("-o", "--output", required=True, help="SVG to write")
+    parser.add_argument("--max-nodes", type=int, default=DEFAULT_MAX_NODES,
+                        help="keep only the most recent N nodes (default: %(default)s; 0 keeps every node, "
+                             "so memory grows with the trace)")
+    parser.add_argument("--direction", choices=("LR", "TB"), default="LR")
+    args = parser.parse_args(argv)
+
+    try:
+        graph = TraceGraph(args.max_nodes or None).ingest(read_events(args.trace))
+        spec = compile_spec(graph.spec_data(direction=args.direction))
+        render(spec, args.output)
+    except SpecError as exc:  # also LayoutError from laying out the graph
+        parser.exit(1, f"{args.trace}: {exc}\n")
+    counts = graph.counts
+    print(f"Generated {args.output}: {len(spec.graph.nodes):,} nodes, {len(spec.graph.edges):,} edges "
+          f"({counts['evicted']:,} evicted, {counts['ignored']:,} ignored events)")
+    return 0
@@ -0,0 +1,205 @@
+"""Several outputs of one spec from a single layout pass.
+
+A spec may list ``variants``: other forms of the same figure, each with
+its own output path and any of
+
+* ``theme`` - a variant of the spec's theme (e.g. ``"light"``);
+* ``crop`` - ``"nodes"`` (the nodes' bounding box plus ``padding``) or an
+  explicit ``[x, y, width, height]``;
+* ``scale`` or ``width`` - explicit pixel size (``width`` keeps the
+  aspect ratio of the cropped view);
+* ``footer`` - ``false`` drops ``"role": "title"`` decorations such as
+  ``FIG 2: CONTEXT STATE DAG TOPOLOGY``;
+* ``optimize`` - overrides of the spec's ``optimize`` section.
+
+::
+
+    "variants": [
+      {"name": "featured", "output": "work/projects/cascade-context-protocol/featured.svg",
+       "crop": "nodes", "width": 600, "footer": false},
+      {"name": "light", "output": "assets/clog/ccp_architecture-light.svg", "theme": "light"}
+    ]
+
+Layout, routing and node styles are computed once (``render.Scene``);
+variants then only differ in serialization and are written in parallel
+worker processes. Where the platform can ``fork`` the workers inherit the
+scene; elsewhere (``spawn``) each one unpickles a copy, which for a
+50k-node scene is about 40 MB and 0.2 s per worker -- still far cheaper
+than laying the graph out again. A document body that several variants
+share is serialized once, in the parent, and spliced into the others; any
+other body is streamed.
+
+    python assets/clog/render_variants.py specs/ccp_architecture.json -j 4
+"""
+
+import argparse
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from .cost import format_cost
+from .paths import find_project_root
+from .render import Scene
+from .spec import SpecError, load_spec
+
+VARIANT_FIELDS = {"name", "output", "theme", "crop", "padding", "scale", "width", "footer", "optimize"}
+
+
+class Variant:
+    """One declared output form of a spec; see the module docstring."""
+
+    def __init__(self, name, output, theme=None, crop=None, padding=20, scale=None, width=None, footer=True,
+                 optimize=None):
+        self.name = name
+        self.output = output
+        self.theme = theme
+        self.crop = crop
+        self.padding = padding
+        self.scale = scale
+        self.width = width
+        self.footer = footer
+        self.optimize = optimize
+
+    def __repr__(self):
+        return f"Variant({self.name!r}, output={self.output!r})"
+
+    def view(self, scene):
+        """The viewBox ``(x, y, width, height)`` of this variant, or ``None`` for the whole canvas."""
+        if self.crop is None:
+            return None
+        if self.crop == "nodes":
+            x0, y0, x1, y1 = scene.bounds()
+            pad = self.padding
+            return x0 - pad, y0 - pad, x1 - x0 + 2 * pad, y1 - y0 + 2 * pad
+        return tuple(self.crop)
+
+    def size(self, scene):
+        """Explicit ``(width, height)`` in pixels, or ``None`` to leave the SVG unsized."""
+        if self.scale is None and self.width is None:
+            return None
+        view = self.view(scene)
+        canvas = scene.spec.canvas
+        w, h = (view[2], view[3]) if view else (canvas["width"], canvas["height"])
+        scale = self.width / w if self.width is not None else self.scale
+        return round(w * scale, 2), round(h * scale, 2)
+
+
+def parse_variants(spec, root=None):
+    """``Variant`` objects for ``spec.variants``, with outputs resolved against the project root."""
+    variants = []
+    names = set()
+    for raw in spec.variants:
+        unknown = set(raw) - VARIANT_FIELDS
+        if unknown:
+            raise SpecError(f"variant {raw.get('name')!r} has unknown fields {sorted(unknown)}")
+        if "name" not in raw or "output" not in raw:
+            raise SpecError(f"variant {raw!r} needs a name and an output")
+        if raw["name"] in names:
+            raise SpecError(f"duplicate variant {raw['name']!r}")
+        names.add(raw["name"])
+        crop = raw.get("crop")
+        if crop is not None and crop != "nodes" and (not isinstance(crop, list) or len(crop) != 4):
+            raise SpecError(f"variant {raw['name']!r} has crop {crop!r} (expected 'nodes' or [x, y, w, h])")
+        if raw.get("theme") is not None and raw["theme"] not in spec.theme.get("variants", {}):
+            raise SpecError(f"variant {raw['name']!r}: theme {spec.theme.get('name')!r} "
+                            f"has no variant {raw['theme']!r}")
+        variant = Variant(**raw)
+        variant.output = os.path.join(root or find_project_root(), raw["output"])
+        variants.append(variant)
+    return variants
+
+
+def variant_options(variant, optimize=None):
+    """The ``optimize`` override for ``variant``: its own section, then the caller's ``optimize``."""
+    if isinstance(optimize, bool):
+        return optimize
+    return {**(variant.optimize or {}), **(optimize or {})}
+
+
+def body_key(scene, variant, optimize=None):
+    """``scene.body_key`` of ``variant``: variants with equal keys share a document body."""
+    return scene.body_key(variant_options(variant, optimize), variant.footer)
+
+
+def write_variant(scene, variant, optimize=None, keep=False):
+    """Write one variant of ``scene``; returns ``(name, path, bytes written, paint cost)``.
+
+    ``keep`` is passed on to ``Scene.write``.
+    """
+    cost = scene.write(variant.output, optimize=variant_options(variant, optimize), variant=variant.theme,
+                       view=variant.view(scene),
+                       size=variant.size(scene), footer=variant.footer, keep=keep)
+    return variant.name, variant.output, os.path.getsize(variant.output), cost
+
+
+# The scene a worker process writes variants of (set by the pool initializer).
+_scene = None
+
+
+def _pool_context():
+    """``fork`` where available, so workers inherit the scene instead of unpickling it."""
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def _init_worker(scene):
+    global _scene
+    _scene = scene
+
+
+def _write_in_worker(variant, optimize):
+    # Phases timed here are returned to the parent's timer with the result
+    start = len(_scene.timer.spans)
+    result = write_variant(_scene, variant, optimize)
+    return result, _scene.timer.spans[start:]
+
+
+def render_variants(scene, variants, optimize=None, jobs=None):
+    """Write every ``variant`` of ``scene``, in up to ``jobs`` processes; returns ``write_variant`` results."""
+    keys = [body_key(scene, variant, optimize) for variant in variants]
+    # Only a body used more than once is worth holding in memory
+    shared = {key for key, count in Counter(keys).items() if count > 1 and key not in scene.bodies}
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(variants)))
+    if jobs == 1:
+        return [write_variant(scene, variant, optimize, keep=key in shared)
+                for variant, key in zip(variants, keys, strict=True)]
+    # The first variant of each shared body is written here, so workers start with the body in the scene
+    results = {}
+    for i, (variant, key) in enumerate(zip(variants, keys, strict=True)):
+        if key in shared and key not in scene.bodies:
+            results[i] = write_variant(scene, variant, optimize, keep=True)
+    rest = [i for i in range(len(variants)) if i not in results]
+    if rest:
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=_pool_context(), initializer=_init_worker,
+                                 initargs=(scene,)) as pool:
+            done = pool.map(_write_in_worker, [variants[i] for i in rest], [optimize] * len(rest))
+            for i, (result, spans) in zip(rest, done, strict=True):
+                results[i] = result
+                scene.timer.merge(spans)
+    return [results[i] for i in range(len(variants))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the variants a spec declares from one layout pass.")
+    parser.add_argument("spec", help="spec (.json) with a 'variants' section")
+    parser.add_argument("--only", action="append", default=[], metavar="NAME",
+                        help="render just this variant (repeatable)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+    try:
+        spec = load_spec(args.spec)
+        variants = parse_variants(spec)
+        missing = set(args.only) - {v.name for v in variants}
+        if missing:
+            raise SpecError(f"unknown variant(s) {', '.join(sorted(missing))}")
+        variants = [v for v in variants if not args.only or v.name in args.only]
+        if not variants:
+            raise SpecError("spec declares no variants")
+        scene = Scene(spec)
+    except SpecError as exc:
+        parser.exit(1, f"{args.spec}: {exc}\n")
+    for name, path, size, cost in render_variants(scene, variants, jobs=args.jobs):
+        print(f"Generated {path} ({name}): {size:,} bytes; paint: {format_cost(cost)}")
+    return 0
@@ -0,0 +1,174 @@
+"""Streaming SVG emitter.
+
+Elements are written to the underlying stream as soon as they are produced,
+so building a diagram never holds more than one element in memory and never
+re-copies the document the way repeated ``svg += ...`` does.
+"""
+
+import io
+import os
+import tempfile
+from contextlib import contextmanager
+from xml.sax.saxutils import escape, quoteattr
+
+SVG_NS = "http://www.w3.org/2000/svg"
+
+# Default write buffer for file targets (large diagrams flush in big chunks).
+BUFFER_SIZE = 1 << 16
+
+
+def fmt_num(value):
+    """Format a coordinate: integral floats lose their trailing ``.0``."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def attr_name(key):
+    """Map a Python keyword to an SVG attribute (``stroke_width`` -> ``stroke-width``)."""
+    if key.endswith("_"):
+        key = key[:-1]
+    return key.replace("_", "-")
+
+
+def format_attrs(attrs):
+    parts = []
+    for key, value in attrs.items():
+        if value is None:
+            continue
+        if isinstance(value, (int, float)):
+            value = fmt_num(value)
+        parts.append(f" {attr_name(key)}={quoteattr(str(value))}")
+    return "".join(parts)
+
+
+class SvgWriter:
+    """Write an SVG document element by element to a path or text stream.
+
+    ``target`` is either a filesystem path or any object with a ``write``
+    method, which is left open for the caller. Paths are written through a
+    buffered temporary file in the same directory that is renamed over the
+    target only once the document is complete, so readers never observe a
+    partial SVG. ``transform`` (e.g. ``optimize.Minifier``) is applied to
+    every chunk before it is written.
+
+        with SvgWriter("out.svg", width=800, height=500) as svg:
+            with svg.group(transform="translate(10, 10)"):
+                svg.element("rect", width=40, height=20)
+    """
+
+    def __init__(self, target, width, height, buffer_size=BUFFER_SIZE, transform=None, **root_attrs):
+        self.target = target
+        self.transform = transform
+        self.width = width
+        self.height = height
+        self.buffer_size = buffer_size
+        self.root_attrs = root_attrs
+        self._stream = None
+        self._tmp_path = None
+        self._stack = []
+        self._write = None
+
+    # --- Document lifecycle ---
+
+    def __enter__(self):
+        if hasattr(self.target, "write"):
+            self._stream = self.target
+        else:
+            path = os.path.abspath(os.fspath(self.target))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, self._tmp_path = tempfile.mkstemp(prefix=".", suffix=".svg.tmp", dir=os.path.dirname(path))
+            self._stream = open(fd, "w", encoding="utf-8", buffering=self.buffer_size)
+        if self.transform is None:
+            self._write = self._stream.write
+        else:
+            write, transform = self._stream.write, self.transform
+            self._write = lambda chunk: write(transform(chunk))
+        attrs = {"xmlns": SVG_NS, "viewBox": f"0 0 {fmt_num(self.width)} {fmt_num(self.height)}"}
+        attrs.update(self.root_attrs)
+        self._write(f"<svg{format_attrs(attrs)}>\n")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                while self._stack:
+                    self.close()
+                self._write("</svg>\n")
+        finally:
+            if self._tmp_path is not None:
+                self._stream.close()
+                if exc_type is None:
+                    os.chmod(self._tmp_path, 0o644)
+                    os.replace(self._tmp_path, self.target)
+                else:
+                    os.unlink(self._tmp_path)
+                self._tmp_path = None
+            self._stream = None
+            self._write = None
+        return False
+
+    @classmethod
+    def fragment(cls, stream, transform=None):
+        """Writer for bare elements with no ``<svg>`` root (e.g. a patch to splice into a document)."""
+        svg = cls(stream, 0, 0, transform=transform)
+        svg._stream = stream
+        svg._write = stream.write if transform is None else (lambda chunk: stream.write(transform(chunk)))
+        return svg
+
+    # --- Emission ---
+
+    def raw(self, markup):
+        """Write pre-formatted markup verbatim."""
+        self._write(markup)
+
+    def splice(self, markup):
+        """Write markup that has already been through ``transform`` (e.g. from a ``fragment``)."""
+        self._stream.write(markup)
+
+    def element(self, tag, text=None, **attrs):
+        """Write a complete element; ``text`` (escaped) becomes its content."""
+        if text is None:
+            self._write(f"<{tag}{format_attrs(attrs)}/>\n")
+        else:
+            self._write(f"<{tag}{format_attrs(attrs)}>{escape(str(text))}</{tag}>\n")
+
+    def open(self, tag, **attrs):
+        self._write(f"<{tag}{format_attrs(attrs)}>\n")
+        self._stack.append(tag)
+
+    def close(self):
+        tag = self._stack.pop()
+        self._write(f"</{tag}>\n")
+
+    @contextmanager
+    def group(self, tag="g", **attrs):
+        self.open(tag, **attrs)
+        try:
+            yield self
+        finally:
+            self.close()
+
+    def comment(self, text):
+        self._write(f"<!-- {text} -->\n")
+
+
+def chain(*transforms):
+    """One ``SvgWriter`` transform that applies ``transforms`` left to right."""
+    transforms = [t for t in transforms if t is not None]
+    if len(transforms) == 1:
+        return transforms[0]
+
+    def apply(chunk):
+        for transform in transforms:
+            chunk = transform(chunk)
+        return chunk
+    return apply
+
+
+def render_to_string(draw, width, height, **root_attrs):
+    """Run ``draw(writer)`` against an in-memory stream and return the SVG text."""
+    buf = io.StringIO()
+    with SvgWriter(buf, width, height, **root_attrs) as svg:
+        draw(svg)
+    return buf.getvalue()
@@ -0,0 +1,8 @@
+"""Delete unreferenced blobs from the diagram asset store (see diagram.store)."""
+
+import sys
+
+from diagram.store import main
+
+if __name__ == "__main__":
+    sys.exit(main())
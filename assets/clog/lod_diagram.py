@@ -0,0 +1,8 @@
+"""Render a clustered overview of a large graph plus on-demand details (see diagram.lod)."""
+
+import sys
+
+from diagram.lod import main
+
+if __name__ == "__main__":
+    sys.exit(main())
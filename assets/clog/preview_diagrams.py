@@ -0,0 +1,8 @@
+"""Serve a live-reloading preview of the diagrams (see diagram.preview)."""
+
+import sys
+
+from diagram.preview import main
+
+if __name__ == "__main__":
+    sys.exit(main())
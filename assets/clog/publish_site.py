@@ -0,0 +1,8 @@
+"""Point the rendered site at the content-hashed diagrams (see diagram.fingerprint)."""
+
+import sys
+
+from diagram.fingerprint import main
+
+if __name__ == "__main__":
+    sys.exit(main())
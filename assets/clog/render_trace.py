@@ -0,0 +1,8 @@
+"""Render the context DAG recorded in a JSONL trace (see diagram.trace)."""
+
+import sys
+
+from diagram.trace import main
+
+if __name__ == "__main__":
+    sys.exit(main())
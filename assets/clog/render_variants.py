@@ -0,0 +1,8 @@
+"""Render the variants a spec declares from one layout pass (see diagram.variants)."""
+
+import sys
+
+from diagram.variants import main
+
+if __name__ == "__main__":
+    sys.exit(main())
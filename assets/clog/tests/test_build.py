@@ -0,0 +1,65 @@
+import functools
+import io
+import os
+import shutil
+
+import pytest
+
+from diagram import build as build_module
+from diagram.paths import spec_path
+from diagram.store import Store
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """A project root with one spec, and a manifest and store of its own."""
+    specs = tmp_path / "specs"
+    specs.mkdir()
+    shutil.copy(spec_path("context_dag"), specs / "context_dag.json")
+    monkeypatch.setattr(build_module, "CLOG_DIR", str(tmp_path))
+    monkeypatch.setattr(build_module, "Store", functools.partial(Store, str(tmp_path / ".store")))
+    monkeypatch.setattr(build_module, "discover", functools.partial(build_module.discover, specs_dir=str(specs)))
+    return tmp_path
+
+
+def run(root):
+    return build_module.build(root=str(root), jobs=1, hash_names=False, compress=False, out=io.StringIO())
+
+
+def test_incremental_build(project):
+    output = project / "assets" / "clog" / "context_dag.svg"
+    assert run(project).rebuilt == {"context_dag": ["never built"]}
+    built = output.read_bytes()
+    mtime = os.stat(output).st_mtime_ns
+
+    # Nothing changed: nothing is rebuilt or rewritten
+    assert run(project).rebuilt == {}
+    assert os.stat(output).st_mtime_ns == mtime
+
+    spec = project / "specs" / "context_dag.json"
+    spec.write_text(spec.read_text(encoding="utf-8").replace('"ROOT"', '"ORIGIN"', 1), encoding="utf-8")
+    assert run(project).rebuilt == {"context_dag": ["changed specs/context_dag.json"]}
+    assert output.read_bytes() != built
+    assert run(project).rebuilt == {}
+
+
+def test_hand_edited_output_is_rebuilt(project):
+    output = project / "assets" / "clog" / "context_dag.svg"
+    run(project)
+    built = output.read_bytes()
+    output.write_bytes(built.replace(b"</svg>", b"<!-- edited --></svg>"))
+    assert run(project).rebuilt == {"context_dag": ["output modified outside the build"]}
+    assert output.read_bytes() == built
+
+
+def test_over_budget_build_publishes_nothing(project):
+    spec = project / "specs" / "context_dag.json"
+    spec.write_text(spec.read_text(encoding="utf-8").replace('"size_budget_kb": 8', '"size_budget_kb": 0.1'),
+                    encoding="utf-8")
+    out = io.StringIO()
+    report = build_module.build(root=str(project), jobs=1, out=out)
+    assert not report.ok and set(report.over_budget) == {"context_dag"}
+    assert "skipped publishing and precompression" in out.getvalue()
+    # No hashed copy and no sidecars next to the output
+    assert os.listdir(project / "assets" / "clog") == ["context_dag.svg"]
+    assert report.compressed == {}
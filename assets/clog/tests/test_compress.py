@@ -0,0 +1,45 @@
+import gzip
+import hashlib
+import os
+
+from diagram.compress import compress_outputs, encoders, format_sizes
+
+
+def write(root, rel, data):
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return hashlib.sha256(data).hexdigest()
+
+
+def test_sidecars_decode_to_the_output_and_are_reproducible(tmp_path):
+    data = b"<svg>" + b"<rect/>" * 500 + b"</svg>"
+    outputs = {"a.svg": write(tmp_path, "a.svg", data)}
+    records, compressed = compress_outputs(str(tmp_path), outputs, {})
+    assert compressed == ["a.svg"]
+    record = records["a.svg"]
+    packed = (tmp_path / "a.svg.gz").read_bytes()
+    assert gzip.decompress(packed) == data
+    assert record["raw"] == len(data) and record["gz"] == len(packed) < len(data)
+    assert record["digests"]["gz"] == hashlib.sha256(packed).hexdigest()
+    assert record["sha256"] == outputs["a.svg"]
+    assert set(record["digests"]) == {suffix[1:] for suffix in encoders()}
+    # No timestamp in the gzip header, so the same input gives the same bytes
+    os.remove(tmp_path / "a.svg.gz")
+    compress_outputs(str(tmp_path), outputs, {})
+    assert (tmp_path / "a.svg.gz").read_bytes() == packed
+    assert format_sizes(record).startswith(f"gz {len(packed):,} (")
+
+
+def test_only_changed_or_missing_sidecars_are_rewritten(tmp_path):
+    outputs = {"a.svg": write(tmp_path, "a.svg", b"<svg>a</svg>"),
+               "sub/b.svg": write(tmp_path, "sub/b.svg", b"<svg>b</svg>")}
+    records, _ = compress_outputs(str(tmp_path), outputs, {})
+    assert compress_outputs(str(tmp_path), outputs, records) == (records, [])
+
+    outputs["a.svg"] = write(tmp_path, "a.svg", b"<svg>changed</svg>")
+    os.remove(tmp_path / "sub" / "b.svg.gz")
+    again, compressed = compress_outputs(str(tmp_path), outputs, records)
+    assert compressed == ["a.svg", "sub/b.svg"]
+    assert gzip.decompress((tmp_path / "a.svg.gz").read_bytes()) == b"<svg>changed</svg>"
+    assert again["sub/b.svg"] == records["sub/b.svg"]
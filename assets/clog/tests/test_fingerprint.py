@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+from diagram.fingerprint import hashed_path, logical_path, publish, publish_site, rewrite_page
+
+DIGEST = "1f0e3c9a2b" + "0" * 54
+ASSETS = {"assets/images/architecture.svg": "assets/images/architecture.1f0e3c9a2b.svg",
+          "work/projects/ccp/featured.svg": "work/projects/ccp/featured.ba62758a9e.svg"}
+
+
+def test_hashed_and_logical_paths():
+    assert hashed_path("assets/images/architecture.svg", DIGEST) == "assets/images/architecture.1f0e3c9a2b.svg"
+    assert logical_path("assets/images/architecture.1f0e3c9a2b.svg") == "assets/images/architecture.svg"
+    assert logical_path("assets/images/architecture.svg") == "assets/images/architecture.svg"
+    assert logical_path("notes.1f0e3c9a2.svg") == "notes.1f0e3c9a2.svg"  # too short to be a hash
+
+
+@pytest.mark.parametrize("ref, expected", [
+    ("assets/images/architecture.svg", "assets/images/architecture.1f0e3c9a2b.svg"),
+    ("assets/images/architecture.svg?v=13", "assets/images/architecture.1f0e3c9a2b.svg"),
+    ("assets/images/architecture.0123456789.svg", "assets/images/architecture.1f0e3c9a2b.svg"),
+    ("/assets/images/architecture.svg#layer", "/assets/images/architecture.1f0e3c9a2b.svg#layer"),
+    ("./work/projects/ccp/featured.svg", "./work/projects/ccp/featured.ba62758a9e.svg"),
+    ("assets/images/other.svg", "assets/images/other.svg"),
+    ("https://example.com/assets/images/architecture.svg", "https://example.com/assets/images/architecture.svg"),
+])
+def test_rewrite_page_at_the_site_root(tmp_path, ref, expected):
+    page = f'<img src="{ref}" alt="x">'
+    assert rewrite_page(page, str(tmp_path), str(tmp_path), ASSETS) == f'<img src="{expected}" alt="x">'
+
+
+def test_rewrite_page_resolves_against_the_page(tmp_path):
+    page_dir = str(tmp_path / "work" / "projects")
+    page = ("<meta property=\"og:image\" content='ccp/featured.svg'>\n"
+            '<a href="../../assets/images/architecture.svg"><img data-src="ccp/featured.svg"></a>\n'
+            '<object data="../../assets/images/architecture.svg"></object>')
+    assert rewrite_page(page, page_dir, str(tmp_path), ASSETS) == (
+        "<meta property=\"og:image\" content='ccp/featured.ba62758a9e.svg'>\n"
+        '<a href="../../assets/images/architecture.1f0e3c9a2b.svg"><img data-src="ccp/featured.svg"></a>\n'
+        '<object data="../../assets/images/architecture.1f0e3c9a2b.svg"></object>')
+
+
+def test_publish_replaces_superseded_copies(tmp_path):
+    source = tmp_path / "assets" / "images" / "architecture.svg"
+    source.parent.mkdir(parents=True)
+    source.write_text("<svg/>")
+    old = tmp_path / "assets" / "images" / "architecture.0123456789.svg"
+    old.write_text("<svg></svg>")
+    (tmp_path / "assets" / "images" / "architecture.0123456789.svg.gz").write_bytes(b"")
+    assets = {"assets/images/architecture.svg": "assets/images/architecture.0123456789.svg"}
+    changed = publish(str(tmp_path), {"assets/images/architecture.svg": DIGEST}, assets)
+    assert changed == [("assets/images/architecture.svg", "assets/images/architecture.1f0e3c9a2b.svg")]
+    assert sorted(os.listdir(source.parent)) == ["architecture.1f0e3c9a2b.svg", "architecture.svg"]
+    assert publish(str(tmp_path), {"assets/images/architecture.svg": DIGEST}, assets) == []
+
+
+def test_publish_site_copies_hashed_files_and_rewrites_pages(tmp_path):
+    root, site = tmp_path, tmp_path / "docs"
+    for target in ASSETS.values():
+        (root / target).parent.mkdir(parents=True, exist_ok=True)
+        (root / target).write_text(target)
+    images = site / "assets" / "images"
+    images.mkdir(parents=True)
+    (images / "architecture.svg").write_text("logical")
+    (images / "architecture.0123456789.svg").write_text("stale")
+    (images / "architecture.0123456789.svg.br").write_bytes(b"")
+    (site / "index.html").write_text('<img src="assets/images/architecture.svg?v=13">')
+    (site / "about.html").write_text("<p>no diagrams</p>")
+
+    copied, pages = publish_site(str(root), str(site), ASSETS)
+    assert copied == sorted(ASSETS.values())
+    assert pages == [str(site / "index.html")]
+    assert (site / "index.html").read_text() == '<img src="assets/images/architecture.1f0e3c9a2b.svg">'
+    assert sorted(os.listdir(images)) == ["architecture.1f0e3c9a2b.svg", "architecture.svg"]
+    # A second run has nothing left to do
+    assert publish_site(str(root), str(site), ASSETS) == ([], [])
+
+    (root / ASSETS["assets/images/architecture.svg"]).unlink()
+    (site / ASSETS["assets/images/architecture.svg"]).unlink()
+    with pytest.raises(FileNotFoundError, match="run build_diagrams.py"):
+        publish_site(str(root), str(site), ASSETS)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from diagram.geometry import (BOTTOM, CURVES, H_CURVE, LEFT, LINE, RIGHT, TOP, V_CURVE, EdgeGeometry,
+                              edge_geometry, format_numbers, format_paths, route_arrays)
+from diagram.spec import Edge, Graph, Node, SpecError
+from diagram.writer import fmt_num
+
+
+def random_geometry(n, curve, seed=0):
+    rng = np.random.default_rng(seed)
+    # Mix integral values, halves, long fractions and negatives, with plenty of repeats
+    pool = np.concatenate([np.arange(-5, 50, dtype=float), np.arange(0, 20) + 0.5, rng.normal(100, 50, 40), [-0.0]])
+    sx, sy, c1x, c1y, c2x, c2y, tx, ty = (rng.choice(pool, n) for _ in range(8))
+    return EdgeGeometry(sx, sy, c1x, c1y, c2x, c2y, tx, ty, curve, np.zeros(n))
+
+
+def one_by_one(geom):
+    paths = []
+    for k in range(len(geom)):
+        a, b, c, d, e, f, g, h = (fmt_num(float(arr[k])) for arr in (geom.sx, geom.sy, geom.c1x, geom.c1y,
+                                                                     geom.c2x, geom.c2y, geom.tx, geom.ty))
+        paths.append(f"M{a},{b} L{g},{h}" if geom.curve[k] == LINE else f"M{a},{b} C{c},{d} {e},{f} {g},{h}")
+    return paths
+
+
+@pytest.mark.parametrize("curve", [np.full(500, LINE), np.full(500, H_CURVE),
+                                   np.random.default_rng(1).integers(0, len(CURVES), 500)])
+def test_format_paths_matches_fmt_num(curve):
+    geom = random_geometry(len(curve), curve)
+    assert format_paths(geom) == one_by_one(geom)
+
+
+def test_format_numbers_keeps_array_boundaries():
+    parts = format_numbers(np.array([1.0, 2.5]), np.array([]), np.array([2.5, -3.0]))
+    assert parts == [["1", "2.5"], [], ["2.5", "-3"]]
+
+
+def box(values):
+    return tuple(np.array([v], dtype=float) for v in values)
+
+
+def test_anchors_handles_and_arrowheads():
+    source, target = box((0, 0, 100, 40)), box((300, 200, 100, 40))
+    geom = edge_geometry(*source, *target, from_side=np.array([RIGHT]), to_side=np.array([LEFT]),
+                         from_at=np.array([np.nan]), to_at=np.array([10.0]), curve=np.array([H_CURVE]),
+                         bend=np.array([np.nan]))
+    assert (geom.sx[0], geom.sy[0], geom.tx[0], geom.ty[0]) == (100, 20, 300, 210)
+    assert (geom.c1x[0], geom.c1y[0], geom.c2x[0], geom.c2y[0]) == (200, 20, 200, 210)
+    assert geom.angle[0] == 0  # the last handle is horizontal
+    geom = edge_geometry(*source, *target, from_side=np.array([BOTTOM]), to_side=np.array([TOP]),
+                         from_at=np.array([np.nan]), to_at=np.array([np.nan]), curve=np.array([V_CURVE]),
+                         bend=np.array([30.0]))
+    assert (geom.c1y[0], geom.c2y[0]) == (70, 170)
+    assert geom.angle[0] == 90
+
+
+def test_route_arrays_use_edge_routes_over_the_default():
+    graph = Graph()
+    for node_id in "ab":
+        graph.add_node(Node(node_id))
+    graph.add_edge(Edge("a", "b"))
+    graph.add_edge(Edge("a", "b", route={"from": "bottom", "curve": "v", "bend": 12}))
+    policy = route_arrays(graph, np.arange(2), {"from": "right", "to": "left", "curve": "h"})
+    assert policy["from_side"].tolist() == [RIGHT, BOTTOM]
+    assert policy["curve"].tolist() == [H_CURVE, V_CURVE]
+    assert np.isnan(policy["bend"][0]) and policy["bend"][1] == 12
+    with pytest.raises(SpecError, match="unknown anchor side 'middle'"):
+        route_arrays(graph, np.arange(2), {"from": "middle"})
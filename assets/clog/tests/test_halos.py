@@ -0,0 +1,37 @@
+import io
+import re
+
+from diagram.cost import PaintCost
+from diagram.paths import spec_path
+from diagram.render import Scene
+from diagram.spec import load_spec
+
+
+def render(optimize=None):
+    buf = io.StringIO()
+    cost = Scene(load_spec(spec_path("home_architecture"))).write(buf, optimize=optimize)
+    return buf.getvalue(), cost
+
+
+def test_halo_rules_only_for_glowing_types():
+    svg, _ = render({"halos": True})
+    style = re.search(r"<style>(.*?)</style>", svg, re.DOTALL)[1]
+    # Only the kernel type has a glow in this spec
+    assert re.findall(r"([.\w-]+) \.halo\{", style) == [".node--kernel"]
+    assert 'class="halo"' in svg
+
+
+def test_halo_mode_replaces_filters():
+    svg, cost = render({"halos": True})
+    assert "<filter" not in svg and cost["filtered"] == 0
+    svg, cost = render({"halos": False})
+    assert "<filter" in svg and cost["filtered"] > 0 and ".halo" not in svg
+
+
+def test_paint_cost_counts_filtered_elements():
+    meter = PaintCost()
+    meter('<filter id="g"><feGaussianBlur stdDeviation="3"/></filter>')
+    meter('<rect width="10" height="20" filter="url(#g)"/>')
+    meter('<path d="M0,0 L10,10 C1,1 2,2 3,3"/>')
+    report = meter.report()
+    assert report["filtered"] == 1 and report["filter_area"] > 200 and report["segments"] == 2
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from diagram.layout import LayoutError, layered_layout, node_depths
+from diagram.spec import Edge, Graph, Node
+
+
+def graph(nodes, edges):
+    g = Graph()
+    for node_id in nodes:
+        g.add_node(Node(node_id))
+    for source, target in edges:
+        g.add_edge(Edge(source, target))
+    return g
+
+
+def test_longest_path_layering():
+    g = graph("abcde", [("a", "b"), ("b", "c"), ("a", "c"), ("c", "d"), ("a", "e")])
+    layout = layered_layout(g)
+    assert layout.layer.tolist() == [0, 1, 2, 3, 1]
+    assert layout.n_layers == 4
+    assert layout.reversed_edges == set()
+    # LR: every edge points right, and nodes of one layer share an x
+    x = layout.x
+    for source, target in [(0, 1), (1, 2), (2, 3), (0, 4)]:
+        assert x[source] < x[target]
+    assert x[1] == x[4]
+
+
+def test_cycles_are_broken_by_reversal():
+    g = graph("abc", [("a", "b"), ("b", "c"), ("c", "a")])
+    layout = layered_layout(g)
+    assert sorted(layout.layer.tolist()) == [0, 1, 2]
+    assert len(layout.reversed_edges) == 1
+    (source, target), = layout.reversed_edges
+    assert (source, target) in {("a", "b"), ("b", "c"), ("c", "a")}
+    assert node_depths(g).tolist() == layout.layer.tolist()
+
+
+def test_cycles_can_be_an_error():
+    g = graph("ab", [("a", "b"), ("b", "a")])
+    with pytest.raises(LayoutError, match="cycle-closing"):
+        layered_layout(g, on_cycle="error")
+
+
+def test_self_loops_are_ignored_and_layers_do_not_overlap():
+    g = graph("abcd", [("a", "a"), ("a", "b"), ("a", "c"), ("a", "d")])
+    layout = layered_layout(g, direction="TB", node_gap=10)
+    assert layout.layer.tolist() == [0, 1, 1, 1]
+    xs = np.sort(layout.x[1:])
+    assert np.all(np.diff(xs) >= layout.w[1] + 10)
+    assert np.all(layout.y[1:] > layout.y[0])
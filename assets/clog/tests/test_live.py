@@ -0,0 +1,67 @@
+import pytest
+
+from diagram.live import LiveDiagram
+from diagram.paths import spec_path
+from diagram.spec import Node, SpecError, load_spec
+
+
+@pytest.fixture
+def live(tmp_path):
+    return LiveDiagram(load_spec(spec_path("csd_architecture")), tmp_path / "csd.svg")
+
+
+def snapshot(live):
+    graph = live.spec.graph
+    with open(live.path, "rb") as f:
+        data = f.read()
+    return len(graph.nodes), len(graph.edges), dict(live.spec.canvas), len(live.layers), data
+
+
+@pytest.mark.parametrize("nodes, edges", [
+    ([{"id": "n1", "type": "root"}], [["csd_slm", "n1"], ["n1", "missing"]]),
+    ([{"id": "n1", "type": "root"}, {"id": "n2", "type": "no_such_type"}], []),
+    ([{"id": "n1", "type": "root", "x": "left"}], []),
+    ([{"id": "n1", "type": "root"}, {"id": "n1", "type": "root"}], []),
+    ([{"id": "n1", "type": "root"}, {"label": "no id"}], []),
+])
+def test_rejected_append_changes_nothing(live, nodes, edges):
+    before = snapshot(live)
+    with pytest.raises(SpecError):
+        live.append(nodes=nodes, edges=edges)
+    assert snapshot(live) == before
+    assert "n1" not in live.spec.graph
+
+
+def test_append_after_rejection(live):
+    with pytest.raises(SpecError, match="unknown node 'missing'"):
+        live.append(nodes=[{"id": "n1", "type": "root"}], edges=[["n1", "missing"]])
+    diff = live.append(nodes=[{"id": "n1", "type": "root"}], edges=[["csd_slm", "n1"]])
+    assert diff.nodes == ["n1"] and diff.edges == [("csd_slm", "n1")]
+    with open(live.path, "rb") as f:
+        data = f.read()
+    assert data.endswith(b"</svg>") and diff.svg.encode() in data
+
+
+def test_append_to_a_modified_file_changes_nothing(live):
+    with open(live.path, "ab") as f:
+        f.write(b"\n")
+    before = snapshot(live)
+    with pytest.raises(SpecError, match="modified outside"):
+        live.append(nodes=[{"id": "n1", "type": "root"}], edges=[["csd_slm", "n1"]])
+    assert snapshot(live) == before
+    assert "n1" not in live.spec.graph
+
+
+def test_batch_chains_stack_into_successive_layers(live):
+    # Declared back to front: n3 <- n2 <- n1 <- csd_slm, plus n1 -> n3
+    diff = live.append(nodes=[{"id": f"n{i}", "type": "root"} for i in (3, 2, 1)],
+                       edges=[["n2", "n3"], ["n1", "n2"], ["csd_slm", "n1"], ["n1", "n3"]])
+    layer = live.layer_of
+    assert layer["csd_slm"] < layer["n1"] < layer["n2"] < layer["n3"]
+    assert sorted(diff.layers.values()) == [1, 1, 1]
+
+
+def test_cycles_inside_a_batch_are_placed_in_declaration_order(live):
+    nodes = [Node("a"), Node("b"), Node("c")]
+    order = LiveDiagram._placement_order(nodes, {"a": ["b"], "b": ["a"], "c": ["c"]})
+    assert [node.id for node in order] == ["c", "a", "b"]
@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pytest
+
+from diagram.lod import LevelOfDetail, bucket_bounds
+from diagram.spec import SpecError, compile_spec
+from diagram.trace import TraceGraph
+
+
+@pytest.fixture
+def spec():
+    # A ROOT fanning out to 30 ideas, each backed by a reason and a fact
+    graph = TraceGraph()
+    graph.add_node("r", "root")
+    for i in range(30):
+        for kind, prefix in (("idea", "i"), ("reason", "s"), ("fact", "f")):
+            graph.add_node(f"{prefix}{i}", kind)
+        graph.add_edge("r", f"i{i}")
+        graph.add_edge(f"i{i}", f"s{i}")
+        graph.add_edge(f"s{i}", f"f{i}")
+        if i:
+            graph.add_edge(f"i{i - 1}", f"i{i}")
+    return compile_spec(graph.spec_data(name="run"))
+
+
+def test_bucket_bounds_cover_every_value():
+    assert bucket_bounds([3, 1, 2, 2, 7], fanout=2) == [(1, 2), (3, 7)]
+    assert bucket_bounds(range(30), fanout=12) == [(i, i + 2) for i in range(0, 30, 3)]
+
+
+def test_cluster_edges_partition_their_parent(spec, tmp_path):
+    lod = LevelOfDetail(spec, tmp_path, max_nodes=10)
+    assert sorted(lod.clusters()) == ["fact", "idea", "reason", "root"]
+    inner = np.concatenate([lod.edges(key) for key in lod.clusters()])
+    a, b = lod._crossing[None]
+    assert len(inner) + len(a) == len(spec.graph.edges)
+    assert len(lod.edges("idea")) == 29  # the i(n-1) -> i(n) chain
+    # Sub-clusters of an oversized cluster split it by depth
+    children = lod.clusters("idea")
+    assert all(key.startswith("idea/") for key in children)
+    assert sorted(i for members in children.values() for i in members) == sorted(lod.members("idea"))
+    assert sum(len(lod.edges(key)) for key in children) <= len(lod.edges("idea"))
+
+
+def test_views_are_cached_by_fingerprint(spec, tmp_path):
+    lod = LevelOfDetail(spec, tmp_path, max_nodes=10)
+    overview = lod.overview()
+    detail = lod.detail("root")
+    sub = lod.detail("idea")
+    assert os.path.basename(overview) == "run-by-type.svg"
+    assert os.path.basename(detail) == "run-by-type-root.svg"
+    assert os.path.basename(sub) == "run-by-type-idea.svg"
+    assert lod.index["views"]["idea"]["clusters"] == sorted(lod.clusters("idea"))
+    stamps = {path: os.stat(path).st_mtime_ns for path in (overview, detail, sub)}
+    for path in stamps:
+        os.utime(path, ns=(0, 0))
+    again = LevelOfDetail(spec, tmp_path, max_nodes=10)
+    assert [again.overview(), again.detail("root"), again.detail("idea")] == [overview, detail, sub]
+    assert all(os.stat(path).st_mtime_ns == 0 for path in stamps)
+
+
+def test_unknown_clusters_and_clusterings_raise(spec, tmp_path):
+    with pytest.raises(SpecError, match="unknown clustering"):
+        LevelOfDetail(spec, tmp_path, by="colour")
+    with pytest.raises(SpecError, match="unknown cluster 'widget'"):
+        LevelOfDetail(spec, tmp_path).detail("widget")
@@ -0,0 +1,20 @@
+import pytest
+
+from diagram.optimize import Minifier
+
+
+@pytest.mark.parametrize("attr", ['stroke-width="1"', 'fill-opacity="1"', 'stroke-opacity="1"'])
+def test_inherited_defaults_are_kept(attr):
+    # The child resets a property its group sets; dropping it would change the rendering
+    group = '<g stroke-width="3" fill-opacity=".5" stroke-opacity=".5">'
+    markup = Minifier()(f'{group}<path d="M 0 0 L 10 10" {attr}/></g>')
+    assert f"<path d=\"M0 0L10 10\" {attr}/>" in markup
+
+
+def test_non_inherited_defaults_are_dropped():
+    markup = Minifier()('<rect x="0" y="0.004" width="10.123" height="5" opacity="1"/>\n')
+    assert markup == '<rect width="10.12" height="5"/>'
+
+
+def test_stop_opacity_default_is_dropped():
+    assert Minifier()('<stop offset="1" stop-opacity="1"/>') == '<stop offset="1"/>'
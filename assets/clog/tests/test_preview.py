@@ -0,0 +1,82 @@
+import asyncio
+import io
+import json
+import os
+import time
+
+import pytest
+
+from diagram.build import discover
+from diagram.paths import find_project_root, spec_path
+from diagram.preview import PreviewServer, render_preview
+from diagram.render import Scene
+from diagram.spec import load_spec
+
+
+@pytest.fixture
+def server():
+    server = PreviewServer(discover(find_project_root(), names=["context_dag"]), spares=0)
+    yield server
+    server.pool.close()
+
+
+def test_render_preview_matches_a_scene_write():
+    svg, totals = render_preview("context_dag", spec_path("context_dag"))
+    buf = io.StringIO()
+    Scene(load_spec(spec_path("context_dag"))).write(buf)
+    assert svg == buf.getvalue()
+    assert {"parse", "layout", "serialize"} <= set(totals)
+
+
+def test_scan_reports_changed_inputs(server, tmp_path):
+    assert server.scan() == {}
+    watched = tmp_path / "spec.json"
+    watched.write_text("{}")
+    server.diagrams["context_dag"].inputs.append(str(watched))
+    server.scan()
+    os.utime(watched, ns=(0, 10**9))
+    assert server.scan() == {str(watched): 1.0}
+    watched.unlink()
+    (changed, when), = server.scan().items()
+    assert changed == str(watched) and when <= time.time()
+    assert server.scan() == {}
+
+
+def test_rebuild_serves_the_svg(server):
+    async def scenario():
+        server.edited["context_dag"] = time.time()
+        await server.rebuild("context_dag")
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        responses = []
+        async with listener:
+            for path in ("/", "/diagram/context_dag.svg", "/diagram/missing.svg"):
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+                responses.append(await reader.read())
+                writer.close()
+        return responses
+
+    page, svg, missing = asyncio.run(scenario())
+    state = server.state["context_dag"]
+    assert state["version"] == 1 and state["error"] is None
+    assert page.startswith(b"HTTP/1.1 200 OK") and b'alt="context_dag"' in page
+    head, _, body = svg.partition(b"\r\n\r\n")
+    assert b"image/svg+xml" in head and body.decode() == state["svg"]
+    assert missing.startswith(b"HTTP/1.1 404")
+    assert json.loads(server.message("context_dag"))["svg"] == state["svg"]
+
+
+def test_render_errors_are_reported_not_raised(server, tmp_path):
+    broken = tmp_path / "broken.json"
+    broken.write_text('{"name": "broken", "nodes": [')
+    server.diagrams["context_dag"].spec_path = str(broken)
+
+    async def scenario():
+        server.edited["context_dag"] = time.time()
+        await server.rebuild("context_dag")
+
+    asyncio.run(scenario())
+    state = server.state["context_dag"]
+    assert state["svg"] is None and state["status"] == "v1: failed"
+    assert state["error"].startswith("SpecError") and "invalid JSON" in state["error"]
@@ -0,0 +1,58 @@
+import re
+
+import pytest
+
+from diagram.route import GridIndex, Router, sample_bezier, segment_hits_rect
+from diagram.spec import Edge, Graph, Node
+
+NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def graph():
+    g = Graph()
+    g.add_node(Node("a", x=0, y=100, w=60, h=40))
+    g.add_node(Node("wall", x=180, y=0, w=60, h=240))  # squarely between a and c
+    g.add_node(Node("c", x=400, y=100, w=60, h=40))
+    g.add_edge(Edge("a", "c"))
+    return g
+
+
+def polyline(d):
+    """Points along path data made of M/L/Q/C commands (curves sampled)."""
+    points = []
+    for command, args in re.findall(r"([MLQC])([^MLQC]*)", d):
+        values = [float(v) for v in NUMBER.findall(args)]
+        pairs = list(zip(values[::2], values[1::2], strict=True))
+        if command == "C":
+            points.extend(sample_bezier(points[-1], *pairs)[1:])
+        else:
+            points.extend(pairs)
+    return points
+
+
+@pytest.mark.parametrize("style", ["bezier", "orthogonal"])
+def test_route_avoids_a_blocking_node(style):
+    g = graph()
+    router = Router(g, style=style)
+    points = polyline(router.route(g.edges[0]))
+    wall = router.rects[g.index["wall"]]
+    assert len(points) > 2
+    assert not any(segment_hits_rect(*p, *q, wall) for p, q in zip(points, points[1:], strict=False))
+    # It still connects the two nodes
+    assert points[0][0] <= 60 + 1 and points[-1][0] >= 400 - 1
+
+
+def test_unobstructed_edge_is_one_curve():
+    g = Graph()
+    g.add_node(Node("a", x=0, y=0, w=60, h=40))
+    g.add_node(Node("b", x=200, y=0, w=60, h=40))
+    g.add_edge(Edge("a", "b"))
+    d = Router(g).route(g.edges[0])
+    assert d.startswith("M60,20 C") and d.count("C") == 1
+
+
+def test_grid_index_query():
+    index = GridIndex([(0, 0, 10, 10), (100, 100, 110, 110), (5, 50, 200, 60)], cell=20)
+    assert sorted(index.query(0, 0, 20, 20)) == [0]
+    assert sorted(index.query(8, 8, 105, 105)) == [0, 1, 2]
+    assert index.query(300, 300, 310, 310) == []
@@ -0,0 +1,51 @@
+import pytest
+
+from diagram.spec import SpecError, compile_spec
+
+
+def spec_data(nodes, edges=()):
+    return {"name": "t", "canvas": {"width": 400, "height": 300}, "types": {"box": {}},
+            "nodes": nodes, "edges": list(edges)}
+
+
+def test_problems_are_reported_together():
+    data = spec_data(
+        nodes=[{"id": "a", "type": "box"}, {"id": "a", "type": "box"}, {"id": "b", "type": "circle"},
+               {"label": "no id"}, {"id": "c", "type": "box", "colour": "red"}],
+        edges=[["a", "missing"], ["a"]])
+    with pytest.raises(SpecError) as info:
+        compile_spec(data, path="specs/t.json")
+    message = str(info.value)
+    assert message.startswith("specs/t.json: ")
+    for problem in ("duplicate node id 'a'", "node 'b' has undeclared type 'circle'", "has no id",
+                    "node 'c' has unknown fields ['colour']", "references unknown node 'missing'",
+                    "must be [source, target]"):
+        assert problem in message
+
+
+def test_bad_geometry_is_a_spec_error():
+    data = spec_data(nodes=[{"id": "a", "type": "box", "x": "left", "w": [1]}, {"id": "b", "type": "box"}],
+                     edges=[["a", "b"]])
+    with pytest.raises(SpecError) as info:
+        compile_spec(data)
+    message = str(info.value)
+    assert "node 'a' has x='left' (expected a number)" in message
+    assert "node 'a' has w=[1] (expected a number or 'auto')" in message
+    # The skipped node's edges are not reported as dangling on top
+    assert "unknown node" not in message
+
+
+def test_valid_spec_compiles():
+    spec = compile_spec(spec_data(nodes=[{"id": "a", "type": "box", "w": "auto"}, {"id": "b", "type": "box"}],
+                                  edges=[["a", "b"]]))
+    assert len(spec.graph) == 2 and spec.graph.successors("a") == ["b"]
+
+
+def test_entries_that_are_not_objects_are_reported():
+    data = spec_data(nodes=[["a", "box"], "b", {"id": "c", "type": "box"}], edges=["c", ["c", "c"]])
+    with pytest.raises(SpecError) as info:
+        compile_spec(data)
+    message = str(info.value)
+    assert "node ['a', 'box'] is not an object" in message
+    assert "node 'b' is not an object" in message
+    assert "edge 'c' must be [source, target] or an object" in message
@@ -0,0 +1,43 @@
+import os
+
+from diagram.store import Store, sha256_file
+
+
+def write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+def test_gc_keeps_referenced_blobs(tmp_path):
+    store = Store(str(tmp_path / ".store"))
+    kept = store.add(write(tmp_path / "a.svg", b"<svg>a</svg>"))
+    dropped = store.add(write(tmp_path / "b.svg", b"<svg>b</svg>"))
+    assert {digest for digest, _ in store.digests()} == {kept, dropped}
+
+    assert [digest for digest, _, _ in store.gc(keep={kept}, dry_run=True)] == [dropped]
+    assert os.path.exists(store.blob(dropped))
+    assert store.gc(keep={kept}) == [(dropped, len(b"<svg>b</svg>"), "unreferenced")]
+    assert [digest for digest, _ in store.digests()] == [kept]
+    assert sha256_file(store.blob(kept)) == kept
+
+
+def test_gc_verify_drops_corrupt_blobs(tmp_path):
+    store = Store(str(tmp_path / ".store"))
+    digest = store.add(write(tmp_path / "a.svg", b"<svg>a</svg>"))
+    blob = store.blob(digest)
+    os.chmod(blob, 0o644)
+    write(blob, b"<svg>corrupt</svg>")
+    assert store.gc(keep={digest}) == []
+    assert [reason for _, _, reason in store.gc(keep={digest}, verify=True)] == ["corrupt"]
+
+
+def test_materialized_files_are_independent(tmp_path):
+    store = Store(str(tmp_path / ".store"))
+    digest = store.add(write(tmp_path / "a.svg", b"<svg>a</svg>"))
+    dest = tmp_path / "site" / "a.svg"
+    assert store.materialize(digest, str(dest)) in ("cloned", "copied")
+    assert store.materialize(digest, str(dest)) == "unchanged"
+    # Writing in place must neither fail nor reach the blob
+    write(dest, b"<svg>edited</svg>")
+    assert sha256_file(store.blob(digest)) == digest
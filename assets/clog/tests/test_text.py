@@ -0,0 +1,54 @@
+import pytest
+
+from diagram.render import node_style, prepare
+from diagram.spec import compile_spec, spec_template
+from diagram.text import FONTS, PAD_X, measure, overflows, resolve_font, text_width
+
+
+@pytest.mark.parametrize("family, font", [
+    ("'JetBrains Mono', monospace", "monospace"),
+    ("CMU Serif, serif", "computer-modern"),
+    ("Segoe UI, Helvetica, sans-serif", "inter"),
+    ("Wingdings", "inter"),
+    (None, "inter"),
+])
+def test_font_families_resolve_to_tables(family, font):
+    assert resolve_font(family) == font
+
+
+def test_widths_follow_the_advance_tables():
+    assert text_width("monospace", 10, "abc") == pytest.approx(18)
+    assert text_width("monospace", 10, "abc", bold=True) == pytest.approx(18)
+    assert text_width("inter", 10, "abc", bold=True) > text_width("inter", 10, "abc")
+    # Characters outside the table use the average advance
+    assert text_width("inter", 10, "é") == pytest.approx(FONTS["inter"].average / 100)
+    assert measure("monospace", 10, "abc", letter_spacing=2) == pytest.approx(22)
+    assert measure("monospace", 10, "") == 0
+
+
+def spec(nodes):
+    data = spec_template("context_dag", name="text")
+    data["autosize"] = False
+    data["nodes"] = nodes
+    return prepare(compile_spec(data))
+
+
+def test_auto_boxes_fit_their_text_and_fixed_ones_are_kept():
+    s = spec([{"id": "short", "type": "idea", "label": "A", "w": "auto", "h": "auto"},
+              {"id": "long", "type": "idea", "label": "A much longer label", "sub": "and a sub-label",
+               "w": "auto", "h": "auto"},
+              {"id": "fixed", "type": "idea", "label": "A much longer label", "w": 300, "h": 80}])
+    short, long, fixed = s.graph.nodes
+    assert short.w < long.w and short.h < long.h  # the sub-label adds a line
+    assert (fixed.w, fixed.h) == (300, 80)
+    styles = [node_style(s, node) for node in s.graph.nodes]
+    assert overflows(s, s.graph.nodes, styles) == []
+
+
+def test_overflows_report_boxes_too_narrow_for_their_label():
+    s = spec([{"id": "ok", "type": "fact", "label": "x", "w": 200, "h": 60},
+              {"id": "tight", "type": "fact", "label": "A label that cannot fit", "w": 60, "h": 60}])
+    styles = [node_style(s, node) for node in s.graph.nodes]
+    (node_id, needed, width), = overflows(s, s.graph.nodes, styles)
+    assert (node_id, width) == ("tight", 60)
+    assert needed > 60 + 2 * PAD_X
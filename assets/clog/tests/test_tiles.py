@@ -0,0 +1,49 @@
+import json
+import os
+
+import pytest
+
+from diagram.paths import spec_path
+from diagram.spec import load_spec
+from diagram.tiles import TileSet, primitive_bbox
+
+
+def test_primitive_bboxes():
+    assert primitive_bbox({"tag": "line", "x1": 10, "y1": 40, "x2": 0, "y2": 5}) == (0, 5, 10, 40)
+    assert primitive_bbox({"tag": "circle", "cx": 10, "cy": 10, "r": 4}) == (6, 6, 14, 14)
+    assert primitive_bbox({"tag": "path", "d": "M0,10 L30,-5"}) == (0, -5, 30, 10)
+    assert primitive_bbox({"tag": "rect", "x": 1, "y": 2, "width": 3, "height": "4"}) == (1, 2, 4, 6)
+    x0, _, x1, _ = primitive_bbox({"tag": "text", "x": 100, "text": "abcd", "text-anchor": "middle",
+                                   "font-size": 10})
+    assert (x0, x1) == pytest.approx((88, 112))
+
+
+@pytest.fixture
+def spec():
+    return load_spec(spec_path("csd_architecture"))
+
+
+def test_every_element_lands_in_some_tile(spec, tmp_path):
+    tiles = TileSet(spec, tmp_path, tile=256)
+    fragments, buckets = tiles._bucket()
+    assert set().union(*buckets.values()) == set(range(len(fragments)))
+    assert all(0 <= c < tiles.cols and 0 <= r < tiles.rows for c, r in buckets)
+    index = tiles.write()
+    assert index == json.loads((tmp_path / "tiles.json").read_text())
+    for key, entry in index["tiles"].items():
+        col, row = map(int, key.split(","))
+        svg = (tmp_path / entry["file"]).read_text()
+        assert f'viewBox="{col * 256} {row * 256} 256 256"' in svg
+        assert "<style" in svg and "<use" not in svg  # each tile stands alone
+    assert (tmp_path / "index.html").exists()
+
+
+def test_unchanged_tiles_are_kept_and_stale_ones_removed(spec, tmp_path):
+    first = TileSet(spec, tmp_path, tile=256).write()
+    tiles_dir = tmp_path / "tiles"
+    for name in os.listdir(tiles_dir):
+        os.utime(tiles_dir / name, ns=(0, 0))
+    assert TileSet(spec, tmp_path, tile=256).write() == first
+    assert all(os.stat(tiles_dir / name).st_mtime_ns == 0 for name in os.listdir(tiles_dir))
+    second = TileSet(spec, tmp_path, tile=512).write()
+    assert sorted(os.listdir(tiles_dir)) == sorted(entry["file"][6:] for entry in second["tiles"].values())
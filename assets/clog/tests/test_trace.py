@@ -0,0 +1,58 @@
+import io
+import json
+
+import pytest
+
+from diagram.trace import TraceError, TraceGraph, main, read_events
+
+
+def trace(*events):
+    return io.StringIO("".join(json.dumps(event) + "\n" for event in events))
+
+
+def test_auto_labels_are_numbered_per_kind():
+    graph = TraceGraph().ingest(read_events(trace(
+        {"event": "node", "id": "r", "type": "ROOT"},
+        {"event": "node", "id": "a", "type": "CTXB"},
+        {"event": "node", "id": "b", "type": "RSN"},
+        {"event": "node", "id": "c", "type": "CTXB"},
+        {"event": "node", "id": "d", "type": "fact", "label": "given"},
+    )))
+    labels = {node_id: label for node_id, (_, label, _) in graph.nodes.items()}
+    assert labels == {"r": "ROOT-01", "a": "CTXB-01", "b": "RSN-01", "c": "CTXB-02", "d": "given"}
+
+
+def test_oldest_nodes_and_their_edges_are_evicted():
+    graph = TraceGraph(max_nodes=2).ingest(read_events(trace(
+        {"event": "node", "id": "a"},
+        {"event": "node", "id": "b"},
+        {"event": "edge", "source": "a", "target": "b"},
+        {"event": "node", "id": "c"},
+        {"event": "edge", "source": "a", "target": "c"},
+        {"event": "edge", "source": "b", "target": "c"},
+    )))
+    assert list(graph.nodes) == ["b", "c"]
+    assert list(graph.edges()) == [["b", "c"]]
+    assert graph.counts == {"nodes": 3, "edges": 2, "evicted": 1, "ignored": 1}
+
+
+def test_bad_lines_and_events_raise_trace_errors():
+    with pytest.raises(TraceError, match="line 2"):
+        list(read_events(io.StringIO('{"event": "node", "id": "a"}\nnot json\n')))
+    with pytest.raises(TraceError, match="unknown type"):
+        TraceGraph().add_node("a", type="widget")
+    with pytest.raises(TraceError, match="missing 'target'"):
+        TraceGraph().ingest([{"event": "edge", "source": "a"}])
+
+
+def test_main_renders_the_window(tmp_path, capsys):
+    source = tmp_path / "run.jsonl"
+    source.write_text(trace(
+        {"event": "node", "id": "r", "type": "root"},
+        *({"event": "node", "id": f"n{i}"} for i in range(4)),
+        *({"event": "edge", "source": "r", "target": f"n{i}"} for i in range(4)),
+    ).getvalue())
+    target = tmp_path / "run.svg"
+    assert main([str(source), "-o", str(target), "--max-nodes", "3"]) == 0
+    assert target.read_text().startswith("<svg")
+    assert "3 nodes, 0 edges (2 evicted, 4 ignored events)" in capsys.readouterr().out
@@ -0,0 +1,55 @@
+import pytest
+
+from diagram.paths import spec_path
+from diagram.render import Scene
+from diagram.spec import SpecError, load_spec
+from diagram.variants import Variant, body_key, parse_variants, render_variants
+
+
+@pytest.fixture
+def spec():
+    return load_spec(spec_path("ccp_architecture"))
+
+
+def variants(tmp_path):
+    return [Variant("full", str(tmp_path / "full.svg")),
+            Variant("featured", str(tmp_path / "featured.svg"), crop="nodes", width=600),
+            Variant("bare", str(tmp_path / "bare.svg"), footer=False)]
+
+
+def test_shared_bodies_are_serialized_once(spec, tmp_path):
+    scene = Scene(spec)
+    full, featured, bare = vs = variants(tmp_path)
+    results = render_variants(scene, vs, jobs=1)
+    assert [name for name, *_ in results] == ["full", "featured", "bare"]
+    shared = body_key(scene, full)
+    assert body_key(scene, featured) == shared != body_key(scene, bare)
+    assert list(scene.bodies) == [shared]  # a body used once is streamed, not kept
+    markup, _ = scene.bodies[shared]
+    texts = {v.name: open(v.output, encoding="utf-8").read() for v in vs}
+    assert markup in texts["full"] and markup in texts["featured"]
+    assert 'width="600"' in texts["featured"]
+
+
+def test_worker_processes_write_the_same_files(spec, tmp_path):
+    (tmp_path / "serial").mkdir()
+    (tmp_path / "parallel").mkdir()
+    serial = render_variants(Scene(spec), variants(tmp_path / "serial"), jobs=1)
+    parallel = render_variants(Scene(spec), variants(tmp_path / "parallel"), jobs=2)
+    assert [(name, size, cost) for name, _, size, cost in serial] == \
+           [(name, size, cost) for name, _, size, cost in parallel]
+    for (_, a, *_), (_, b, *_) in zip(serial, parallel, strict=True):
+        with open(a, "rb") as f, open(b, "rb") as g:
+            assert f.read() == g.read()
+
+
+@pytest.mark.parametrize("raw, message", [
+    ({"name": "x"}, "needs a name and an output"),
+    ({"name": "x", "output": "x.svg", "colour": "red"}, "unknown fields"),
+    ({"name": "x", "output": "x.svg", "crop": [0, 0, 10]}, "has crop"),
+    ({"name": "x", "output": "x.svg", "theme": "sepia"}, "has no variant 'sepia'"),
+])
+def test_bad_variants_are_rejected(spec, tmp_path, raw, message):
+    spec.variants = [raw]
+    with pytest.raises(SpecError, match=message):
+        parse_variants(spec, root=str(tmp_path))
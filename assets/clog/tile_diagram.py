@@ -0,0 +1,8 @@
+"""Cut a diagram into SVG tiles with a lazy-loading HTML viewer (see diagram.tiles)."""
+
+import sys
+
+from diagram.tiles import main
+
+if __name__ == "__main__":
+    sys.exit(main())